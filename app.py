@@ -15,7 +15,8 @@ from fastapi.templating import Jinja2Templates
 from uvicorn import run as app_run
 
 from src.pipline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipline.training_pipeline import TrainPipeline
+from src.pipline.monitoring_pipeline import FeatureMonitor
+from src.pipline.training_pipeline import TrainPipeline, resume_pipeline
 
 # -----------------------------
 # App + Config
@@ -53,6 +54,24 @@ def health():
     return {"status": "ok"}
 
 
+# -----------------------------
+# Live feature monitoring
+# -----------------------------
+feature_monitor = FeatureMonitor()
+
+
+@app.get("/monitoring")
+def monitoring():
+    """
+    Compare served features and predictions with the production model's training data.
+    """
+    try:
+        return feature_monitor.report()
+    except Exception as e:
+        traceback.print_exc()
+        return {"status": False, "error": str(e)}
+
+
 # -----------------------------
 # Form parser
 # -----------------------------
@@ -124,6 +143,19 @@ async def trainRouteClient():
         return Response(f"Error Occurred! {e}", status_code=500)
 
 
+@app.get("/train/resume")
+async def resumeTrainRouteClient():
+    """
+    Resume the latest training run from its first incomplete stage.
+    """
+    try:
+        resume_pipeline()
+        return Response("Training successful!!!")
+    except Exception as e:
+        traceback.print_exc()
+        return Response(f"Error Occurred! {e}", status_code=500)
+
+
 @app.post("/")
 async def predictRouteClient(request: Request):
     """
@@ -152,7 +184,9 @@ async def predictRouteClient(request: Request):
 
         # Predictor
         model_predictor = VehicleDataClassifier()
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        prediction = model_predictor.predict(dataframe=vehicle_df)
+        feature_monitor.observe(vehicle_df, prediction)
+        value = prediction[0]
 
         status = "Response-Yes" if int(value) == 1 else "Response-No"
 
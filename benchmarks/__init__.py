@@ -0,0 +1,5 @@
+"""
+Initializes the benchmarks package for the Vehicle Insurance Data Pipeline MLops project.
+
+Benchmarks are run from the project root, e.g. `python -m benchmarks.bson_decoding_benchmark`.
+"""
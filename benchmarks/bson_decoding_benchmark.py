@@ -0,0 +1,110 @@
+"""
+Benchmark of the collection export decoding paths for the Vehicle Insurance Data Pipeline MLops project.
+
+Compares rows/second of the dict based path (bson.decode_all + DataFrame from a list of dicts, as done by
+Proj1Data.export_collection_as_dataframe) against RawBSONColumnDecoder on the same raw BSON batches, and checks
+that both give the same frame.
+No MongoDB server is needed: the batches are encoded in memory, so only decoding is measured.
+
+Usage:
+    python -m benchmarks.bson_decoding_benchmark --rows 100000 1000000 --batch-size 10000
+"""
+import argparse
+import time
+
+import bson
+import numpy as np
+import pandas as pd
+
+from src.data_access.raw_bson_decoder import RawBSONColumnDecoder
+from src.constants import MONGODB_EXPORT_BATCH_SIZE, SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file
+
+
+def make_raw_batches(n_rows: int, batch_size: int, seed: int = 42) -> list:
+    """
+    Encodes n_rows documents shaped like the Vehicle-Insurance-Data collection into raw BSON batches.
+    About 1% of the Gender and Annual_Premium values are the "na" the raw collection uses for missing values.
+    """
+    rng = np.random.default_rng(seed)
+    gender = rng.choice(["Male", "Female"], n_rows)
+    vehicle_age = rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"], n_rows)
+    vehicle_damage = rng.choice(["Yes", "No"], n_rows)
+    age = rng.integers(20, 86, n_rows)
+    region = rng.integers(0, 53, n_rows).astype(float)
+    insured = rng.integers(0, 2, n_rows)
+    premium = rng.gamma(4.0, 7500.0, n_rows).round(1)
+    channel = rng.integers(1, 164, n_rows).astype(float)
+    vintage = rng.integers(10, 300, n_rows)
+    response = (rng.random(n_rows) < 0.12).astype(int)
+    gender_missing = rng.random(n_rows) < 0.01
+    premium_missing = rng.random(n_rows) < 0.01
+
+    batches = []
+    for start in range(0, n_rows, batch_size):
+        docs = []
+        for i in range(start, min(start + batch_size, n_rows)):
+            docs.append(bson.encode({
+                "_id": bson.ObjectId(), "id": i + 1, "Gender": "na" if gender_missing[i] else str(gender[i]), "Age": int(age[i]),
+                "Driving_License": 1, "Region_Code": float(region[i]), "Previously_Insured": int(insured[i]),
+                "Vehicle_Age": str(vehicle_age[i]), "Vehicle_Damage": str(vehicle_damage[i]),
+                "Annual_Premium": "na" if premium_missing[i] else float(premium[i]), "Policy_Sales_Channel": float(channel[i]),
+                "Vintage": int(vintage[i]), "Response": int(response[i]),
+            }))
+        batches.append(b"".join(docs))
+    return batches
+
+
+def decode_with_dicts(batches: list) -> pd.DataFrame:
+    documents = []
+    for batch in batches:
+        documents.extend(bson.decode_all(batch))
+    df = pd.DataFrame(documents)
+    df = df.drop(columns=["_id", "id"])
+    df.replace({"na": np.nan}, inplace=True)
+    return df
+
+
+def decode_with_columns(batches: list, column_types: dict, n_rows: int) -> pd.DataFrame:
+    decoder = RawBSONColumnDecoder(column_types=column_types, capacity=n_rows)
+    for batch in batches:
+        decoder.add_batch(batch)
+    return decoder.to_dataframe()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--batch-size", type=int, default=MONGODB_EXPORT_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Column types come from the schema, as in Proj1Data.get_export_column_types
+    schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+    column_types = {name: dtype for column in schema_config["columns"] for name, dtype in column.items()
+                    if name not in ("id", schema_config["drop_columns"])}
+
+    print("=" * 70)
+    print(f"{'rows':>10} | {'dict path rows/s':>18} | {'column path rows/s':>18} | {'speedup':>7}")
+    print("=" * 70)
+    for n_rows in args.rows:
+        batches = make_raw_batches(n_rows, args.batch_size)
+        timings, frames = {}, {}
+        for name, func in (("dict", lambda: decode_with_dicts(batches)),
+                           ("column", lambda: decode_with_columns(batches, column_types, n_rows))):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                df = func()
+                best = min(best, time.perf_counter() - start)
+            assert len(df) == n_rows
+            timings[name], frames[name] = best, df
+        # Both paths must give the same frame, "na" included (column dtypes may differ)
+        pd.testing.assert_frame_equal(frames["dict"][frames["column"].columns], frames["column"], check_dtype=False)
+        print(f"{n_rows:>10} | {n_rows / timings['dict']:>18,.0f} | {n_rows / timings['column']:>18,.0f} | "
+              f"{timings['dict'] / timings['column']:>6.1f}x")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
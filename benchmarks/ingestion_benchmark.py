@@ -0,0 +1,112 @@
+"""
+Benchmark of DataIngestion.initiate_data_ingestion for the Vehicle Insurance Data Pipeline MLops project.
+
+For every size, synthetic Vehicle-Insurance-Data documents are bulk inserted into a local mongod (--mongodb-url)
+or into an in-process mongomock stand-in, then the ingestion stage is timed and its peak RSS is sampled.
+Each size runs in a fresh process so that peak memory of one size does not leak into the next.
+With the in-process stand-in the documents live in the benchmark process, so its memory numbers include them;
+use a local mongod for realistic memory numbers and for sizes of 1M documents and more.
+
+Usage:
+    python -m benchmarks.ingestion_benchmark --rows 100000 1000000 10000000 --mongodb-url mongodb://localhost:27017
+    python -m benchmarks.ingestion_benchmark --rows 100000 --export-mode aggregate
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+EXPORT_MODES = {
+    # mode: (use_aggregation_pushdown, decode_raw_bson)
+    "find": (False, False),
+    "aggregate": (True, False),
+    "raw": (True, True),
+}
+
+
+def run_ingestion(n_rows: int, mongodb_url: str, export_mode: str, seed: int, chunk_size: int) -> dict:
+    """
+    Loads n_rows synthetic documents and runs the data ingestion stage on them (executed in a child process).
+    """
+    from src.configuration.mongo_db_connection import MongoDBClient
+    from src.components.data_ingestion import DataIngestion
+    from src.constants import DATA_SKETCH_FILE_NAME, DATABASE_NAME
+    from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+    from src.entity.config_entity import DataIngestionConfig
+    from src.utils.profiling_utils import PeakRSSSampler
+
+    if mongodb_url:
+        import pymongo
+        MongoDBClient.client = pymongo.MongoClient(mongodb_url)
+    else:
+        import mongomock  # in-process stand-in, only needed when no mongod is given
+        MongoDBClient.client = mongomock.MongoClient()
+
+    collection_name = f"benchmark-ingestion-{n_rows}"
+    collection = MongoDBClient.client[DATABASE_NAME][collection_name]
+    collection.drop()
+    start = time.perf_counter()
+    SyntheticVehicleInsuranceData(seed=seed).insert_into_collection(collection, n_rows, chunk_size=chunk_size)
+    insert_seconds = time.perf_counter() - start
+
+    work_dir = tempfile.mkdtemp(prefix="ingestion-benchmark-")
+    use_aggregation, decode_raw = EXPORT_MODES[export_mode]
+    config = DataIngestionConfig(
+        data_ingestion_dir=work_dir,
+        feature_store_file_path=os.path.join(work_dir, "feature_store", "data.csv"),
+        training_file_path=os.path.join(work_dir, "ingested", "train.csv"),
+        testing_file_path=os.path.join(work_dir, "ingested", "test.csv"),
+        data_sketch_file_path=os.path.join(work_dir, "sketch", DATA_SKETCH_FILE_NAME),
+        collection_name=collection_name,
+        use_aggregation_pushdown=use_aggregation,
+        decode_raw_bson=decode_raw,
+    )
+    try:
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            DataIngestion(data_ingestion_config=config).initiate_data_ingestion()
+            ingestion_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        collection.drop()
+
+    return {
+        "rows": n_rows,
+        "insert_seconds": insert_seconds,
+        "ingestion_seconds": ingestion_seconds,
+        "peak_rss_mb": (sampler.peak_bytes or 0) / 2 ** 20,
+        "peak_increase_mb": (sampler.peak_increase_bytes or 0) / 2 ** 20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--mongodb-url", default=os.getenv("BENCHMARK_MONGODB_URL", ""),
+                        help="local mongod to load the data into; an in-process mongomock is used when empty")
+    parser.add_argument("--export-mode", choices=sorted(EXPORT_MODES), default=None,
+                        help="defaults to 'raw' with a mongod and 'aggregate' with the in-process stand-in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+    export_mode = args.export_mode or ("raw" if args.mongodb_url else "aggregate")
+
+    print("=" * 86)
+    print(f"Ingestion benchmark - backend: {args.mongodb_url or 'in-process mongomock'}, export mode: {export_mode}")
+    print("=" * 86)
+    print(f"{'rows':>10} | {'insert s':>9} | {'ingestion s':>11} | {'rows/s':>12} | {'peak RSS MB':>11} | {'peak increase MB':>16}")
+    print("-" * 86)
+    context = multiprocessing.get_context("spawn")
+    for n_rows in args.rows:
+        with context.Pool(processes=1) as pool:
+            result = pool.apply(run_ingestion, (n_rows, args.mongodb_url, export_mode, args.seed, args.chunk_size))
+        print(f"{result['rows']:>10} | {result['insert_seconds']:>9.2f} | {result['ingestion_seconds']:>11.2f} | "
+              f"{result['rows'] / result['ingestion_seconds']:>12,.0f} | {result['peak_rss_mb']:>11.1f} | "
+              f"{result['peak_increase_mb']:>16.1f}")
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Local S3-compatible endpoint for benchmarks and tests of the Vehicle Insurance Data Pipeline MLops project.
+
+LocalS3 points S3Client, and so every SimpleStorageService, at a local endpoint for the duration of a with block:
+a given S3-compatible server (MinIO, LocalStack) or an in-process moto server started on a free port
+(pip install "moto[server]"). The buckets are created on entry; on exit the previous connection is dropped
+and the metadata cache is cleared, so no answer of the local endpoint leaks into later code.
+
+Usage:
+    with LocalS3(buckets=["my-bucket"]) as endpoint_url:
+        SimpleStorageService().upload_file("model.pkl", "model.pkl", "my-bucket", remove=False)
+"""
+import os
+from typing import Iterable, Optional
+
+from botocore.exceptions import ClientError
+
+from src.configuration.aws_connection import S3Client
+
+
+class LocalS3:
+    def __init__(self, endpoint_url: str = "", buckets: Iterable[str] = (), region_name: str = "us-east-1") -> None:
+        """
+        :param endpoint_url: S3-compatible endpoint to use; an in-process moto server is started when empty
+        :param buckets: buckets created on entry (existing ones are kept)
+        :param region_name: region of the client
+        """
+        self.endpoint_url = endpoint_url
+        self.buckets = list(buckets)
+        self.region_name = region_name
+        self.server = None
+
+    @property
+    def is_moto(self) -> bool:
+        return self.server is not None
+
+    def __enter__(self) -> str:
+        if not self.endpoint_url:
+            from moto.server import ThreadedMotoServer  # only needed when no endpoint is given
+            self.server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+            self.server.start()
+            host, port = self.server.get_host_and_port()
+            self.endpoint_url = f"http://{host}:{port}"
+        self.connect()
+        for bucket_name in self.buckets:
+            self.create_bucket(bucket_name)
+        return self.endpoint_url
+
+    def connect(self) -> S3Client:
+        """
+        Points the shared S3Client connection at the local endpoint (again, e.g. after S3Client.reset()).
+        """
+        # Local servers accept any credentials, real ones from the environment are used when set
+        return S3Client(region_name=self.region_name, endpoint_url=self.endpoint_url,
+                        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID") or "local",
+                        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY") or "local")
+
+    def create_bucket(self, bucket_name: str) -> None:
+        """
+        Creates a bucket on the local endpoint, an existing one is kept.
+        """
+        try:
+            self.connect().s3_client.create_bucket(Bucket=bucket_name)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                raise
+
+    def __exit__(self, *exc_info) -> Optional[bool]:
+        from src.cloud_storage.aws_storage import SimpleStorageService
+        S3Client.reset()
+        SimpleStorageService.metadata_cache.invalidate()
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+            self.endpoint_url = ""
+        return None
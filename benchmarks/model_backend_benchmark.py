@@ -0,0 +1,74 @@
+"""
+Benchmark of the model backends of ModelTrainer for the Vehicle Insurance Data Pipeline MLops project.
+
+For every size, synthetic records are encoded and scaled like in the transformation stage and each backend of
+src/utils/model_utils.py is trained with the hyperparameters of config/model.yaml. Training time, serialized
+model size, single-row and batch inference latency and F1 on the test split are reported.
+
+Usage:
+    python -m benchmarks.model_backend_benchmark --rows 50000 200000
+    python -m benchmarks.model_backend_benchmark --rows 1000000 --backends hist_gradient_boosting logistic_regression
+"""
+import argparse
+import time
+
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.estimator import FeatureEncoder
+from src.utils.main_utils import read_yaml_file
+from src.utils.model_utils import (MODEL_BACKENDS, build_model, measure_inference_latency, model_size_bytes,
+                                   read_model_config)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--backends", nargs="+", choices=list(MODEL_BACKENDS), default=list(MODEL_BACKENDS))
+    parser.add_argument("--class-weight", default="balanced", help="class_weight of the models ('none' to disable)")
+    args = parser.parse_args()
+
+    schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+    trainer_config = ModelTrainerConfig()
+    class_weight = None if args.class_weight == "none" else args.class_weight
+
+    print("=" * 92)
+    print(f"{'rows':>9} | {'backend':>22} | {'fit s':>7} | {'size KB':>9} | {'1-row ms':>8} | "
+          f"{'batch ms':>8} | {'test F1':>7}")
+    print("=" * 92)
+    for n_rows in args.rows:
+        df = SyntheticVehicleInsuranceData(seed=42).generate(n_rows)
+        x, y = df.drop(columns=[TARGET_COLUMN]), df[TARGET_COLUMN].to_numpy()
+        x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.25, random_state=42, stratify=y)
+        preprocessor = Pipeline(steps=[
+            ("FeatureEncoder", FeatureEncoder.from_schema(schema_config)),
+            ("Preprocessor", ColumnTransformer(transformers=[
+                ("StandardScaler", StandardScaler(), schema_config["num_features"]),
+                ("MinMaxScaler", MinMaxScaler(), schema_config["mm_columns"])], remainder="passthrough")),
+        ])
+        x_train = preprocessor.fit_transform(x_train).astype("float32")
+        x_test = preprocessor.transform(x_test).astype("float32")
+
+        for backend in args.backends:
+            _, params = read_model_config(trainer_config.model_config_file_path, backend=backend)
+            model = build_model(backend, params, class_weight=class_weight,
+                                random_state=trainer_config._random_state)
+            start = time.perf_counter()
+            model.fit(x_train, y_train)
+            fit_seconds = time.perf_counter() - start
+            latency = measure_inference_latency(model, x_test, batch_size=trainer_config.latency_batch_size,
+                                                repeat=trainer_config.latency_repeat)
+            f1 = f1_score(y_test, model.predict(x_test))
+            print(f"{n_rows:>9} | {backend:>22} | {fit_seconds:>7.2f} | {model_size_bytes(model) / 1024:>9.1f} | "
+                  f"{latency['single_row_latency_ms']:>8.2f} | {latency['batch_latency_ms']:>8.2f} | {f1:>7.4f}")
+        print("-" * 92)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of the resampling strategies of DataTransformation for the Vehicle Insurance Data Pipeline MLops project.
+
+For every size, synthetic records are encoded and scaled like in the transformation stage, the training split is
+resampled with each strategy and a RandomForestClassifier (configured like ModelTrainer) is fitted on the result.
+Resampling time and F1 on the untouched test split are reported.
+
+Usage:
+    python -m benchmarks.resampling_benchmark --rows 50000 200000 --n-jobs -1
+    python -m benchmarks.resampling_benchmark --rows 1000000 --strategies smoteenn_chunked random_under class_weight
+"""
+import argparse
+import time
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+from src.entity.config_entity import ModelTrainerConfig
+from src.entity.estimator import FeatureEncoder
+from src.utils.main_utils import read_yaml_file
+from src.utils.resampling_utils import RESAMPLING_STRATEGIES, Resampler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--strategies", nargs="+", choices=RESAMPLING_STRATEGIES, default=list(RESAMPLING_STRATEGIES))
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--n-estimators", type=int, default=100, help="trees of the evaluation model")
+    args = parser.parse_args()
+
+    schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+    trainer_config = ModelTrainerConfig()
+
+    print("=" * 78)
+    print(f"{'rows':>9} | {'strategy':>16} | {'resample s':>10} | {'train rows':>10} | {'fit s':>7} | {'test F1':>7}")
+    print("=" * 78)
+    for n_rows in args.rows:
+        df = SyntheticVehicleInsuranceData(seed=42).generate(n_rows)
+        x, y = df.drop(columns=[TARGET_COLUMN]), df[TARGET_COLUMN].to_numpy()
+        x_train, x_test, y_train, y_test = train_test_split(x, y, test_size=0.25, random_state=42, stratify=y)
+        preprocessor = Pipeline(steps=[
+            ("FeatureEncoder", FeatureEncoder.from_schema(schema_config)),
+            ("Preprocessor", ColumnTransformer(transformers=[
+                ("StandardScaler", StandardScaler(), schema_config["num_features"]),
+                ("MinMaxScaler", MinMaxScaler(), schema_config["mm_columns"])], remainder="passthrough")),
+        ])
+        x_train, x_test = preprocessor.fit_transform(x_train), preprocessor.transform(x_test)
+
+        for strategy in args.strategies:
+            resampler = Resampler(strategy=strategy, n_jobs=args.n_jobs, chunk_size=args.chunk_size, random_state=42)
+            start = time.perf_counter()
+            x_resampled, y_resampled = resampler.fit_resample(x_train, y_train)
+            resample_seconds = time.perf_counter() - start
+
+            model = RandomForestClassifier(n_estimators=args.n_estimators,
+                                           min_samples_split=trainer_config._min_samples_split,
+                                           min_samples_leaf=trainer_config._min_samples_leaf,
+                                           max_depth=trainer_config._max_depth,
+                                           criterion=trainer_config._criterion,
+                                           random_state=trainer_config._random_state,
+                                           class_weight=resampler.class_weight,
+                                           n_jobs=args.n_jobs)
+            start = time.perf_counter()
+            model.fit(x_resampled, y_resampled)
+            fit_seconds = time.perf_counter() - start
+            f1 = f1_score(y_test, model.predict(x_test))
+            print(f"{n_rows:>9} | {strategy:>16} | {resample_seconds:>10.2f} | {len(x_resampled):>10} | "
+                  f"{fit_seconds:>7.2f} | {f1:>7.4f}")
+        print("-" * 78)
+
+
+if __name__ == "__main__":
+    main()
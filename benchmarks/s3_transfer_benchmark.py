@@ -0,0 +1,132 @@
+"""
+Benchmark of compressed model transfers of SimpleStorageService for the Vehicle Insurance Data Pipeline MLops project.
+
+Random forests of increasing size are trained on synthetic records and serialized like the trainer does. Each one
+is pushed and loaded back through a local S3-compatible endpoint (--endpoint-url, e.g. MinIO or LocalStack), or
+through an in-process moto server when none is given. The baseline is the previous behaviour: an uncompressed
+upload with the default transfer settings, a full-body GET read into memory and pickle.loads. It is compared with
+upload_model/load_model (streamed into the unpickler) for every installed codec and transfer concurrency.
+Stored size, upload time, time until the model is ready and the peak of Python allocations during the load
+(model included, traced with tracemalloc in a second load) are reported.
+moto reads the whole object for every range GET, and the in-process server's allocations are traced too, so
+streamed loads of large objects look slower and bigger on it than on S3 or MinIO; use a real endpoint to tune
+the part size and prefetch.
+
+Usage:
+    python -m benchmarks.s3_transfer_benchmark --n-estimators 100 500 --concurrency 1 10
+    python -m benchmarks.s3_transfer_benchmark --endpoint-url http://localhost:9000 --part-size-mb 8
+"""
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+import dill  # type: ignore
+from boto3.s3.transfer import TransferConfig
+from sklearn.ensemble import RandomForestClassifier
+
+from benchmarks.local_s3 import LocalS3
+from src.configuration.aws_connection import S3Client
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+from src.entity.estimator import FeatureEncoder
+from src.utils.compression_utils import available_codecs
+from src.utils.main_utils import read_yaml_file
+
+BUCKET_NAME = "benchmark-model-registry"
+
+
+def train_model_file(n_rows: int, n_estimators: int, work_dir: str) -> str:
+    """
+    Trains a random forest on n_rows synthetic records and serializes it like save_object.
+    """
+    df = SyntheticVehicleInsuranceData(seed=42).generate(n_rows)
+    x = FeatureEncoder.from_schema(read_yaml_file(file_path=SCHEMA_FILE_PATH)).fit_transform(
+        df.drop(columns=[TARGET_COLUMN])).astype("float32")
+    model = RandomForestClassifier(n_estimators=n_estimators, min_samples_leaf=2, n_jobs=-1, random_state=42)
+    model.fit(x, df[TARGET_COLUMN].to_numpy())
+    file_path = os.path.join(work_dir, f"model-{n_estimators}.pkl")
+    with open(file_path, "wb") as file_obj:
+        dill.dump(model, file_obj)
+    return file_path
+
+
+def measure_load(load) -> tuple:
+    """
+    Returns the seconds until load() returns and the peak of Python allocations (MB) of another call.
+    """
+    start = time.perf_counter()
+    load()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    load()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak_bytes / 2 ** 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[100, 300],
+                        help="trees of the benchmarked models (model size grows with them)")
+    parser.add_argument("--rows", type=int, default=50_000, help="synthetic records the models are trained on")
+    parser.add_argument("--codecs", nargs="+", choices=available_codecs(), default=available_codecs())
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--endpoint-url", default=os.getenv("BENCHMARK_S3_ENDPOINT_URL", ""),
+                        help="local S3-compatible endpoint; an in-process moto server is used when empty")
+    args = parser.parse_args()
+
+    local_s3 = LocalS3(args.endpoint_url, buckets=[BUCKET_NAME])
+    with local_s3 as endpoint_url:
+        run(args, endpoint_url, moto=local_s3.is_moto)
+
+
+def run(args: argparse.Namespace, endpoint_url: str, moto: bool) -> None:
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    s3 = SimpleStorageService()
+    part_size = args.part_size_mb * 1024 * 1024
+
+    print("=" * 96)
+    print(f"S3 transfer benchmark - endpoint: {endpoint_url}{' (moto)' if moto else ''}, "
+          f"part size {args.part_size_mb} MB")
+    print("=" * 96)
+    print(f"{'model MB':>9} | {'codec':>8} | {'threads':>7} | {'stored MB':>9} | {'upload s':>8} | "
+          f"{'ready s':>7} | {'load MB/s':>9} | {'peak MB':>7}")
+    print("-" * 96)
+    with tempfile.TemporaryDirectory(prefix="s3-transfer-benchmark-") as work_dir:
+        for n_estimators in args.n_estimators:
+            model_file_path = train_model_file(args.rows, n_estimators, work_dir)
+            size_mb = os.path.getsize(model_file_path) / 2 ** 20
+
+            # Baseline: default transfer settings, uncompressed object, full body read before unpickling
+            key = f"baseline-{n_estimators}.pkl"
+            start = time.perf_counter()
+            S3Client.s3_client.upload_file(model_file_path, BUCKET_NAME, key)
+            upload_seconds = time.perf_counter() - start
+            load_seconds, peak_mb = measure_load(lambda: pickle.loads(
+                S3Client.s3_client.get_object(Bucket=BUCKET_NAME, Key=key)["Body"].read()))
+            print(f"{size_mb:>9.1f} | {'baseline':>8} | {'-':>7} | {size_mb:>9.1f} | {upload_seconds:>8.2f} | "
+                  f"{load_seconds:>7.2f} | {size_mb / load_seconds:>9.1f} | {peak_mb:>7.1f}")
+
+            for codec in args.codecs:
+                for concurrency in args.concurrency:
+                    s3.transfer_config = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size,
+                                                        max_concurrency=concurrency, use_threads=concurrency > 1)
+                    key = f"{codec}-{concurrency}-{n_estimators}.pkl"
+                    start = time.perf_counter()
+                    compression = s3.upload_model(model_file_path, key, bucket_name=BUCKET_NAME, remove=False,
+                                                  codec=codec)
+                    upload_seconds = time.perf_counter() - start
+                    load_seconds, peak_mb = measure_load(lambda: s3.load_model(key, bucket_name=BUCKET_NAME))
+                    print(f"{size_mb:>9.1f} | {codec:>8} | {concurrency:>7} | "
+                          f"{compression['compressed_size'] / 2 ** 20:>9.1f} | {upload_seconds:>8.2f} | "
+                          f"{load_seconds:>7.2f} | {size_mb / load_seconds:>9.1f} | {peak_mb:>7.1f}")
+            print("-" * 96)
+    print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
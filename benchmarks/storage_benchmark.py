@@ -0,0 +1,173 @@
+"""
+Benchmark suite of SimpleStorageService I/O for the Vehicle Insurance Data Pipeline MLops project.
+
+Runs against a local S3-compatible endpoint (--endpoint-url, e.g. MinIO or LocalStack) or an in-process moto
+server, through the same S3Client connection the pipeline uses, at the sizes of the project's artifacts:
+- objects of --sizes-mb: upload_file throughput, download throughput (multipart transfer settings) and
+  time-to-first-byte of a GET;
+- data sketches and datasets of --rows synthetic records: upload_file and read_csv;
+- models of --n-estimators trees: upload_model and load_model latency;
+- existence checks of --keys keys: s3_key_path_available uncached and cached, and keys_available in one batch.
+Latencies are the median (p50) and 95th percentile (p95) of --repeat runs. Numbers of the in-process moto
+server include its own work in this process; use a real endpoint for absolute throughput.
+
+Usage:
+    python -m benchmarks.storage_benchmark
+    python -m benchmarks.storage_benchmark --sizes-mb 1 64 256 --rows 1000000 --endpoint-url http://localhost:9000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmarks.local_s3 import LocalS3
+from benchmarks.s3_transfer_benchmark import train_model_file
+from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+
+BUCKET_NAME = "benchmark-storage"
+
+
+def timings(func: Callable[[], object], repeat: int) -> List[float]:
+    """
+    Returns the seconds of repeat calls of func.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def p50(seconds: List[float]) -> float:
+    return statistics.median(seconds)
+
+
+def p95(seconds: List[float]) -> float:
+    return sorted(seconds)[min(len(seconds) - 1, round(0.95 * (len(seconds) - 1)))]
+
+
+def time_to_first_byte(s3_client, key: str) -> float:
+    start = time.perf_counter()
+    body = s3_client.get_object(Bucket=BUCKET_NAME, Key=key)["Body"]
+    body.read(1)
+    seconds = time.perf_counter() - start
+    body.close()
+    return seconds
+
+
+def benchmark_objects(s3, sizes_mb: List[int], repeat: int, work_dir: str) -> None:
+    print(f"{'object MB':>9} | {'upload MB/s':>11} | {'download MB/s':>13} | {'TTFB p50 ms':>11} | {'TTFB p95 ms':>11}")
+    print("-" * 96)
+    for size_mb in sizes_mb:
+        file_path = os.path.join(work_dir, f"object-{size_mb}.bin")
+        with open(file_path, "wb") as file_obj:
+            for _ in range(size_mb):
+                file_obj.write(os.urandom(2 ** 20))
+        key = f"objects/{size_mb}.bin"
+        upload = timings(lambda: s3.upload_file(file_path, key, BUCKET_NAME, remove=False), repeat)
+        download_path = os.path.join(work_dir, "download.bin")
+
+        def download() -> None:
+            with open(download_path, "wb") as file_obj:
+                s3.s3_client.download_fileobj(BUCKET_NAME, key, file_obj, Config=s3.transfer_config)
+
+        download = timings(download, repeat)
+        ttfb = [time_to_first_byte(s3.s3_client, key) for _ in range(repeat)]
+        print(f"{size_mb:>9} | {size_mb / p50(upload):>11.1f} | {size_mb / p50(download):>13.1f} | "
+              f"{p50(ttfb) * 1000:>11.1f} | {p95(ttfb) * 1000:>11.1f}")
+        os.remove(file_path)
+
+
+def benchmark_csv(s3, rows: List[int], repeat: int, work_dir: str) -> None:
+    print(f"{'rows':>9} | {'CSV MB':>6} | {'upload_file p50 s':>17} | {'read_csv p50 s':>14} | {'read_csv p95 s':>14}")
+    print("-" * 96)
+    for n_rows in rows:
+        file_path = os.path.join(work_dir, f"data-{n_rows}.csv")
+        SyntheticVehicleInsuranceData(seed=42).generate(n_rows).to_csv(file_path, index=False)
+        size_mb = os.path.getsize(file_path) / 2 ** 20
+        key = f"datasets/{n_rows}.csv"
+        upload = timings(lambda: s3.upload_file(file_path, key, BUCKET_NAME, remove=False), repeat)
+        read = timings(lambda: s3.read_csv(key, BUCKET_NAME), repeat)
+        print(f"{n_rows:>9} | {size_mb:>6.1f} | {p50(upload):>17.3f} | {p50(read):>14.3f} | {p95(read):>14.3f}")
+        os.remove(file_path)
+
+
+def benchmark_models(s3, n_estimators: List[int], rows: int, repeat: int, work_dir: str) -> None:
+    print(f"{'trees':>9} | {'model MB':>8} | {'stored MB':>9} | {'upload_model p50 s':>18} | "
+          f"{'load_model p50 s':>16} | {'p95 s':>6}")
+    print("-" * 96)
+    for trees in n_estimators:
+        file_path = train_model_file(rows, trees, work_dir)
+        key = f"models/{trees}.pkl"
+        compression = {}
+        upload = timings(lambda: compression.update(s3.upload_model(file_path, key, BUCKET_NAME, remove=False)),
+                         repeat)
+        load = timings(lambda: s3.load_model(key, bucket_name=BUCKET_NAME), repeat)
+        print(f"{trees:>9} | {compression['size'] / 2 ** 20:>8.1f} | {compression['compressed_size'] / 2 ** 20:>9.1f} | "
+              f"{p50(upload):>18.3f} | {p50(load):>16.3f} | {p95(load):>6.3f}")
+        os.remove(file_path)
+
+
+def benchmark_existence(s3, n_keys: int, repeat: int) -> None:
+    keys = [f"registry/model-{i}.pkl" for i in range(n_keys)]
+    for key in keys[::2]:
+        s3.s3_client.put_object(Bucket=BUCKET_NAME, Key=key, Body=b"0")
+
+    def uncached() -> None:
+        s3.metadata_cache.invalidate()
+        s3.s3_key_path_available(BUCKET_NAME, keys[0])
+
+    def batch() -> None:
+        s3.metadata_cache.invalidate()
+        s3.keys_available(BUCKET_NAME, keys)
+
+    def one_by_one() -> None:
+        s3.metadata_cache.invalidate()
+        for key in keys:
+            s3.s3_key_path_available(BUCKET_NAME, key)
+
+    print(f"{'check':>34} | {'p50 ms':>9} | {'p95 ms':>9}")
+    print("-" * 96)
+    for name, func in (("1 key, uncached HEAD", uncached),
+                       ("1 key, cached", lambda: s3.s3_key_path_available(BUCKET_NAME, keys[0])),
+                       (f"{n_keys} keys, one by one, uncached", one_by_one),
+                       (f"{n_keys} keys, keys_available batch", batch)):
+        seconds = timings(func, repeat)
+        print(f"{name:>34} | {p50(seconds) * 1000:>9.2f} | {p95(seconds) * 1000:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--model-rows", type=int, default=50_000, help="synthetic records the models are trained on")
+    parser.add_argument("--keys", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--endpoint-url", default=os.getenv("BENCHMARK_S3_ENDPOINT_URL", ""),
+                        help="local S3-compatible endpoint; an in-process moto server is used when empty")
+    args = parser.parse_args()
+
+    local_s3 = LocalS3(args.endpoint_url, buckets=[BUCKET_NAME])
+    with local_s3 as endpoint_url, tempfile.TemporaryDirectory(prefix="storage-benchmark-") as work_dir:
+        from src.cloud_storage.aws_storage import SimpleStorageService
+        s3 = SimpleStorageService()
+        print("=" * 96)
+        print(f"Storage benchmark - endpoint: {endpoint_url}{' (moto)' if local_s3.is_moto else ''}, "
+              f"{args.repeat} runs per measure")
+        print("=" * 96)
+        benchmark_objects(s3, args.sizes_mb, args.repeat, work_dir)
+        print("=" * 96)
+        benchmark_csv(s3, args.rows, args.repeat, work_dir)
+        print("=" * 96)
+        benchmark_models(s3, args.n_estimators, args.model_rows, args.repeat, work_dir)
+        print("=" * 96)
+        benchmark_existence(s3, args.keys, args.repeat)
+        print("=" * 96)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,17 @@
 Provides AWS S3 storage utilities for the Vehicle Insurance Data Pipeline MLops project.
 """
 import boto3
+from boto3.s3.transfer import TransferConfig
 from src.configuration.aws_connection import S3Client
+from src.constants import (S3_MULTIPART_THRESHOLD, S3_MULTIPART_CHUNKSIZE, S3_MAX_CONCURRENCY, MODEL_ARTIFACT_CODEC,
+                           S3_METADATA_CACHE_TTL, S3_HEAD_MAX_WORKERS, S3_STREAM_PART_SIZE, S3_STREAM_PREFETCH_PARTS)
+from src.utils.compression_utils import BLOCK_SIZE, compress_file, open_decompressed_reader
+import hashlib
+import io
+from collections import deque
 from io import StringIO
-from typing import Union,List
+from typing import Union,Optional,Dict,Iterable
+from concurrent.futures import ThreadPoolExecutor
 import os,sys
 from src.logger import logging
 from mypy_boto3_s3.service_resource import Bucket
@@ -12,6 +20,115 @@ from src.exception import MyException
 from botocore.exceptions import ClientError
 from pandas import DataFrame,read_csv
 import pickle
+import json
+import tempfile
+import threading
+import time
+
+
+class ObjectMetadataCache:
+    """
+    Thread-safe cache of HEAD answers per (bucket, key): the object metadata, or None for a missing object.
+    Answers expire after ttl seconds, so changes made by other processes are seen within ttl; changes made
+    through SimpleStorageService invalidate the key immediately.
+    """
+
+    def __init__(self, ttl: float = S3_METADATA_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, bucket_name: str, s3_key: str):
+        """
+        Returns (True, metadata) for a fresh answer, (False, None) when the key is not cached or expired.
+        """
+        with self._lock:
+            entry = self._entries.get((bucket_name, s3_key))
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.hits += 1
+                return True, entry[1]
+            self.misses += 1
+            return False, None
+
+    def put(self, bucket_name: str, s3_key: str, metadata: Optional[dict]) -> None:
+        with self._lock:
+            self._entries[(bucket_name, s3_key)] = (time.monotonic(), metadata)
+
+    def invalidate(self, bucket_name: Optional[str] = None, s3_key: Optional[str] = None) -> None:
+        """
+        Drops the answer of a key, of every key of a bucket (s3_key None) or of everything (bucket_name None).
+        """
+        with self._lock:
+            if bucket_name is None:
+                self._entries.clear()
+            elif s3_key is None:
+                self._entries = {key: entry for key, entry in self._entries.items() if key[0] != bucket_name}
+            else:
+                self._entries.pop((bucket_name, s3_key), None)
+
+
+class S3ObjectReader(io.RawIOBase):
+    """
+    Readable stream of an S3 object fetched as consecutive range GETs, up to `prefetch` parts ahead in
+    background threads: the consumer (e.g. an unpickler) works on the first parts while the next ones
+    download, and at most prefetch + 1 parts are held in memory whatever the object size. Every range
+    GET is conditional on the ETag, so an object replaced mid-stream fails instead of mixing versions.
+    The SHA-256 of the bytes received is available as `sha256` once the stream is consumed.
+    """
+
+    def __init__(self, s3_client, bucket_name: str, s3_key: str, size: int, etag: Optional[str] = None,
+                 part_size: int = S3_STREAM_PART_SIZE, prefetch: int = S3_STREAM_PREFETCH_PARTS):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.size = size
+        self.etag = etag
+        self.part_size = part_size
+        self.sha256 = hashlib.sha256()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, prefetch))
+        self._prefetch = max(1, prefetch)
+        self._parts = deque()
+        self._next_offset = 0
+        self._buffer = memoryview(b"")
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        request = {"Bucket": self.bucket_name, "Key": self.s3_key, "Range": f"bytes={start}-{end}"}
+        if self.etag:
+            request["IfMatch"] = f'"{self.etag}"'
+        return self.s3_client.get_object(**request)["Body"].read()
+
+    def _schedule(self) -> None:
+        while len(self._parts) < self._prefetch and self._next_offset < self.size:
+            end = min(self._next_offset + self.part_size, self.size) - 1
+            self._parts.append(self._pool.submit(self._fetch, self._next_offset, end))
+            self._next_offset = end + 1
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer:
+            self._schedule()
+            if not self._parts:
+                return 0
+            part = self._parts.popleft().result()
+            self.sha256.update(part)
+            self._buffer = memoryview(part)
+            self._schedule()
+        n_bytes = min(len(buffer), len(self._buffer))
+        buffer[:n_bytes] = self._buffer[:n_bytes]
+        self._buffer = self._buffer[n_bytes:]
+        return n_bytes
+
+    def close(self) -> None:
+        for part in self._parts:
+            part.cancel()
+        self._parts.clear()
+        self._pool.shutdown(wait=False)
+        super().close()
 
 
 class SimpleStorageService:
@@ -20,6 +137,9 @@ class SimpleStorageService:
     data uploads, and data retrieval in S3 buckets.
     """
 
+    # HEAD answers shared by all instances of the process
+    metadata_cache = ObjectMetadataCache()
+
     def __init__(self):
         """
         Initializes the SimpleStorageService instance with S3 resource and client
@@ -28,6 +148,11 @@ class SimpleStorageService:
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        # Objects above the threshold are uploaded in parts and downloaded with parallel range GETs
+        self.transfer_config = TransferConfig(multipart_threshold=S3_MULTIPART_THRESHOLD,
+                                              multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+                                              max_concurrency=S3_MAX_CONCURRENCY,
+                                              use_threads=True)
 
     def s3_key_path_available(self, bucket_name, s3_key) -> bool:
         """
@@ -41,12 +166,97 @@ class SimpleStorageService:
             bool: True if the file exists, False otherwise.
         """
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=s3_key)]
-            return len(file_objects) > 0
+            return self.head_object(bucket_name, s3_key) is not None
         except Exception as e:
             raise MyException(e, sys)
 
+    def keys_available(self, bucket_name: str, s3_keys: Iterable[str]) -> Dict[str, bool]:
+        """
+        Checks many keys at once with concurrent HEAD requests (cached answers are reused).
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_keys (Iterable[str]): Keys to check.
+
+        Returns:
+            Dict[str, bool]: True for every key that exists.
+        """
+        try:
+            return {s3_key: metadata is not None
+                    for s3_key, metadata in self.head_objects(bucket_name, s3_keys).items()}
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def head_object(self, bucket_name: str, s3_key: str, use_cache: bool = True) -> Optional[dict]:
+        """
+        Reads the metadata of an S3 object with a single HEAD request, answered from the metadata cache
+        when a fresh answer is cached.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+            use_cache (bool): If False, always sends the request (the answer still refreshes the cache).
+
+        Returns:
+            Optional[dict]: {"etag", "version_id", "size", "last_modified", "metadata"} of the object
+            (version_id is None in unversioned buckets), None if the object does not exist.
+        """
+        try:
+            if use_cache:
+                cached, metadata = self.metadata_cache.get(bucket_name, s3_key)
+                if cached:
+                    return metadata
+            try:
+                response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+                version_id = response.get("VersionId")
+                metadata = {"etag": response["ETag"].strip('"'),
+                            "version_id": None if version_id in (None, "null") else version_id,
+                            "size": response["ContentLength"],
+                            "last_modified": response.get("LastModified"),
+                            "metadata": response.get("Metadata", {})}
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                    raise
+                metadata = None
+            self.metadata_cache.put(bucket_name, s3_key, metadata)
+            return metadata
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def head_objects(self, bucket_name: str, s3_keys: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """
+        Reads the metadata of many objects with concurrent HEAD requests (see head_object).
+
+        Returns:
+            Dict[str, Optional[dict]]: metadata per key, None for missing objects.
+        """
+        try:
+            s3_keys = list(dict.fromkeys(s3_keys))
+            with ThreadPoolExecutor(max_workers=max(1, min(S3_HEAD_MAX_WORKERS, len(s3_keys)))) as pool:
+                return dict(zip(s3_keys, pool.map(lambda s3_key: self.head_object(bucket_name, s3_key), s3_keys)))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_object_version(self, bucket_name: str, s3_key: str) -> Optional[dict]:
+        """
+        Reads the version of an S3 object from its (cached) HEAD metadata, without downloading it.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            Optional[dict]: {"etag", "version_id"} of the object (version_id is None in unversioned
+            buckets), None if the object does not exist.
+        """
+        try:
+            metadata = self.head_object(bucket_name, s3_key)
+            if metadata is None:
+                return None
+            return {"etag": metadata["etag"], "version_id": metadata["version_id"]}
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     @staticmethod
     def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
         """
@@ -92,31 +302,30 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
-    def get_file_object(self, filename: str, bucket_name: str) -> Union[List[object], object]:
+    def get_file_object(self, filename: str, bucket_name: str) -> object:
         """
-        Retrieves the file object(s) from the specified bucket based on the filename.
+        Retrieves the file object of a key from the specified bucket (existence is checked with a cached
+        HEAD request instead of listing the keys sharing the prefix).
 
         Args:
-            filename (str): The name of the file to retrieve.
+            filename (str): The key of the file to retrieve.
             bucket_name (str): The name of the S3 bucket.
 
         Returns:
-            Union[List[object], object]: The S3 file object or list of file objects.
+            object: The S3 file object.
         """
-        logging.info("Entered the get_file_object method of SimpleStorageService class")
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
-            func = lambda x: x[0] if len(x) == 1 else x
-            file_objs = func(file_objects)
-            logging.info("Exited the get_file_object method of SimpleStorageService class")
-            return file_objs
+            if self.head_object(bucket_name, filename) is None:
+                raise FileNotFoundError(f"s3://{bucket_name}/{filename} does not exist")
+            return self.s3_resource.Object(bucket_name, filename)
         except Exception as e:
             raise MyException(e, sys) from e
 
     def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
         """
-        Loads a serialized model from the specified S3 bucket.
+        Loads a serialized model from the specified S3 bucket. The object is streamed into the unpickler
+        (through the decompressor of its codec) while it downloads, so no full-size copy of the object is
+        ever held in memory or on disk, and the SHA-256 recorded at upload is verified on the bytes received.
 
         Args:
             model_name (str): Name of the model file in the bucket.
@@ -128,14 +337,51 @@ class SimpleStorageService:
         """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
-            file_object = self.get_file_object(model_file, bucket_name)
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
-            logging.info("Production model loaded from S3 bucket.")
+            # Fresh HEAD: the codec and checksum must describe the object about to be downloaded
+            object_metadata = self.head_object(bucket_name, model_file, use_cache=False)
+            if object_metadata is None:
+                raise FileNotFoundError(f"s3://{bucket_name}/{model_file} does not exist")
+            metadata = object_metadata["metadata"]
+            codec = metadata.get("codec", "none")  # models pushed before compression are plain pickles
+
+            with S3ObjectReader(self.s3_client, bucket_name, model_file, size=object_metadata["size"],
+                                etag=object_metadata["etag"]) as object_reader:
+                object_stream = io.BufferedReader(object_reader, buffer_size=BLOCK_SIZE)
+                try:
+                    model = pickle.load(open_decompressed_reader(object_stream, codec))
+                    error = None
+                except Exception as e:
+                    model, error = None, e
+                # Read what the unpickler left (e.g. the end of the compressed frame) to checksum every byte;
+                # a corrupted download is reported as such rather than as the unpickling error it caused
+                for _ in iter(lambda: object_stream.read(BLOCK_SIZE), b""):
+                    pass
+                if "sha256" in metadata and object_reader.sha256.hexdigest() != metadata["sha256"]:
+                    raise ValueError(f"Checksum mismatch for s3://{bucket_name}/{model_file}") from error
+                if error is not None:
+                    raise error
+            logging.info(f"Production model loaded from S3 bucket ({codec} compressed).")
             return model
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def read_json(self, filename: str, bucket_name: str) -> dict:
+        """
+        Reads a JSON object from the specified S3 bucket.
+
+        Args:
+            filename (str): Key of the JSON file in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            dict: The parsed JSON content.
+        """
+        try:
+            content = self.read_object(self.s3_resource.Object(bucket_name, filename))
+            return json.loads(content)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def create_folder(self, folder_name: str, bucket_name: str) -> None:
         """
         Creates a folder in the specified S3 bucket.
@@ -153,6 +399,7 @@ class SimpleStorageService:
             if e.response["Error"]["Code"] == "404":
                 folder_obj = folder_name + "/"
                 self.s3_client.put_object(Bucket=bucket_name, Key=folder_obj)
+                self.metadata_cache.invalidate(bucket_name, folder_obj)
             logging.info("Exited the create_folder method of SimpleStorageService class")
 
     def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
@@ -168,7 +415,8 @@ class SimpleStorageService:
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename, Config=self.transfer_config)
+            self.metadata_cache.invalidate(bucket_name, to_filename)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
 
             # Delete the local file if remove is True
@@ -179,6 +427,40 @@ class SimpleStorageService:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def upload_model(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True,
+                     codec: str = MODEL_ARTIFACT_CODEC) -> dict:
+        """
+        Compresses a serialized model and uploads it with the multipart transfer settings. The codec and the
+        SHA-256 of the stored bytes are kept as object metadata, so that load_model can decompress the model
+        and verify it end to end; S3 also validates every part with its own SHA-256 checksum.
+
+        Args:
+            from_filename (str): Path of the local model file.
+            to_filename (str): Target key in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            remove (bool): If True, deletes the local file after upload.
+            codec (str): zstd, lz4, gzip, none, or auto for the fastest installed codec.
+
+        Returns:
+            dict: codec, size, compressed_size and sha256 of the upload.
+        """
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                compressed_file_path = os.path.join(tmp_dir, os.path.basename(from_filename))
+                compression = compress_file(from_filename, compressed_file_path, codec=codec)
+                logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name} ({compression['codec']}, "
+                             f"{compression['size']} -> {compression['compressed_size']} bytes)")
+                self.s3_client.upload_file(compressed_file_path, bucket_name, to_filename, Config=self.transfer_config,
+                                           ExtraArgs={"Metadata": {key: str(value) for key, value in compression.items()},
+                                                      "ChecksumAlgorithm": "SHA256"})
+                self.metadata_cache.invalidate(bucket_name, to_filename)
+            if remove:
+                os.remove(from_filename)
+                logging.info(f"Removed local file {from_filename} after upload")
+            return compression
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def upload_df_as_csv(self, data_frame: DataFrame, local_filename: str, bucket_filename: str, bucket_name: str) -> None:
         """
         Uploads a DataFrame as a CSV file to the specified S3 bucket.
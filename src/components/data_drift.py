@@ -0,0 +1,113 @@
+"""
+Detects data drift between training runs for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import time
+from typing import Optional
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_json_file, write_json_file
+from src.utils.sketch_utils import DatasetSketch
+from src.entity.artifact_entity import DataIngestionArtifact, DataDriftArtifact
+from src.entity.config_entity import DataDriftConfig
+
+
+class DataDrift:
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, data_drift_config: DataDriftConfig):
+        """
+        :param data_ingestion_artifact: Output reference of data ingestion artifact stage
+        :param data_drift_config: configuration for data drift
+        """
+        try:
+            self.data_ingestion_artifact = data_ingestion_artifact
+            self.data_drift_config = data_drift_config
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_reference_sketch(self) -> Optional[DatasetSketch]:
+        """
+        Method Name :   get_reference_sketch
+        Description :   This method loads the sketch of the data the production model was trained on from s3
+
+        Output      :   Returns the reference sketch, None if no model was pushed with a sketch yet
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            s3 = SimpleStorageService()
+            bucket_name = self.data_drift_config.bucket_name
+            s3_key = self.data_drift_config.s3_sketch_key_path
+            if not s3.s3_key_path_available(bucket_name=bucket_name, s3_key=s3_key):
+                return None
+            return DatasetSketch.from_dict(s3.read_json(s3_key, bucket_name=bucket_name))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def detect_drift(self, reference: DatasetSketch, current: DatasetSketch) -> dict:
+        """
+        Method Name :   detect_drift
+        Description :   This method scores every column (PSI and KS statistic) and flags drifted columns
+
+        Output      :   Returns the per column scores with their drift flag
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            scores = reference.compare(current, n_bins=self.data_drift_config.n_bins)
+            for name, score in scores.items():
+                score["drift"] = (score["psi"] > self.data_drift_config.psi_threshold
+                                  or score["ks"] > self.data_drift_config.ks_threshold)
+                if score["drift"]:
+                    logging.info(f"Drift detected in column [{name}]: psi={score['psi']:.4f}, ks={score['ks']:.4f}")
+            return scores
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def initiate_data_drift(self) -> DataDriftArtifact:
+        """
+        Method Name :   initiate_data_drift
+        Description :   This method compares the sketch of the ingested data with the sketch stored with the
+                        production model. Only the sketches are needed, not the data itself
+
+        Output      :   Returns data drift artifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logging.info("Starting data drift detection")
+            if not self.data_ingestion_artifact.data_sketch_file_path:
+                raise Exception("Data ingestion artifact has no data sketch")
+            current = DatasetSketch.from_dict(read_json_file(self.data_ingestion_artifact.data_sketch_file_path))
+
+            reference = self.get_reference_sketch()
+            if reference is None:
+                logging.info("No reference sketch found for the production model, treating data as drifted")
+                scores, drift_status = {}, True
+            else:
+                start = time.perf_counter()
+                scores = self.detect_drift(reference, current)
+                drift_status = any(score["drift"] for score in scores.values())
+                logging.info(f"Compared {len(scores)} column sketches in {time.perf_counter() - start:.4f}s")
+
+            drifted_columns = [name for name, score in scores.items() if score["drift"]]
+            drift_report = {
+                "drift_status": drift_status,
+                "reference_found": reference is not None,
+                "reference_rows": reference.rows if reference is not None else None,
+                "current_rows": current.rows,
+                "psi_threshold": self.data_drift_config.psi_threshold,
+                "ks_threshold": self.data_drift_config.ks_threshold,
+                "drifted_columns": drifted_columns,
+                "columns": scores,
+            }
+            write_json_file(self.data_drift_config.drift_report_file_path, drift_report)
+
+            data_drift_artifact = DataDriftArtifact(
+                drift_status=drift_status,
+                reference_found=reference is not None,
+                drifted_columns=drifted_columns,
+                drift_report_file_path=self.data_drift_config.drift_report_file_path
+            )
+            logging.info(f"Data drift artifact: {data_drift_artifact}")
+            return data_drift_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
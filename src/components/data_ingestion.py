@@ -3,6 +3,7 @@ Handles data ingestion for the Vehicle Insurance Data Pipeline MLops project.
 """
 import os
 import sys
+from typing import Tuple
 
 from pandas import DataFrame
 from sklearn.model_selection import train_test_split
@@ -12,6 +13,9 @@ from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import MyException
 from src.logger import logging
 from src.data_access.proj1_data import Proj1Data
+from src.utils.main_utils import HashingWriter, write_json_file
+from src.utils.profiling_utils import record_rows
+from src.utils.sketch_utils import DatasetSketch
 
 class DataIngestion:
     def __init__(self,data_ingestion_config:DataIngestionConfig=DataIngestionConfig()):
@@ -36,8 +40,12 @@ class DataIngestion:
             logging.info(f"Exporting data from mongodb")
             my_data = Proj1Data()
             dataframe = my_data.export_collection_as_dataframe(collection_name=
-                                                                   self.data_ingestion_config.collection_name)
+                                                                   self.data_ingestion_config.collection_name,
+                                                               use_aggregation=self.data_ingestion_config.use_aggregation_pushdown,
+                                                               encode_categories=self.data_ingestion_config.encode_categories,
+                                                               decode_raw=self.data_ingestion_config.decode_raw_bson)
             logging.info(f"Shape of dataframe: {dataframe.shape}")
+            record_rows(len(dataframe))
             feature_store_file_path  = self.data_ingestion_config.feature_store_file_path
             dir_path = os.path.dirname(feature_store_file_path)
             os.makedirs(dir_path,exist_ok=True)
@@ -48,18 +56,19 @@ class DataIngestion:
         except Exception as e:
             raise MyException(e,sys)
 
-    def split_data_as_train_test(self,dataframe: DataFrame) ->None:
+    def split_data_as_train_test(self,dataframe: DataFrame) ->Tuple[str, str]:
         """
         Method Name :   split_data_as_train_test
         Description :   This method splits the dataframe into train set and test set based on split ratio 
         
-        Output      :   Folder is created in s3 bucket
+        Output      :   Train and test files are written, their SHA-256 (computed while writing) is returned
         On Failure  :   Write an exception log and then raise an exception
         """
         logging.info("Entered split_data_as_train_test method of Data_Ingestion class")
 
         try:
-            train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio)
+            train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio,
+                                                   random_state=self.data_ingestion_config.random_state)
             logging.info("Performed train test split on the dataframe")
             logging.info(
                 "Exited split_data_as_train_test method of Data_Ingestion class"
@@ -68,10 +77,32 @@ class DataIngestion:
             os.makedirs(dir_path,exist_ok=True)
             
             logging.info(f"Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path,index=False,header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path,index=False,header=True)
+            with HashingWriter(self.data_ingestion_config.training_file_path) as train_writer:
+                train_set.to_csv(train_writer,index=False,header=True)
+            with HashingWriter(self.data_ingestion_config.testing_file_path) as test_writer:
+                test_set.to_csv(test_writer,index=False,header=True)
 
             logging.info(f"Exported train and test file path.")
+            return train_writer.hexdigest(), test_writer.hexdigest()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def build_data_sketch(self, dataframe: DataFrame) -> str:
+        """
+        Method Name :   build_data_sketch
+        Description :   This method sketches every column of the exported data (quantile sketches for numerical
+                        columns, frequency counts for categorical columns) for drift detection
+        
+        Output      :   Sketch is saved as JSON and its file path is returned
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            data_sketch = DatasetSketch(k=self.data_ingestion_config.sketch_k,
+                                        max_categories=self.data_ingestion_config.sketch_max_categories)
+            data_sketch.update(dataframe)
+            write_json_file(self.data_ingestion_config.data_sketch_file_path, data_sketch.to_dict())
+            logging.info(f"Saved data sketch of {data_sketch.rows} rows to {self.data_ingestion_config.data_sketch_file_path}")
+            return self.data_ingestion_config.data_sketch_file_path
         except Exception as e:
             raise MyException(e, sys) from e
 
@@ -90,7 +121,9 @@ class DataIngestion:
 
             logging.info("Got the data from mongodb")
 
-            self.split_data_as_train_test(dataframe)
+            data_sketch_file_path = self.build_data_sketch(dataframe)
+
+            trained_file_hash, test_file_hash = self.split_data_as_train_test(dataframe)
 
             logging.info("Performed train test split on the dataset")
 
@@ -99,7 +132,10 @@ class DataIngestion:
             )
 
             data_ingestion_artifact = DataIngestionArtifact(trained_file_path=self.data_ingestion_config.training_file_path,
-            test_file_path=self.data_ingestion_config.testing_file_path)
+            test_file_path=self.data_ingestion_config.testing_file_path,
+            trained_file_hash=trained_file_hash,
+            test_file_hash=test_file_hash,
+            data_sketch_file_path=data_sketch_file_path)
             
             logging.info(f"Data ingestion artifact: {data_ingestion_artifact}")
             return data_ingestion_artifact
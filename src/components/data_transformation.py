@@ -1,10 +1,13 @@
 """
 Handles data transformation for the Vehicle Insurance Data Pipeline MLops project.
 """
+import os
+import shutil
 import sys
+import imblearn
 import numpy as np
 import pandas as pd
-from imblearn.combine import SMOTEENN # type: ignore
+import sklearn
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.compose import ColumnTransformer
@@ -14,7 +17,12 @@ from src.entity.config_entity import DataTransformationConfig
 from src.entity.artifact_entity import DataTransformationArtifact, DataIngestionArtifact, DataValidationArtifact
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file
+from src.utils.main_utils import (save_object, save_numpy_array_data, read_yaml_file, read_json_file,
+                                  write_json_file, hash_file, hash_source, compute_fingerprint, link_or_copy)
+from src.entity.estimator import FeatureEncoder, IncrementalPreprocessor
+from src.utils.profiling_utils import record_rows
+from src.utils.resampling_utils import Resampler, StreamingUnderSampler, STREAMING_STRATEGIES
+from typing import Optional, Tuple
 
 
 class DataTransformation:
@@ -39,8 +47,9 @@ class DataTransformation:
     def get_data_transformer_object(self) -> Pipeline:
         """
         Creates and returns a data transformer object for the data, 
-        including gender mapping, dummy variable creation, column renaming,
-        feature scaling, and type adjustments.
+        including categorical encoding (gender mapping, dummy columns, id removal)
+        and feature scaling. The encoder is part of the saved object, so the
+        model can be given raw records.
         """
         logging.info("Entered get_data_transformer_object method of DataTransformation class")
 
@@ -65,7 +74,8 @@ class DataTransformation:
             )
 
             # Wrapping everything in a single pipeline
-            final_pipeline = Pipeline(steps=[("Preprocessor", preprocessor)])
+            final_pipeline = Pipeline(steps=[("FeatureEncoder", FeatureEncoder.from_schema(self._schema_config)),
+                                             ("Preprocessor", preprocessor)])
             logging.info("Final Pipeline Ready!!")
             logging.info("Exited get_data_transformer_object method of DataTransformation class")
             return final_pipeline
@@ -74,71 +84,155 @@ class DataTransformation:
             logging.exception("Exception occurred in get_data_transformer_object method of DataTransformation class")
             raise MyException(e, sys) from e
 
-    def _map_gender_column(self, df):
-        """Map Gender column to 0 for Female and 1 for Male."""
-        logging.info("Mapping 'Gender' column to binary values")
-        df['Gender'] = df['Gender'].map({'Female': 0, 'Male': 1}).astype(int)
-        return df
-
-    def _create_dummy_columns(self, df):
-        """Create dummy variables for categorical features."""
-        logging.info("Creating dummy variables for categorical features")
-        df = pd.get_dummies(df, drop_first=True)
-        return df
-
-    def _rename_columns(self, df):
-        """Rename specific columns and ensure integer types for dummy columns."""
-        logging.info("Renaming specific columns and casting to int")
-        df = df.rename(columns={
-            "Vehicle_Age_< 1 Year": "Vehicle_Age_lt_1_Year",
-            "Vehicle_Age_> 2 Years": "Vehicle_Age_gt_2_Years"
-        })
-        for col in ["Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]:
-            if col in df.columns:
-                df[col] = df[col].astype('int')
-        return df
-
-    def _drop_id_column(self, df):
-        """Drop the 'id' column if it exists."""
-        logging.info("Dropping 'id' column")
-        drop_col = self._schema_config['drop_columns']
-        if drop_col in df.columns:
-            df = df.drop(drop_col, axis=1)
-        return df
+    def get_incremental_transformer_object(self) -> Pipeline:
+        """
+        Creates the out-of-core counterpart of get_data_transformer_object: same encoding, scaling
+        and output layout, but the scalers are fitted chunk by chunk with partial_fit.
+        """
+        try:
+            return Pipeline(steps=[("FeatureEncoder", FeatureEncoder.from_schema(self._schema_config)),
+                                   ("Preprocessor", IncrementalPreprocessor(num_features=self._schema_config['num_features'],
+                                                                            mm_columns=self._schema_config['mm_columns']))])
+        except Exception as e:
+            raise MyException(e, sys) from e
 
-    def initiate_data_transformation(self) -> DataTransformationArtifact:
+    def _read_chunks(self, file_path: str):
+        return pd.read_csv(file_path, chunksize=self.data_transformation_config.chunk_size)
+
+    def _count_classes(self, file_path: str) -> dict:
+        """Counts the rows of every target class of a CSV file, reading only the target column."""
+        class_counts = {}
+        for chunk in pd.read_csv(file_path, usecols=[TARGET_COLUMN], chunksize=self.data_transformation_config.chunk_size):
+            for label, count in chunk[TARGET_COLUMN].value_counts().items():
+                class_counts[label] = class_counts.get(label, 0) + int(count)
+        return class_counts
+
+    def _open_output_arrays(self, feature_file_path: str, target_file_path: str, n_rows: int,
+                            n_features: int) -> Tuple[np.memmap, np.memmap]:
+        os.makedirs(os.path.dirname(feature_file_path), exist_ok=True)
+        return (np.lib.format.open_memmap(feature_file_path, mode="w+", shape=(n_rows, n_features),
+                                          dtype=self.data_transformation_config.feature_dtype),
+                np.lib.format.open_memmap(target_file_path, mode="w+", shape=(n_rows,),
+                                          dtype=self.data_transformation_config.target_dtype))
+
+    def _transform_file_out_of_core(self, file_path: str, preprocessor: Pipeline, feature_file_path: str,
+                                    target_file_path: str, class_counts: dict, resample: bool,
+                                    unresampled_file_paths: Optional[Tuple[str, str]] = None) -> int:
         """
-        Initiates the data transformation component for the pipeline.
+        Transforms a CSV file chunk by chunk into preallocated .npy memmaps (features and target).
+        With resample, majority rows are undersampled while streaming; unresampled_file_paths
+        (features, target) then also receive every row, from the same transformed chunks.
+
+        Output      :   Returns the number of rows written
+        """
+        sampler = StreamingUnderSampler(class_counts) if resample else None
+        n_rows = sampler.output_rows if sampler is not None else sum(class_counts.values())
+        n_features = len(preprocessor.named_steps["FeatureEncoder"].output_columns_)
+        features_out, target_out = self._open_output_arrays(feature_file_path, target_file_path, n_rows, n_features)
+        outputs = [features_out, target_out]
+        if sampler is not None and unresampled_file_paths is not None:
+            all_features_out, all_target_out = self._open_output_arrays(*unresampled_file_paths,
+                                                                        sum(class_counts.values()), n_features)
+            outputs += [all_features_out, all_target_out]
+        row, all_row = 0, 0
+        for chunk in self._read_chunks(file_path):
+            target = chunk[TARGET_COLUMN].to_numpy()
+            features = preprocessor.transform(chunk)
+            if len(outputs) > 2:
+                all_features_out[all_row:all_row + len(features)] = features
+                all_target_out[all_row:all_row + len(features)] = target
+                all_row += len(features)
+            if sampler is not None:
+                mask = sampler.select(target)
+                features, target = features[mask], target[mask]
+            features_out[row:row + len(features)] = features
+            target_out[row:row + len(features)] = target
+            row += len(features)
+        for output in outputs:
+            output.flush()
+        del features_out, target_out, outputs
+        logging.info(f"Wrote {row} transformed rows to {feature_file_path}")
+        return row
+
+    def _make_artifact(self, class_weight: Optional[str], unresampled: bool) -> DataTransformationArtifact:
+        config = self.data_transformation_config
+        return DataTransformationArtifact(
+            transformed_object_file_path=config.transformed_object_file_path,
+            transformed_train_file_path=config.transformed_train_file_path,
+            transformed_test_file_path=config.transformed_test_file_path,
+            transformed_train_target_file_path=config.transformed_train_target_file_path,
+            transformed_test_target_file_path=config.transformed_test_target_file_path,
+            class_weight=class_weight,
+            resampling_strategy=config.resampling_strategy,
+            unresampled_train_file_path=config.unresampled_train_file_path if unresampled else None,
+            unresampled_train_target_file_path=config.unresampled_train_target_file_path if unresampled else None,
+        )
+
+    def initiate_out_of_core_transformation(self) -> DataTransformationArtifact:
+        """
+        Out-of-core variant of initiate_data_transformation: train/test files are streamed in chunks,
+        the scalers are fitted with partial_fit and every transformed chunk is written straight into
+        on-disk .npy memmaps, so peak memory depends on the chunk size and not on the dataset size.
+        Only resampling strategies that can be streamed are supported.
         """
         try:
-            logging.info("Data Transformation Started !!!")
-            if not self.data_validation_artifact.validation_status:
-                raise Exception(self.data_validation_artifact.message)
+            strategy = self.data_transformation_config.resampling_strategy
+            if strategy not in STREAMING_STRATEGIES:
+                raise ValueError(f"Resampling strategy '{strategy}' needs the data in memory, out-of-core "
+                                 f"transformation supports {STREAMING_STRATEGIES}")
+            resample = strategy == "random_under"
+            class_weight = "balanced" if strategy == "class_weight" else None
 
+            logging.info("Fitting preprocessor chunk by chunk on training data")
+            preprocessor = self.get_incremental_transformer_object()
+            encoder, scaler = preprocessor.named_steps["FeatureEncoder"], preprocessor.named_steps["Preprocessor"]
+            train_class_counts = {}
+            for chunk in self._read_chunks(self.data_ingestion_artifact.trained_file_path):
+                if not hasattr(encoder, "output_columns_"):
+                    encoder.fit(chunk)
+                scaler.partial_fit(encoder.transform(chunk))
+                for label, count in chunk[TARGET_COLUMN].value_counts().items():
+                    train_class_counts[label] = train_class_counts.get(label, 0) + int(count)
+
+            self._transform_file_out_of_core(self.data_ingestion_artifact.trained_file_path, preprocessor,
+                                             self.data_transformation_config.transformed_train_file_path,
+                                             self.data_transformation_config.transformed_train_target_file_path,
+                                             train_class_counts, resample=resample,
+                                             unresampled_file_paths=(
+                                                 self.data_transformation_config.unresampled_train_file_path,
+                                                 self.data_transformation_config.unresampled_train_target_file_path))
+            test_class_counts = self._count_classes(self.data_ingestion_artifact.test_file_path)
+            self._transform_file_out_of_core(self.data_ingestion_artifact.test_file_path, preprocessor,
+                                             self.data_transformation_config.transformed_test_file_path,
+                                             self.data_transformation_config.transformed_test_target_file_path,
+                                             test_class_counts,
+                                             resample=resample and self.data_transformation_config.resample_test)
+            record_rows(sum(train_class_counts.values()) + sum(test_class_counts.values()))
+            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
+
+            logging.info("Out-of-core data transformation completed successfully")
+            return self._make_artifact(class_weight, unresampled=resample)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def initiate_in_memory_transformation(self) -> DataTransformationArtifact:
+        """
+        Transforms train and test data loaded in memory (fit_transform on the whole frames).
+        """
+        try:
             # Load train and test data
             train_df = self.read_data(file_path=self.data_ingestion_artifact.trained_file_path)
             test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path)
+            record_rows(len(train_df) + len(test_df))
             logging.info("Train-Test data loaded")
 
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
             target_feature_train_df = train_df[TARGET_COLUMN]
 
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
             target_feature_test_df = test_df[TARGET_COLUMN]
             logging.info("Input and Target cols defined for both train and test df.")
 
-            # Apply custom transformations in specified sequence
-            input_feature_train_df = self._map_gender_column(input_feature_train_df)
-            input_feature_train_df = self._drop_id_column(input_feature_train_df)
-            input_feature_train_df = self._create_dummy_columns(input_feature_train_df)
-            input_feature_train_df = self._rename_columns(input_feature_train_df)
-
-            input_feature_test_df = self._map_gender_column(input_feature_test_df)
-            input_feature_test_df = self._drop_id_column(input_feature_test_df)
-            input_feature_test_df = self._create_dummy_columns(input_feature_test_df)
-            input_feature_test_df = self._rename_columns(input_feature_test_df)
-            logging.info("Custom transformations applied to train and test data")
-
             logging.info("Starting data transformation")
             preprocessor = self.get_data_transformer_object()
             logging.info("Got the preprocessor object")
@@ -149,31 +243,156 @@ class DataTransformation:
             input_feature_test_arr = preprocessor.transform(input_feature_test_df)
             logging.info("Transformation done end to end to train-test df.")
 
-            logging.info("Applying SMOTEENN for handling imbalanced dataset.")
-            smt = SMOTEENN(sampling_strategy="minority")
-            input_feature_train_final, target_feature_train_final = smt.fit_resample(
-                input_feature_train_arr, target_feature_train_df
-            )
-            input_feature_test_final, target_feature_test_final = smt.fit_resample(
-                input_feature_test_arr, target_feature_test_df
+            logging.info("Resampling for handling imbalanced dataset.")
+            resampler = Resampler(strategy=self.data_transformation_config.resampling_strategy,
+                                  n_jobs=self.data_transformation_config.resampling_n_jobs,
+                                  chunk_size=self.data_transformation_config.resampling_chunk_size)
+            input_feature_train_final, target_feature_train_final = resampler.fit_resample(
+                input_feature_train_arr, target_feature_train_df, label="train"
             )
-            logging.info("SMOTEENN applied to train-test df.")
-
-            train_arr = np.c_[input_feature_train_final, np.array(target_feature_train_final)]
-            test_arr = np.c_[input_feature_test_final, np.array(target_feature_test_final)]
-            logging.info("feature-target concatenation done for train-test df.")
+            input_feature_test_final, target_feature_test_final = input_feature_test_arr, target_feature_test_df
+            if self.data_transformation_config.resample_test:
+                input_feature_test_final, target_feature_test_final = resampler.fit_resample(
+                    input_feature_test_arr, target_feature_test_df, label="test"
+                )
+            logging.info("Resampling applied to train-test df.")
 
+            # Features and labels are saved as separate contiguous arrays (compact dtypes, no np.c_ copy)
+            feature_dtype = self.data_transformation_config.feature_dtype
+            target_dtype = self.data_transformation_config.target_dtype
             save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path,
+                                  array=np.ascontiguousarray(input_feature_train_final, dtype=feature_dtype))
+            save_numpy_array_data(self.data_transformation_config.transformed_train_target_file_path,
+                                  array=np.asarray(target_feature_train_final, dtype=target_dtype))
+            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path,
+                                  array=np.ascontiguousarray(input_feature_test_final, dtype=feature_dtype))
+            save_numpy_array_data(self.data_transformation_config.transformed_test_target_file_path,
+                                  array=np.asarray(target_feature_test_final, dtype=target_dtype))
+            if resampler.changes_rows:
+                # Cross-validation splits these rows and resamples the training rows of each fold only
+                save_numpy_array_data(self.data_transformation_config.unresampled_train_file_path,
+                                      array=np.ascontiguousarray(input_feature_train_arr, dtype=feature_dtype))
+                save_numpy_array_data(self.data_transformation_config.unresampled_train_target_file_path,
+                                      array=np.asarray(target_feature_train_df, dtype=target_dtype))
             logging.info("Saving transformation object and transformed files.")
 
             logging.info("Data transformation completed successfully")
-            return DataTransformationArtifact(
-                transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
-                transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-                transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
-            )
+            return self._make_artifact(resampler.class_weight, unresampled=resampler.changes_rows)
 
         except Exception as e:
-            raise MyException(e, sys) from e
\ No newline at end of file
+            raise MyException(e, sys) from e
+
+    def get_cache_key(self) -> str:
+        """
+        Fingerprints everything the transformation outputs depend on: content hashes of the train/test
+        files, the schema file, the output dtypes, the resampling and out-of-core settings, and a code salt
+        (hash of the sources of this stage, the encoders and the resamplers, plus the sklearn/imblearn versions).
+        """
+        try:
+            trained_file_hash = self.data_ingestion_artifact.trained_file_hash
+            test_file_hash = self.data_ingestion_artifact.test_file_hash
+            if trained_file_hash is None or test_file_hash is None:
+                logging.info("Ingestion artifact has no file hashes, hashing train and test files")
+                trained_file_hash = hash_file(self.data_ingestion_artifact.trained_file_path)
+                test_file_hash = hash_file(self.data_ingestion_artifact.test_file_path)
+            config = self.data_transformation_config
+            code_salt = compute_fingerprint(hash_source(DataTransformation, FeatureEncoder, IncrementalPreprocessor,
+                                                        Resampler, StreamingUnderSampler),
+                                            sklearn.__version__, imblearn.__version__)
+            return compute_fingerprint(trained_file_hash, test_file_hash, hash_file(SCHEMA_FILE_PATH),
+                                       config.feature_dtype, config.target_dtype,
+                                       config.resampling_strategy, config.resampling_chunk_size, config.resample_test,
+                                       config.out_of_core, config.chunk_size, code_salt)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _output_file_paths(self) -> dict:
+        return {
+            "preprocessing": self.data_transformation_config.transformed_object_file_path,
+            "train": self.data_transformation_config.transformed_train_file_path,
+            "test": self.data_transformation_config.transformed_test_file_path,
+            "train_target": self.data_transformation_config.transformed_train_target_file_path,
+            "test_target": self.data_transformation_config.transformed_test_target_file_path,
+            "train_unresampled": self.data_transformation_config.unresampled_train_file_path,
+            "train_unresampled_target": self.data_transformation_config.unresampled_train_target_file_path,
+        }
+
+    def load_cached_transformation(self, cache_key: str):
+        """
+        Links the cached outputs of cache_key into this run's artifact directory.
+
+        Output      :   Returns the data transformation artifact, None on a cache miss
+        """
+        try:
+            entry_dir = os.path.join(self.data_transformation_config.cache_dir, cache_key)
+            manifest_file_path = os.path.join(entry_dir, "manifest.json")
+            if not os.path.exists(manifest_file_path):
+                return None
+            manifest = read_json_file(manifest_file_path)
+            for name, file_path in self._output_file_paths().items():
+                if name in manifest["files"]:
+                    link_or_copy(os.path.join(entry_dir, manifest["files"][name]), file_path)
+            logging.info(f"Transformation cache hit [{entry_dir}], reusing preprocessing object and arrays")
+            return self._make_artifact(manifest["class_weight"], unresampled="train_unresampled" in manifest["files"])
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def save_transformation_to_cache(self, cache_key: str, data_transformation_artifact: DataTransformationArtifact) -> None:
+        """
+        Links this run's outputs into the cache. The entry is assembled in a temporary directory and
+        renamed, so concurrent runs never see a partial entry.
+        """
+        try:
+            entry_dir = os.path.join(self.data_transformation_config.cache_dir, cache_key)
+            if os.path.exists(entry_dir):
+                return
+            tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+            files = {}
+            for name, file_path in self._output_file_paths().items():
+                if name.startswith("train_unresampled") and data_transformation_artifact.unresampled_train_file_path is None:
+                    continue
+                files[name] = os.path.basename(file_path) if name == "preprocessing" else f"{name}.npy"
+                link_or_copy(file_path, os.path.join(tmp_dir, files[name]))
+            write_json_file(os.path.join(tmp_dir, "manifest.json"),
+                            {"files": files, "class_weight": data_transformation_artifact.class_weight})
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # another run stored the same entry first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            logging.info(f"Stored transformation outputs in cache [{entry_dir}]")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def initiate_data_transformation(self) -> DataTransformationArtifact:
+        """
+        Initiates the data transformation component for the pipeline. Outputs of a previous run with
+        identical data, schema and settings are reused from the transformation cache.
+        """
+        try:
+            logging.info("Data Transformation Started !!!")
+            if not self.data_validation_artifact.validation_status:
+                raise Exception(self.data_validation_artifact.message)
+
+            cache_key = self.get_cache_key() if self.data_transformation_config.use_cache else None
+            if cache_key is not None:
+                data_transformation_artifact = self.load_cached_transformation(cache_key)
+                if data_transformation_artifact is not None:
+                    return data_transformation_artifact
+                logging.info("Transformation cache miss")
+                # Outputs may be hard links into the cache, unlink them so they are not overwritten in place
+                for file_path in self._output_file_paths().values():
+                    if os.path.lexists(file_path):
+                        os.remove(file_path)
+
+            if self.data_transformation_config.out_of_core:
+                data_transformation_artifact = self.initiate_out_of_core_transformation()
+            else:
+                data_transformation_artifact = self.initiate_in_memory_transformation()
+
+            if cache_key is not None:
+                self.save_transformation_to_cache(cache_key, data_transformation_artifact)
+            return data_transformation_artifact
+        except Exception as e:
+            raise MyException(e, sys) from e
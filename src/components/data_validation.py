@@ -4,6 +4,7 @@ Performs data validation for the Vehicle Insurance Data Pipeline MLops project.
 import json
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 
@@ -11,10 +12,12 @@ from pandas import DataFrame
 
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import read_yaml_file, read_json_file, write_json_file, hash_file, compute_fingerprint
+from src.utils.profiling_utils import record_rows
+from src.utils.validation_utils import SchemaValidator
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.entity.config_entity import DataValidationConfig
-from src.constants import SCHEMA_FILE_PATH
+from src.constants import SCHEMA_FILE_PATH, DATA_VALIDATION_CACHE_VERSION
 
 
 class DataValidation:
@@ -39,12 +42,28 @@ class DataValidation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            status = len(dataframe.columns) == len(self._schema_config["columns"])
+            # 'id' and the drop column are optional, the aggregation export removes them on the server
+            optional_columns = {"id", self._schema_config["drop_columns"]}
+            columns = [column for column in dataframe.columns if column not in optional_columns]
+            status = len(columns) == len(self._expected_columns(dataframe, optional_columns))
             logging.info(f"Is required column present: [{status}]")
             return status
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def _expected_columns(self, dataframe: DataFrame, optional_columns: set) -> list:
+        """
+        Returns the schema columns expected in the dataframe. If the categories were already encoded
+        by the aggregation export, one-hot columns are replaced by their dummy columns.
+        """
+        expected = [name for column in self._schema_config["columns"] for name in column
+                    if name not in optional_columns]
+        for column, dummies in self._schema_config["one_hot_columns"].items():
+            if column not in dataframe.columns and all(dummy in dataframe.columns for dummy in dummies):
+                expected.remove(column)
+                expected.extend(dummies)
+        return expected
+
     def is_column_exist(self, df: DataFrame) -> bool:
         """
         Method Name :   is_column_exist
@@ -65,8 +84,11 @@ class DataValidation:
                 logging.info(f"Missing numerical column: {missing_numerical_columns}")
 
 
+            one_hot_columns = self._schema_config["one_hot_columns"]
             for column in self._schema_config["categorical_columns"]:
-                if column not in dataframe_columns:
+                encoded = column in one_hot_columns and all(
+                    dummy in dataframe_columns for dummy in one_hot_columns[column])
+                if column not in dataframe_columns and not encoded:
                     missing_categorical_columns.append(column)
 
             if len(missing_categorical_columns)>0:
@@ -76,6 +98,29 @@ class DataValidation:
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_cache_key(self) -> str:
+        """
+        Method Name :   get_cache_key
+        Description :   This method fingerprints the validation inputs: content hashes of the train/test files
+                        (taken from the ingestion artifact when available), the schema file and the validation settings
+
+        Output      :   Returns the hex digest used as cache key
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            trained_file_hash = self.data_ingestion_artifact.trained_file_hash
+            test_file_hash = self.data_ingestion_artifact.test_file_hash
+            if trained_file_hash is None or test_file_hash is None:
+                logging.info("Ingestion artifact has no file hashes, hashing train and test files")
+                trained_file_hash = hash_file(self.data_ingestion_artifact.trained_file_path)
+                test_file_hash = hash_file(self.data_ingestion_artifact.test_file_path)
+            return compute_fingerprint(trained_file_hash, test_file_hash, hash_file(SCHEMA_FILE_PATH),
+                                       self.data_validation_config.error_budget,
+                                       self.data_validation_config.chunk_size,
+                                       DATA_VALIDATION_CACHE_VERSION)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     @staticmethod
     def read_data(file_path: str) -> DataFrame:
         try:
@@ -96,8 +141,26 @@ class DataValidation:
         try:
             validation_error_msg = ""
             logging.info("Starting data validation")
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.trained_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
+
+            # Byte-identical inputs give the same report, reuse it instead of scanning the files again
+            cache_file_path = None
+            if self.data_validation_config.use_cache:
+                cache_file_path = os.path.join(self.data_validation_config.cache_dir, f"{self.get_cache_key()}.json")
+                if os.path.exists(cache_file_path):
+                    validation_report = read_json_file(cache_file_path)
+                    write_json_file(self.data_validation_config.validation_report_file_path, validation_report)
+                    data_validation_artifact = DataValidationArtifact(
+                        validation_status=validation_report["validation_status"],
+                        message=validation_report["message"],
+                        validation_report_file_path=self.data_validation_config.validation_report_file_path
+                    )
+                    logging.info(f"Validation cache hit [{cache_file_path}], skipping data validation")
+                    logging.info(f"Data validation artifact: {data_validation_artifact}")
+                    return data_validation_artifact
+                logging.info("Validation cache miss, validating train and test files")
+            # Column checks only need the header, values are validated chunk by chunk below
+            train_df, test_df = (pd.read_csv(self.data_ingestion_artifact.trained_file_path, nrows=0),
+                                 pd.read_csv(self.data_ingestion_artifact.test_file_path, nrows=0))
 
             # Checking col len of dataframe for train/test df
             status = self.validate_number_of_columns(dataframe=train_df)
@@ -121,10 +184,31 @@ class DataValidation:
 
             status = self.is_column_exist(df=test_df)
             if not status:
-                validation_error_msg += f"Columns are missing in test dataframe."
+                validation_error_msg += f"Columns are missing in test dataframe. "
             else:
                 logging.info(f"All categorical/int columns present in testing dataframe: {status}")
 
+            # Validating dtypes, value ranges, categories and null rates for train/test files
+            schema_validator = SchemaValidator(schema_config=self._schema_config,
+                                               error_budget=self.data_validation_config.error_budget,
+                                               chunk_size=self.data_validation_config.chunk_size)
+            file_reports = {}
+            files = (("train", "training", self.data_ingestion_artifact.trained_file_path),
+                     ("test", "test", self.data_ingestion_artifact.test_file_path))
+            # Train and test files are independent, scan them concurrently
+            with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                results = list(executor.map(schema_validator.validate_file, [file_path for _, _, file_path in files]))
+            for (name, label, _), result in zip(files, results):
+                record_rows(result.rows)
+                file_reports[name] = result.to_dict()
+                if result.errors > schema_validator.error_budget:
+                    validation_error_msg += f"{result.errors} invalid values in {label} dataframe. "
+                if result.null_fraction_exceeded:
+                    validation_error_msg += (f"Too many missing values in {label} dataframe columns "
+                                             f"{result.null_fraction_exceeded}. ")
+                if schema_validator.is_valid(result):
+                    logging.info(f"All values valid in {label} dataframe ({result.rows} rows)")
+
             validation_status = len(validation_error_msg) == 0
 
             data_validation_artifact = DataValidationArtifact(
@@ -140,11 +224,14 @@ class DataValidation:
             # Save validation status and message to a JSON file
             validation_report = {
                 "validation_status": validation_status,
-                "message": validation_error_msg.strip()
+                "message": validation_error_msg.strip(),
+                **file_reports
             }
 
             with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
                 json.dump(validation_report, report_file, indent=4)
+            if cache_file_path is not None:
+                write_json_file(cache_file_path, validation_report)
 
             logging.info("Data validation artifact created and saved to JSON file.")
             logging.info(f"Data validation artifact: {data_validation_artifact}")
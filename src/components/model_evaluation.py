@@ -3,15 +3,22 @@ Performs model evaluation for the Vehicle Insurance Data Pipeline MLops project.
 """
 from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.artifact_entity import ModelTrainerArtifact, DataIngestionArtifact, ModelEvaluationArtifact
-from sklearn.metrics import f1_score
 from src.exception import MyException
-from src.constants import TARGET_COLUMN
+from src.constants import TARGET_COLUMN, SCHEMA_FILE_PATH, MODEL_EVALUATION_CACHE_VERSION
 from src.logger import logging
-from src.utils.main_utils import load_object
+from src.utils.main_utils import (load_object, read_yaml_file, read_json_file, write_json_file, hash_file,
+                                  compute_fingerprint)
+from src.utils.metrics_utils import PredictionCache, classification_metrics, confusion_counts, metrics_from_counts
+from src.utils.profiling_utils import record_rows
+import os
+import shutil
 import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from src.entity.s3_estimator import Proj1Estimator
+from src.entity.estimator import FeatureEncoder
 from dataclasses import dataclass
 
 @dataclass
@@ -25,11 +32,95 @@ class EvaluateModelResponse:
 class ModelEvaluation:
 
     def __init__(self, model_eval_config: ModelEvaluationConfig, data_ingestion_artifact: DataIngestionArtifact,
-                 model_trainer_artifact: ModelTrainerArtifact):
+                 model_trainer_artifact: ModelTrainerArtifact, best_model: Optional[Proj1Estimator] = None,
+                 test_data: Optional[Tuple[pd.DataFrame, pd.Series]] = None,
+                 prediction_cache: Optional[PredictionCache] = None):
+        """
+        :param best_model: production model fetched in advance (see load_best_model), looked up when None
+        :param test_data: encoded test features and target prepared in advance (see load_test_data)
+        :param prediction_cache: predictions shared with the other stages of the run (a new one when None)
+        """
         try:
             self.model_eval_config = model_eval_config
             self.data_ingestion_artifact = data_ingestion_artifact
             self.model_trainer_artifact = model_trainer_artifact
+            self.best_model = best_model
+            self.test_data = test_data
+            self.prediction_cache = prediction_cache if prediction_cache is not None else PredictionCache()
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def get_champion_cache_dir(model_eval_config: ModelEvaluationConfig, data_ingestion_artifact: DataIngestionArtifact,
+                               model_version: str) -> str:
+        """
+        Method Name :   get_champion_cache_dir
+        Description :   This function locates the cached score of a production model version on the test set:
+                        the entry is keyed by the S3 location and ETag/VersionId of the model, the content hash
+                        of the test file (taken from the ingestion artifact when available) and the schema
+
+        Output      :   Returns the cache entry directory (which may not exist)
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            test_file_hash = data_ingestion_artifact.test_file_hash or hash_file(data_ingestion_artifact.test_file_path)
+            cache_key = compute_fingerprint(model_eval_config.bucket_name, model_eval_config.s3_model_key_path,
+                                            model_version, test_file_hash, hash_file(SCHEMA_FILE_PATH),
+                                            MODEL_EVALUATION_CACHE_VERSION)
+            return os.path.join(model_eval_config.cache_dir, cache_key)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def load_best_model(model_eval_config: ModelEvaluationConfig,
+                        data_ingestion_artifact: Optional[DataIngestionArtifact] = None) -> Optional[Proj1Estimator]:
+        """
+        Method Name :   load_best_model
+        Description :   This function downloads the production model, so that it can be fetched
+                        while the new model is still being trained. Given the ingestion artifact, the download
+                        is skipped when the score of this model version on the test set is cached
+        
+        Output      :   Returns the production model (with its model loaded unless its score is cached),
+                        None if there is none
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            proj1_estimator = Proj1Estimator(bucket_name=model_eval_config.bucket_name,
+                                             model_path=model_eval_config.s3_model_key_path)
+            model_version = proj1_estimator.get_model_version()
+            if model_version is None:
+                return None
+            if data_ingestion_artifact is not None and model_eval_config.use_cache:
+                cache_dir = ModelEvaluation.get_champion_cache_dir(model_eval_config, data_ingestion_artifact,
+                                                                   model_version)
+                if os.path.exists(os.path.join(cache_dir, "metrics.json")):
+                    logging.info(f"Production model [{model_version}] unchanged and already scored, skipping download")
+                    return proj1_estimator
+            proj1_estimator.loaded_model = proj1_estimator.load_model()
+            return proj1_estimator
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def load_test_data(data_ingestion_artifact: DataIngestionArtifact) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Method Name :   load_test_data
+        Description :   This function reads the test file and encodes its features the way
+                        production models expect them
+        
+        Output      :   Returns encoded test features and target
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            test_df = pd.read_csv(data_ingestion_artifact.test_file_path)
+            x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
+
+            logging.info("Test data loaded and now transforming it for prediction...")
+
+            # Production models saved before the encoder was part of MyModel expect encoded features
+            x = FeatureEncoder.from_schema(read_yaml_file(file_path=SCHEMA_FILE_PATH)).fit_transform(x)
+            return x, y
         except Exception as e:
             raise MyException(e, sys) from e
 
@@ -47,42 +138,94 @@ class ModelEvaluation:
             proj1_estimator = Proj1Estimator(bucket_name=bucket_name,
                                                model_path=model_path)
 
-            if proj1_estimator.is_model_present(model_path=model_path):
+            if proj1_estimator.get_model_version() is not None:
                 return proj1_estimator
             return None
         except Exception as e:
             raise  MyException(e,sys)
+
+    def load_cached_champion_score(self, cache_dir: str) -> Optional[dict]:
+        """
+        Returns the cached metrics of the production model on the test set, None on a cache miss.
+        """
+        try:
+            metrics_file_path = os.path.join(cache_dir, "metrics.json")
+            if not os.path.exists(metrics_file_path):
+                return None
+            return read_json_file(metrics_file_path)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def save_champion_score_to_cache(self, cache_dir: str, champion_score: dict,
+                                     predictions: Optional[np.ndarray] = None) -> None:
+        """
+        Stores the metrics and, when given, the test-set predictions of the production model. The entry is
+        assembled in a temporary directory and renamed, so concurrent runs never see a partial entry.
+        """
+        try:
+            if os.path.exists(cache_dir):
+                return
+            tmp_dir = f"{cache_dir}.{os.getpid()}.tmp"
+            os.makedirs(tmp_dir, exist_ok=True)
+            if predictions is not None:
+                np.save(os.path.join(tmp_dir, "predictions.npy"), np.asarray(predictions, dtype=np.int8))
+            write_json_file(os.path.join(tmp_dir, "metrics.json"), champion_score)
+            try:
+                os.rename(tmp_dir, cache_dir)
+            except OSError:
+                # another run stored the same entry first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            logging.info(f"Stored production model score in cache [{cache_dir}]")
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def _score_chunk(chunk: pd.DataFrame, feature_encoder: FeatureEncoder, models: Dict[str, object]) -> Dict[str, dict]:
+        # Runs in a pool thread: encodes one chunk once and returns the confusion counts of every model on it
+        y = chunk[TARGET_COLUMN]
+        x = feature_encoder.transform(chunk)
+        return {name: confusion_counts(y, model.predict(x)) for name, model in models.items()}
+
+    def score_models_in_chunks(self, models: Dict[str, object]) -> Dict[str, dict]:
+        """
+        Method Name :   score_models_in_chunks
+        Description :   This function streams the test file in chunks of chunk_size rows and scores every model
+                        on each chunk in a thread pool. Only confusion counts are accumulated (no prediction
+                        vectors), and at most two chunks per worker are in flight, so memory stays constant
+                        whatever the size of the test set
         
-    def _map_gender_column(self, df):
-        """Map Gender column to 0 for Female and 1 for Male."""
-        logging.info("Mapping 'Gender' column to binary values")
-        df['Gender'] = df['Gender'].map({'Female': 0, 'Male': 1}).astype(int)
-        return df
-
-    def _create_dummy_columns(self, df):
-        """Create dummy variables for categorical features."""
-        logging.info("Creating dummy variables for categorical features")
-        df = pd.get_dummies(df, drop_first=True)
-        return df
-
-    def _rename_columns(self, df):
-        """Rename specific columns and ensure integer types for dummy columns."""
-        logging.info("Renaming specific columns and casting to int")
-        df = df.rename(columns={
-            "Vehicle_Age_< 1 Year": "Vehicle_Age_lt_1_Year",
-            "Vehicle_Age_> 2 Years": "Vehicle_Age_gt_2_Years"
-        })
-        for col in ["Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]:
-            if col in df.columns:
-                df[col] = df[col].astype('int')
-        return df
-    
-    def _drop_id_column(self, df):
-        """Drop the 'id' column if it exists."""
-        logging.info("Dropping 'id' column")
-        if "_id" in df.columns:
-            df = df.drop("_id", axis=1)
-        return df
+        Output      :   Returns {model name: metrics and confusion counts, with the number of rows scored}
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            test_file_path = self.data_ingestion_artifact.test_file_path
+            n_jobs = self.model_eval_config.n_jobs
+            max_workers = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 1 else n_jobs
+            feature_encoder = FeatureEncoder.from_schema(self._schema_config).fit(pd.read_csv(test_file_path, nrows=0))
+            totals = {name: {"tp": 0, "fp": 0, "fn": 0, "tn": 0} for name in models}
+            rows = 0
+
+            def accumulate(futures) -> None:
+                for future in futures:
+                    for name, counts in future.result().items():
+                        for cell, count in counts.items():
+                            totals[name][cell] += count
+
+            logging.info(f"Scoring {list(models)} on [{test_file_path}] in chunks of "
+                         f"{self.model_eval_config.chunk_size} rows with {max_workers} workers")
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                pending = set()
+                for chunk in pd.read_csv(test_file_path, chunksize=self.model_eval_config.chunk_size):
+                    rows += len(chunk)
+                    record_rows(len(chunk))
+                    pending.add(pool.submit(self._score_chunk, chunk, feature_encoder, models))
+                    if len(pending) >= 2 * max_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        accumulate(done)
+                accumulate(wait(pending)[0])
+            return {name: {**metrics_from_counts(**counts), **counts, "rows": rows} for name, counts in totals.items()}
+        except Exception as e:
+            raise MyException(e, sys) from e
 
     def evaluate_model(self) -> EvaluateModelResponse:
         """
@@ -94,27 +237,54 @@ class ModelEvaluation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
-            x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
-
-            logging.info("Test data loaded and now transforming it for prediction...")
-
-            x = self._map_gender_column(x)
-            x = self._drop_id_column(x)
-            x = self._create_dummy_columns(x)
-            x = self._rename_columns(x)
-
             trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
             logging.info("Trained model loaded/exists.")
             trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
             logging.info(f"F1_Score for this model: {trained_model_f1_score}")
 
             best_model_f1_score=None
-            best_model = self.get_best_model()
-            if best_model is not None:
+            champion_score = None
+            cache_dir = None
+            best_model = self.best_model or self.get_best_model()
+            if best_model is not None and self.model_eval_config.use_cache:
+                # The champion is only scored again when its version or the test set changed
+                cache_dir = self.get_champion_cache_dir(self.model_eval_config, self.data_ingestion_artifact,
+                                                        best_model.model_version)
+                champion_score = self.load_cached_champion_score(cache_dir)
+                if champion_score is not None:
+                    logging.info(f"Production model [{best_model.model_version}] score cache hit [{cache_dir}]")
+
+            if self.model_eval_config.chunk_size > 0:
+                # Champion and challenger are both scored on the same streamed test rows
+                models = {"trained_model": trained_model}
+                if best_model is not None and champion_score is None:
+                    models["best_model"] = best_model
+                scores = self.score_models_in_chunks(models)
+                trained_model_f1_score = scores["trained_model"]["f1_score"]
+                logging.info(f"F1_Score for this model on the streamed test set: {trained_model_f1_score}")
+                if "best_model" in scores:
+                    champion_score = {**scores["best_model"], "model_version": best_model.model_version}
+                    if cache_dir:
+                        self.save_champion_score_to_cache(cache_dir, champion_score)
+            elif best_model is not None and champion_score is None:
+                x, y = (self.test_data if self.test_data is not None
+                        else self.load_test_data(self.data_ingestion_artifact))
+                record_rows(len(y))
                 logging.info(f"Computing F1_Score for production model..")
-                y_hat_best_model = best_model.predict(x)
-                best_model_f1_score = f1_score(y, y_hat_best_model)
+                y_hat_best_model = self.prediction_cache.predict(
+                    best_model, x,
+                    model_key=(f"s3://{self.model_eval_config.bucket_name}/{self.model_eval_config.s3_model_key_path}"
+                               f"@{best_model.model_version}"),
+                    dataset_key=self.data_ingestion_artifact.test_file_hash or self.data_ingestion_artifact.test_file_path)
+                champion_score = {**classification_metrics(y, y_hat_best_model), "rows": len(y),
+                                  "model_version": best_model.model_version}
+                if cache_dir:
+                    self.save_champion_score_to_cache(cache_dir, champion_score, y_hat_best_model)
+            elif champion_score is not None:
+                record_rows(champion_score["rows"])
+
+            if champion_score is not None:
+                best_model_f1_score = champion_score["f1_score"]
                 logging.info(f"F1_Score-Production Model: {best_model_f1_score}, F1_Score-New Trained Model: {trained_model_f1_score}")
             
             tmp_best_model_score = 0 if best_model_f1_score is None else best_model_f1_score
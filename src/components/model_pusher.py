@@ -2,24 +2,29 @@
 Pushes trained models to deployment targets for the Vehicle Insurance Data Pipeline MLops project.
 """
 import sys
+from typing import Optional
 
 from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.logger import logging
-from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
+from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact, DataIngestionArtifact
 from src.entity.config_entity import ModelPusherConfig
 from src.entity.s3_estimator import Proj1Estimator
 
 
 class ModelPusher:
     def __init__(self, model_evaluation_artifact: ModelEvaluationArtifact,
-                 model_pusher_config: ModelPusherConfig):
+                 model_pusher_config: ModelPusherConfig,
+                 data_ingestion_artifact: Optional[DataIngestionArtifact] = None):
         """
         :param model_evaluation_artifact: Output reference of data evaluation artifact stage
         :param model_pusher_config: Configuration for model pusher
+        :param data_ingestion_artifact: Output reference of data ingestion artifact stage, its data sketch
+                                        is pushed next to the model for drift detection
         """
         self.s3 = SimpleStorageService()
         self.model_evaluation_artifact = model_evaluation_artifact
+        self.data_ingestion_artifact = data_ingestion_artifact
         self.model_pusher_config = model_pusher_config
         self.proj1_estimator = Proj1Estimator(bucket_name=model_pusher_config.bucket_name,
                                 model_path=model_pusher_config.s3_model_key_path)
@@ -40,6 +45,12 @@ class ModelPusher:
             
             logging.info("Uploading new model to S3 bucket....")
             self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            if self.data_ingestion_artifact is not None and self.data_ingestion_artifact.data_sketch_file_path:
+                logging.info("Uploading data sketch of the new model to S3 bucket....")
+                self.s3.upload_file(self.data_ingestion_artifact.data_sketch_file_path,
+                                    to_filename=self.model_pusher_config.s3_sketch_key_path,
+                                    bucket_name=self.model_pusher_config.bucket_name,
+                                    remove=False)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
                                                         s3_model_path=self.model_pusher_config.s3_model_key_path)
 
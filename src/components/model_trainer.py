@@ -2,73 +2,192 @@
 Trains machine learning models for the Vehicle Insurance Data Pipeline MLops project.
 """
 import sys
-from typing import Tuple
+import time
+from dataclasses import asdict
+from typing import List, Optional, Tuple
 
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
 
 from src.exception import MyException
 from src.logger import logging
-from src.utils.main_utils import load_numpy_array_data, load_object, save_object
+from src.utils.main_utils import load_numpy_array_data, load_object, save_object, write_json_file
+from src.utils.metrics_utils import PredictionCache, classification_metrics
+from src.utils.profiling_utils import record_rows
+from src.utils.resampling_utils import Resampler
+from src.utils.model_utils import (build_model, cross_validate_model, measure_inference_latency, model_size_bytes,
+                                   read_model_config, read_search_config, search_hyperparameters)
 from src.entity.config_entity import ModelTrainerConfig
-from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
+from src.entity.artifact_entity import (DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact,
+                                        ModelCostMetricArtifact, HyperparameterTrialArtifact, FoldMetricArtifact)
 from src.entity.estimator import MyModel
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
-                 model_trainer_config: ModelTrainerConfig):
+                 model_trainer_config: ModelTrainerConfig, prediction_cache: Optional[PredictionCache] = None):
         """
         :param data_transformation_artifact: Output reference of data transformation artifact stage
         :param model_trainer_config: Configuration for model training
+        :param prediction_cache: predictions shared with the other stages of the run (a new one when None)
         """
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.prediction_cache = prediction_cache if prediction_cache is not None else PredictionCache()
+        self.model_backend, self.model_params = read_model_config(model_trainer_config.model_config_file_path,
+                                                                  backend=model_trainer_config.model_backend)
+        self.search_config = read_search_config(model_trainer_config.model_config_file_path)
+        if model_trainer_config.hyperparameter_search is not None:
+            self.search_config["enabled"] = model_trainer_config.hyperparameter_search
 
-    def get_model_object_and_report(self, train: np.array, test: np.array) -> Tuple[object, object]:
+    def get_fold_data(self, x_train: np.array, y_train: np.array) -> Tuple[np.array, np.array, Optional[Resampler]]:
+        """
+        Method Name :   get_fold_data
+        Description :   This function returns the rows cross-validation folds are built from. When resampling
+                        added or dropped training rows, these are the memmapped rows before resampling, with
+                        a resampler applied to the training rows of each fold only: splitting the resampled
+                        rows would put synthetic neighbours of held-out rows in the training folds.
+        
+        Output      :   Returns (features, labels, resampler or None)
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            artifact = self.data_transformation_artifact
+            if artifact.unresampled_train_file_path is None:
+                return x_train, y_train, None
+            resampler = Resampler(strategy=artifact.resampling_strategy, n_jobs=1,
+                                  random_state=self.model_trainer_config._random_state)
+            return (load_numpy_array_data(file_path=artifact.unresampled_train_file_path, mmap_mode="r"),
+                    load_numpy_array_data(file_path=artifact.unresampled_train_target_file_path, mmap_mode="r"),
+                    resampler)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def search_model_params(self, x_train: np.array, y_train: np.array) -> Optional[List[HyperparameterTrialArtifact]]:
+        """
+        Method Name :   search_model_params
+        Description :   This function searches the hyperparameters of the model backend over the search space
+                        of config/model.yaml and keeps the best configuration for the final fit
+        
+        Output      :   Returns the search trials, None when the search is disabled or has no space for the backend
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            space = (self.search_config.get("space") or {}).get(self.model_backend)
+            if not self.search_config["enabled"] or not space:
+                return None
+            logging.info(f"Searching hyperparameters of [{self.model_backend}] over {list(space)}")
+            model = build_model(self.model_backend, self.model_params,
+                                class_weight=self.data_transformation_artifact.class_weight,
+                                random_state=self.model_trainer_config._random_state)
+            x_folds, y_folds, resampler = self.get_fold_data(x_train, y_train)
+            best_params, trials = search_hyperparameters(model, space, x_folds, y_folds, self.search_config,
+                                                         random_state=self.model_trainer_config._random_state,
+                                                         resampler=resampler)
+            self.model_params = {**self.model_params, **best_params}
+            return [HyperparameterTrialArtifact(**trial) for trial in trials]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def cross_validate(self, x_train: np.array, y_train: np.array) -> Optional[List[FoldMetricArtifact]]:
+        """
+        Method Name :   cross_validate
+        Description :   This function cross-validates the model backend with k folds of the training set
+                        (before resampling, see get_fold_data), the folds being fitted in parallel worker
+                        processes sharing the memmapped arrays
+        
+        Output      :   Returns the fold metrics, None when cross-validation is disabled
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            if self.model_trainer_config.cv_folds < 2:
+                return None
+            logging.info(f"Cross-validating [{self.model_backend}] with {self.model_trainer_config.cv_folds} folds")
+            model = build_model(self.model_backend, self.model_params,
+                                class_weight=self.data_transformation_artifact.class_weight,
+                                random_state=self.model_trainer_config._random_state)
+            x_folds, y_folds, resampler = self.get_fold_data(x_train, y_train)
+            folds = cross_validate_model(model, x_folds, y_folds, n_folds=self.model_trainer_config.cv_folds,
+                                         n_jobs=self.model_trainer_config.cv_n_jobs,
+                                         random_state=self.model_trainer_config._random_state,
+                                         resampler=resampler)
+            return [FoldMetricArtifact(**fold) for fold in folds]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_model_object_and_report(self, x_train: np.array, y_train: np.array,
+                                    x_test: np.array, y_test: np.array) -> Tuple[object, object, object]:
         """
         Method Name :   get_model_object_and_report
-        Description :   This function trains a RandomForestClassifier with specified parameters
+        Description :   This function trains the model backend selected in config/model.yaml
+                        and measures its training time, size and inference latency
         
-        Output      :   Returns metric artifact object and trained model object
+        Output      :   Returns trained model object, metric artifact and cost metric artifact
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            logging.info("Training RandomForestClassifier with specified parameters")
-
-            # Splitting the train and test data into features and target variables
-            x_train, y_train, x_test, y_test = train[:, :-1], train[:, -1], test[:, :-1], test[:, -1]
-            logging.info("train-test split done.")
-
-            # Initialize RandomForestClassifier with specified parameters
-            model = RandomForestClassifier(
-                n_estimators = self.model_trainer_config._n_estimators,
-                min_samples_split = self.model_trainer_config._min_samples_split,
-                min_samples_leaf = self.model_trainer_config._min_samples_leaf,
-                max_depth = self.model_trainer_config._max_depth,
-                criterion = self.model_trainer_config._criterion,
-                random_state = self.model_trainer_config._random_state
-            )
+            fold_metrics = self.cross_validate(x_train, y_train)
+
+            logging.info(f"Training model backend [{self.model_backend}] with parameters {self.model_params}")
+            model = build_model(self.model_backend, self.model_params,
+                                class_weight=self.data_transformation_artifact.class_weight,
+                                random_state=self.model_trainer_config._random_state)
 
-            # Fit the model
+            # Fit the model (predictions of a model previously trained in this run are stale)
+            self.prediction_cache.invalidate(self.model_trainer_config.trained_model_file_path)
             logging.info("Model training going on...")
+            start = time.perf_counter()
             model.fit(x_train, y_train)
-            logging.info("Model training done.")
-
-            # Predictions and evaluation metrics
-            y_pred = model.predict(x_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred)
-            precision = precision_score(y_test, y_pred)
-            recall = recall_score(y_test, y_pred)
-
-            # Creating metric artifact
-            metric_artifact = ClassificationMetricArtifact(f1_score=f1, precision_score=precision, recall_score=recall)
-            return model, metric_artifact
+            train_seconds = time.perf_counter() - start
+            logging.info(f"Model training done in {train_seconds:.2f}s.")
+
+            # Predictions and evaluation metrics, all from one confusion-matrix pass
+            y_pred = self.prediction_cache.predict(
+                model, x_test, model_key=self.model_trainer_config.trained_model_file_path,
+                dataset_key=self.data_transformation_artifact.transformed_test_file_path)
+            metrics = classification_metrics(y_test, y_pred)
+
+            # Creating metric artifacts
+            metric_artifact = ClassificationMetricArtifact(f1_score=metrics["f1_score"],
+                                                           precision_score=metrics["precision_score"],
+                                                           recall_score=metrics["recall_score"],
+                                                           accuracy_score=metrics["accuracy_score"])
+            if fold_metrics:
+                fold_f1_scores = [fold.f1_score for fold in fold_metrics]
+                metric_artifact.fold_metrics = fold_metrics
+                metric_artifact.cv_f1_mean = float(np.mean(fold_f1_scores))
+                metric_artifact.cv_f1_std = float(np.std(fold_f1_scores))
+            cost_metric_artifact = ModelCostMetricArtifact(
+                train_seconds=train_seconds,
+                model_size_bytes=model_size_bytes(model),
+                **measure_inference_latency(model, x_test, batch_size=self.model_trainer_config.latency_batch_size,
+                                            repeat=self.model_trainer_config.latency_repeat),
+            )
+            logging.info(f"Model [{self.model_backend}] {metric_artifact}, {cost_metric_artifact}")
+            return model, metric_artifact, cost_metric_artifact
         
         except Exception as e:
             raise MyException(e, sys) from e
 
+    def get_training_accuracy(self, model, x_train: np.array, y_train: np.array) -> float:
+        """
+        Method Name :   get_training_accuracy
+        Description :   This function returns the out-of-bag accuracy of the model when it has one,
+                        otherwise the accuracy of its (cached) predictions on the training set
+        
+        Output      :   Returns training accuracy
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            oob_score = getattr(model, "oob_score_", None)
+            if oob_score is not None:
+                logging.info(f"Using out-of-bag accuracy {oob_score:.4f} instead of re-predicting the training set")
+                return float(oob_score)
+            y_pred = self.prediction_cache.predict(
+                model, x_train, model_key=self.model_trainer_config.trained_model_file_path,
+                dataset_key=self.data_transformation_artifact.transformed_train_file_path)
+            return classification_metrics(y_train, y_pred)["accuracy_score"]
+        except Exception as e:
+            raise MyException(e, sys) from e
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -81,13 +200,20 @@ class ModelTrainer:
         try:
             print("------------------------------------------------------------------------------------------------")
             print("Starting Model Trainer Component")
-            # Load transformed train and test data
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            # Memory-map the transformed features and targets (stored as separate arrays, nothing is copied
+            # until the model reads them)
+            artifact = self.data_transformation_artifact
+            x_train = load_numpy_array_data(file_path=artifact.transformed_train_file_path, mmap_mode="r")
+            y_train = load_numpy_array_data(file_path=artifact.transformed_train_target_file_path, mmap_mode="r")
+            x_test = load_numpy_array_data(file_path=artifact.transformed_test_file_path, mmap_mode="r")
+            y_test = load_numpy_array_data(file_path=artifact.transformed_test_target_file_path, mmap_mode="r")
             logging.info("train-test data loaded")
+            record_rows(len(y_train) + len(y_test))
             
-            # Train model and get metrics
-            trained_model, metric_artifact = self.get_model_object_and_report(train=train_arr, test=test_arr)
+            # Search hyperparameters (when enabled), then train model and get metrics
+            search_trials = self.search_model_params(x_train, y_train)
+            trained_model, metric_artifact, cost_metric_artifact = self.get_model_object_and_report(
+                x_train, y_train, x_test, y_test)
             logging.info("Model object and artifact loaded.")
             
             # Load preprocessing object
@@ -95,7 +221,7 @@ class ModelTrainer:
             logging.info("Preprocessing obj loaded.")
 
             # Check if the model's accuracy meets the expected threshold
-            if accuracy_score(train_arr[:, -1], trained_model.predict(train_arr[:, :-1])) < self.model_trainer_config.expected_accuracy:
+            if self.get_training_accuracy(trained_model, x_train, y_train) < self.model_trainer_config.expected_accuracy:
                 logging.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
 
@@ -105,10 +231,24 @@ class ModelTrainer:
             save_object(self.model_trainer_config.trained_model_file_path, my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
+            # Record scores and cost of the run to compare backends
+            write_json_file(self.model_trainer_config.model_report_file_path, {
+                "model_backend": self.model_backend,
+                "model_params": self.model_params,
+                "train_rows": int(len(y_train)),
+                "metrics": asdict(metric_artifact),
+                "cost": asdict(cost_metric_artifact),
+                "search_trials": [asdict(trial) for trial in search_trials] if search_trials else None,
+            })
+
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
                 metric_artifact=metric_artifact,
+                model_backend=self.model_backend,
+                cost_metric_artifact=cost_metric_artifact,
+                model_report_file_path=self.model_trainer_config.model_report_file_path,
+                search_trials=search_trials,
             )
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
             return model_trainer_artifact
@@ -1,35 +1,56 @@
 import boto3
 import os
-from src.constants import AWS_SECRET_ACCESS_KEY_ENV_KEY, AWS_ACCESS_KEY_ID_ENV_KEY, REGION_NAME
+from typing import Optional
+from src.constants import AWS_SECRET_ACCESS_KEY, AWS_ACCESS_KEY_ID, REGION_NAME, S3_ENDPOINT_URL
 
 
 class S3Client:
 
     s3_client=None
     s3_resource = None
-    def __init__(self, region_name=REGION_NAME):
-        """ 
-        This Class gets aws credentials from constants and creates a connection with s3 bucket 
+    endpoint_url = None
+    def __init__(self, region_name=REGION_NAME, endpoint_url: Optional[str] = None,
+                 aws_access_key_id: Optional[str] = None, aws_secret_access_key: Optional[str] = None):
+        """
+        This Class gets aws credentials from constants and creates a connection with s3 bucket.
+        The connection is shared by all instances; endpoint_url (default: S3_ENDPOINT_URL, i.e. AWS) points it
+        at another S3-compatible endpoint such as MinIO, LocalStack or a local stand-in, and passing a
+        different endpoint than the current one reconnects.
         """
 
-        if S3Client.s3_resource==None or S3Client.s3_client==None:
+        if endpoint_url is None and S3Client.s3_client is not None:
+            endpoint_url = S3Client.endpoint_url
+        endpoint_url = endpoint_url or S3_ENDPOINT_URL or None
+        if S3Client.s3_resource==None or S3Client.s3_client==None or endpoint_url != S3Client.endpoint_url:
             # Use credentials directly from constants
-            __access_key_id = AWS_ACCESS_KEY_ID_ENV_KEY
-            __secret_access_key = AWS_SECRET_ACCESS_KEY_ENV_KEY
+            __access_key_id = aws_access_key_id or AWS_ACCESS_KEY_ID
+            __secret_access_key = aws_secret_access_key or AWS_SECRET_ACCESS_KEY
             if not __access_key_id:
                 raise Exception("AWS Access Key ID is not set in constants.")
             if not __secret_access_key:
                 raise Exception("AWS Secret Access Key is not set in constants.")
-        
+
             S3Client.s3_resource = boto3.resource('s3',
                                             aws_access_key_id=__access_key_id,
                                             aws_secret_access_key=__secret_access_key,
-                                            region_name=region_name
+                                            region_name=region_name,
+                                            endpoint_url=endpoint_url
                                             )
             S3Client.s3_client = boto3.client('s3',
                                         aws_access_key_id=__access_key_id,
                                         aws_secret_access_key=__secret_access_key,
-                                        region_name=region_name
+                                        region_name=region_name,
+                                        endpoint_url=endpoint_url
                                         )
+            S3Client.endpoint_url = endpoint_url
         self.s3_resource = S3Client.s3_resource
-        self.s3_client = S3Client.s3_client
\ No newline at end of file
+        self.s3_client = S3Client.s3_client
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Drops the shared connection, the next instance connects again.
+        """
+        cls.s3_client = None
+        cls.s3_resource = None
+        cls.endpoint_url = None
@@ -25,6 +25,7 @@ load_dotenv()
 # MongoDB DB + collection names used throughout ingestion/training/prediction.
 DATABASE_NAME = "Vehicle-Insurance"
 COLLECTION_NAME = "Vehicle-Insurance-Data"
+MONGODB_EXPORT_BATCH_SIZE: int = 10000  # documents per cursor batch when exporting a collection
 
 # IMPORTANT:
 # Previously you used `MONGODB_URL_KEY`. Keep it for backward compatibility,
@@ -37,6 +38,15 @@ MONGODB_URL_KEY = MONGODB_URL  # backward compatible alias
 # -----------------------------------------------------------------------------
 PIPELINE_NAME: str = ""                 # optional pipeline name if you use one
 ARTIFACT_DIR: str = "artifact"          # root folder where pipeline artifacts are stored
+CACHE_DIR: str = os.path.join(ARTIFACT_DIR, "cache")  # content addressed results shared across runs
+PIPELINE_CHECKPOINT_FILE_NAME: str = "checkpoint.json"  # completed stage artifacts of a run (for resume)
+PIPELINE_CONCURRENT: bool = True                     # run independent stages/tasks of the pipeline concurrently
+PIPELINE_MAX_WORKERS: int = 4                         # tasks running at the same time
+PIPELINE_REPORT_FILE_NAME: str = "pipeline_report.json"  # task timings, overlap and critical path of a run
+PIPELINE_PROFILE_FILE_NAME: str = "run_profile.json"  # wall/CPU time, peak RSS, rows and bytes of every stage
+PIPELINE_PROFILE_BASELINE_FILE_PATH: str = os.path.join(ARTIFACT_DIR, "profile_baseline.json")  # compared when present
+PIPELINE_PROFILE_REGRESSION_THRESHOLD: float = 0.2    # warn when a stage metric grows by more than 20%
+PIPELINE_PREDICTION_CACHE_MAX_ENTRIES: int = 8       # (model, dataset) predictions kept during a run, least recently used dropped
 
 MODEL_FILE_NAME = "model.pkl"           # final trained model filename
 TARGET_COLUMN = "Response"              # target label column in dataset
@@ -65,6 +75,19 @@ AWS_DEFAULT_REGION = os.getenv(AWS_DEFAULT_REGION_ENV_KEY, "us-east-1")
 # Backward compatible aliases (if your old code uses REGION_NAME)
 REGION_NAME = AWS_DEFAULT_REGION
 
+# S3-compatible endpoint (e.g. MinIO, LocalStack or a local stand-in), empty for AWS
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "")
+
+# S3 transfers (overridable from env to tune for the network of the host)
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(16 * 1024 * 1024)))  # larger objects move in parts
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(16 * 1024 * 1024)))  # part / range-GET size
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))  # parts transferred at the same time
+MODEL_ARTIFACT_CODEC = os.getenv("MODEL_ARTIFACT_CODEC", "auto")  # zstd, lz4, gzip, none ("auto": fastest installed)
+S3_METADATA_CACHE_TTL: float = float(os.getenv("S3_METADATA_CACHE_TTL", "60"))  # seconds HEAD answers are reused
+S3_HEAD_MAX_WORKERS: int = 16                                    # HEAD requests of a batch check in flight
+S3_STREAM_PART_SIZE: int = 8 * 1024 * 1024                       # range GET size of streamed model loads
+S3_STREAM_PREFETCH_PARTS: int = 4                                # parts downloaded ahead of the unpickler
+
 
 # -----------------------------------------------------------------------------
 # 5) Data ingestion constants
@@ -75,6 +98,14 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+DATA_INGESTION_RANDOM_STATE: int = 42                 # fixed split, so unchanged data gives identical files
+DATA_INGESTION_USE_AGGREGATION_PUSHDOWN: bool = True   # project/clean documents on the MongoDB server
+DATA_INGESTION_ENCODE_CATEGORIES: bool = False         # also apply the categorical encodings on the server
+DATA_INGESTION_DECODE_RAW_BSON: bool = True            # decode raw BSON batches into column arrays
+DATA_INGESTION_SKETCH_DIR: str = "sketch"
+DATA_SKETCH_FILE_NAME: str = "data_sketch.json"
+DATA_SKETCH_K: int = 200                               # quantile sketch accuracy (rank error ~1.7/k)
+DATA_SKETCH_MAX_CATEGORIES: int = 1000                 # categories tracked per column before "__other__"
 
 # -----------------------------------------------------------------------------
 # 6) Data validation constants
@@ -82,6 +113,18 @@ DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
 # Data Validation related constant start with DATA_VALIDATION VAR NAME
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_CHUNK_SIZE: int = 100_000   # rows read and checked at once
+DATA_VALIDATION_ERROR_BUDGET: int = 0        # invalid values tolerated before validation fails (and stops early)
+DATA_VALIDATION_USE_CACHE: bool = True       # reuse the report of byte-identical train/test files and schema
+DATA_VALIDATION_CACHE_VERSION: str = "2"     # bump when the validation logic changes
+
+# Data drift related constant start with DATA_DRIFT VAR NAME
+DATA_DRIFT_DIR_NAME: str = "data_drift"
+DATA_DRIFT_REPORT_FILE_NAME: str = "report.json"
+DATA_DRIFT_PSI_THRESHOLD: float = 0.2        # PSI above this means the column has drifted
+DATA_DRIFT_KS_THRESHOLD: float = 0.1         # KS statistic above this means the column has drifted
+DATA_DRIFT_N_BINS: int = 10                  # reference quantile bins used for PSI
+DATA_DRIFT_SKIP_RETRAINING: bool = False     # stop the training pipeline when no column has drifted
 
 # -----------------------------------------------------------------------------
 # 7) Data transformation constants
@@ -90,6 +133,17 @@ DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
 DATA_TRANSFORMATION_DIR_NAME: str = "data_transformation"
 DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR: str = "transformed"
 DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR: str = "transformed_object"
+DATA_TRANSFORMATION_TARGET_FILE_SUFFIX: str = "_target"      # labels are stored next to the features (train_target.npy)
+DATA_TRANSFORMATION_UNRESAMPLED_FILE_SUFFIX: str = "_unresampled"  # train rows before resampling, for cross-validation
+DATA_TRANSFORMATION_FEATURE_DTYPE: str = "float32"           # dtype of the transformed feature arrays
+DATA_TRANSFORMATION_TARGET_DTYPE: str = "int8"               # dtype of the label arrays
+DATA_TRANSFORMATION_RESAMPLING_STRATEGY: str = "smoteenn"  # smoteenn, smoteenn_chunked, random_under, class_weight, none
+DATA_TRANSFORMATION_RESAMPLING_N_JOBS: int = -1            # cores for neighbour searches / chunks
+DATA_TRANSFORMATION_RESAMPLING_CHUNK_SIZE: int = 50_000    # rows per chunk of smoteenn_chunked
+DATA_TRANSFORMATION_RESAMPLE_TEST: bool = True             # also resample the test set
+DATA_TRANSFORMATION_OUT_OF_CORE: bool = False              # stream train/test in chunks into on-disk arrays
+DATA_TRANSFORMATION_CHUNK_SIZE: int = 100_000              # rows per chunk in out-of-core mode
+DATA_TRANSFORMATION_USE_CACHE: bool = True                 # reuse outputs of identical data, schema and settings
 
 # -----------------------------------------------------------------------------
 # 8) Model trainer constants
@@ -100,6 +154,13 @@ MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
+MODEL_TRAINER_BACKEND: str = "random_forest"              # used when config/model.yaml selects no backend
+MODEL_TRAINER_N_JOBS: int = -1                             # cores used by random_forest
+MODEL_TRAINER_REPORT_FILE_NAME: str = "model_report.json"  # training time, size, latency and scores of a run
+MODEL_TRAINER_LATENCY_BATCH_SIZE: int = 1000               # rows of the batch inference measurement
+MODEL_TRAINER_LATENCY_REPEAT: int = 50                     # single-row predictions timed
+MODEL_TRAINER_CV_FOLDS: int = 0                            # k-fold cross-validation of the model (0 disables)
+MODEL_TRAINER_CV_N_JOBS: int = -1                          # folds fitted in parallel worker processes
 
 # Model hyperparameters
 MODEL_TRAINER_N_ESTIMATORS = 300
@@ -112,11 +173,17 @@ MIN_SAMPLES_SPLIT_RANDOM_STATE: int = 101
 # -----------------------------------------------------------------------------
 # 9) Model evaluation + model registry constants
 # -----------------------------------------------------------------------------
+MODEL_EVALUATION_DIR_NAME: str = "model_evaluation"
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
+MODEL_EVALUATION_USE_CACHE: bool = True       # reuse production-model scores of an unchanged model version and test set
+MODEL_EVALUATION_CACHE_VERSION: str = "1"     # bump when the evaluation logic changes
+MODEL_EVALUATION_CHUNK_SIZE: int = 0          # stream the test set in chunks of this many rows (0 loads it whole)
+MODEL_EVALUATION_N_JOBS: int = -1             # chunks scored at the same time (-1: one per core)
 
 # S3 bucket + key where you push/load models (model registry)
 MODEL_BUCKET_NAME = "vehicle-insurance-mlops-ytproject"
 MODEL_PUSHER_S3_KEY = "model-registry"
+MODEL_SKETCH_S3_KEY = DATA_SKETCH_FILE_NAME  # sketch of the data the production model was trained on
 
 # -----------------------------------------------------------------------------
 # 10) App constants (host/port)
@@ -124,3 +191,11 @@ MODEL_PUSHER_S3_KEY = "model-registry"
 # Keep these as defaults, but ALSO allow override from env so Docker/EC2 can control it.
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = int(os.getenv("APP_PORT", "5000"))
+
+# -----------------------------------------------------------------------------
+# 11) Live feature monitoring constants
+# -----------------------------------------------------------------------------
+MONITORING_QUEUE_SIZE: int = 100_000         # pending observations kept before the oldest are dropped
+MONITORING_BATCH_SIZE: int = 1000            # observations folded into the sketches at once
+MONITORING_FLUSH_INTERVAL: float = 1.0       # seconds between background sketch updates
+MONITORING_REFERENCE_TTL: float = 300.0      # seconds the reference sketch is cached
@@ -1,11 +1,13 @@
 import sys
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Optional, List
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, SCHEMA_FILE_PATH, MONGODB_EXPORT_BATCH_SIZE
+from src.data_access.raw_bson_decoder import RawBSONColumnDecoder
 from src.exception import MyException
+from src.utils.main_utils import read_yaml_file
 
 class Proj1Data:
     """
@@ -18,10 +20,99 @@ class Proj1Data:
         """
         try:
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
         except Exception as e:
             raise MyException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+    def _get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        """
+        Returns the collection from the default or specified database.
+        """
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    def _schema_columns(self) -> List[str]:
+        """
+        Returns the schema columns that are kept after export ('id' and the drop column are excluded).
+        """
+        drop_columns = {"id", self._schema_config["drop_columns"]}
+        return [name for column in self._schema_config["columns"] for name in column
+                if name not in drop_columns]
+
+    def get_export_columns(self, encode_categories: bool = False) -> List[str]:
+        """
+        Returns the column order produced by the aggregation export.
+
+        Parameters:
+        ----------
+        encode_categories : bool
+            If True, one-hot columns are replaced by their encoded dummy columns (appended at the end,
+            the same order pd.get_dummies produces in the transformation stage).
+        """
+        columns = self._schema_columns()
+        if not encode_categories:
+            return columns
+        one_hot_columns = self._schema_config["one_hot_columns"]
+        columns = [column for column in columns if column not in one_hot_columns]
+        for dummies in one_hot_columns.values():
+            columns.extend(dummies.keys())
+        return columns
+
+    def get_export_column_types(self, encode_categories: bool = False) -> dict:
+        """
+        Returns the schema type ('int', 'float' or 'category') of every exported column, in export order.
+        Encoded categorical columns are integer codes.
+        """
+        schema_types = {name: dtype for column in self._schema_config["columns"] for name, dtype in column.items()}
+        column_types = {}
+        for column in self.get_export_columns(encode_categories):
+            dtype = schema_types.get(column, "int")
+            if encode_categories and column in self._schema_config["binary_columns"]:
+                dtype = "int"
+            column_types[column] = dtype
+        return column_types
+
+    def build_export_pipeline(self, encode_categories: bool = False) -> List[dict]:
+        """
+        Builds the aggregation pipeline used to export the collection.
+
+        The pipeline projects only the schema columns (dropping '_id' and 'id' on the server), turns "na"
+        into null and, if encode_categories is True, applies the Gender / Vehicle_Age / Vehicle_Damage
+        encodings that the transformation stage expects.
+
+        Returns:
+        -------
+        List[dict]
+            The aggregation pipeline stages.
+        """
+        binary_columns = self._schema_config["binary_columns"] if encode_categories else {}
+        one_hot_columns = self._schema_config["one_hot_columns"] if encode_categories else {}
+
+        projection = {"_id": 0}
+        for column in self._schema_columns():
+            if column in one_hot_columns:
+                continue
+            if column in binary_columns:
+                # Unknown or missing values map to null, like the pandas .map() they replace
+                projection[column] = {"$switch": {
+                    "branches": [{"case": {"$eq": [f"${column}", value]}, "then": code}
+                                 for value, code in binary_columns[column].items()],
+                    "default": None
+                }}
+            else:
+                projection[column] = {"$cond": [{"$eq": [f"${column}", "na"]}, None, f"${column}"]}
+
+        for column, dummies in one_hot_columns.items():
+            for dummy_column, value in dummies.items():
+                projection[dummy_column] = {"$cond": [{"$eq": [f"${column}", value]}, 1, 0]}
+
+        return [{"$project": projection}]
+
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None,
+                                       use_aggregation: bool = False,
+                                       encode_categories: bool = False,
+                                       decode_raw: bool = False) -> pd.DataFrame:
         """
         Exports an entire MongoDB collection as a pandas DataFrame.
 
@@ -31,6 +122,14 @@ class Proj1Data:
             The name of the MongoDB collection to export.
         database_name : Optional[str]
             Name of the database (optional). Defaults to DATABASE_NAME.
+        use_aggregation : bool
+            If True, the projection and "na" normalization are pushed down to MongoDB with an aggregation
+            pipeline, so only the schema columns are sent over the wire.
+        encode_categories : bool
+            Only used with use_aggregation. If True, categorical encodings are also applied on the server.
+        decode_raw : bool
+            If True, raw BSON batches are decoded straight into typed column arrays instead of building
+            one dict per document (see RawBSONColumnDecoder).
 
         Returns:
         -------
@@ -38,11 +137,18 @@ class Proj1Data:
             DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
         """
         try:
-            # Access specified collection from the default or specified database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
+            collection = self._get_collection(collection_name, database_name)
+
+            if decode_raw:
+                return self._export_raw_batches(collection, use_aggregation, encode_categories)
+
+            if use_aggregation:
+                print("Fetching data from mongoDB with aggregation pipeline")
+                pipeline = self.build_export_pipeline(encode_categories=encode_categories)
+                cursor = collection.aggregate(pipeline, allowDiskUse=True, batchSize=MONGODB_EXPORT_BATCH_SIZE)
+                df = pd.DataFrame(list(cursor), columns=self.get_export_columns(encode_categories))
+                print(f"Data fecthed with len: {len(df)}")
+                return df
 
             # Convert collection data to DataFrame and preprocess
             print("Fetching data from mongoDB")
@@ -54,4 +160,27 @@ class Proj1Data:
             return df
 
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+    def _export_raw_batches(self, collection, use_aggregation: bool, encode_categories: bool) -> pd.DataFrame:
+        """
+        Exports the collection through raw BSON batches decoded column-wise.
+        """
+        encode_categories = encode_categories and use_aggregation
+        decoder = RawBSONColumnDecoder(column_types=self.get_export_column_types(encode_categories),
+                                       skip_columns=("_id", "id"),
+                                       capacity=collection.estimated_document_count())
+        if use_aggregation:
+            print("Fetching raw BSON batches from mongoDB with aggregation pipeline")
+            batches = collection.aggregate_raw_batches(self.build_export_pipeline(encode_categories=encode_categories),
+                                                       allowDiskUse=True, batchSize=MONGODB_EXPORT_BATCH_SIZE)
+        else:
+            print("Fetching raw BSON batches from mongoDB")
+            batches = collection.find_raw_batches(batch_size=MONGODB_EXPORT_BATCH_SIZE)
+
+        for batch in batches:
+            decoder.add_batch(batch)
+        df = decoder.to_dataframe()
+        print(f"Data fecthed with len: {len(df)} "
+              f"(column decoded batches: {decoder.decoded_batches}, fallback batches: {decoder.fallback_batches})")
+        return df
@@ -0,0 +1,167 @@
+"""
+Generates synthetic Vehicle-Insurance-Data records for load testing the Vehicle Insurance Data Pipeline MLops project.
+"""
+import os
+import sys
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.exception import MyException
+from src.logger import logging
+
+# Marginals of the public vehicle insurance cross-sell dataset the collection was loaded from
+GENDER_VALUES = ["Male", "Female"]
+GENDER_PROBABILITIES = [0.54, 0.46]
+VEHICLE_AGE_VALUES = ["< 1 Year", "1-2 Year", "> 2 Years"]
+FREQUENT_REGION_CODES = {28.0: 0.28, 8.0: 0.09, 46.0: 0.05, 41.0: 0.05, 15.0: 0.04, 30.0: 0.03}
+FREQUENT_SALES_CHANNELS = {152.0: 0.35, 26.0: 0.21, 124.0: 0.19, 160.0: 0.06, 156.0: 0.03}
+FLAT_ANNUAL_PREMIUM = 2630.0
+FLAT_ANNUAL_PREMIUM_RATE = 0.17
+
+
+class SyntheticVehicleInsuranceData:
+    """
+    Deterministic, seedable generator of records following the Vehicle-Insurance-Data schema.
+
+    Columns are drawn with realistic marginals and the main dependencies of the real data
+    (young customers own new vehicles, previously insured customers rarely report vehicle damage and
+    almost never respond), which gives a `Response` positive rate of about 12%.
+    Chunk k of a run is always generated from the seed (seed, k), so output does not depend on memory limits
+    other than the chunk size.
+    """
+
+    def __init__(self, seed: int = 42, na_fraction: float = 0.0) -> None:
+        """
+        :param seed: seed of the generator
+        :param na_fraction: fraction of "na" values injected into Annual_Premium and Region_Code
+        """
+        self.seed = seed
+        self.na_fraction = na_fraction
+
+    @staticmethod
+    def _choice_with_frequent(rng: np.random.Generator, n_rows: int, frequent: dict, low: int, high: int) -> np.ndarray:
+        """Draws frequent values with their probability and the remaining mass uniformly from [low, high]."""
+        values = rng.integers(low, high + 1, n_rows).astype(np.float64)
+        draw = rng.random(n_rows)
+        threshold = 0.0
+        for value, probability in frequent.items():
+            values[(draw >= threshold) & (draw < threshold + probability)] = value
+            threshold += probability
+        return values
+
+    def generate(self, n_rows: int, start_id: int = 1, chunk_index: int = 0) -> pd.DataFrame:
+        """
+        Generates one chunk of n_rows records.
+
+        :param n_rows: number of records
+        :param start_id: value of the 'id' column of the first record
+        :param chunk_index: index of the chunk, combined with the seed
+        :return: DataFrame with the schema columns (including 'id')
+        """
+        rng = np.random.default_rng([self.seed, chunk_index])
+
+        young = rng.random(n_rows) < 0.42
+        age = np.where(young, rng.integers(20, 30, n_rows), np.round(rng.triangular(30, 42, 85, n_rows))).astype(np.int64)
+
+        # Young customers mostly own vehicles younger than a year
+        vehicle_age_draw = rng.random(n_rows)
+        new_vehicle_rate = np.where(young, 0.85, 0.12)
+        vehicle_age = np.where(vehicle_age_draw < new_vehicle_rate, 0,
+                               np.where(vehicle_age_draw < 1 - np.where(young, 0.002, 0.07), 1, 2))
+
+        previously_insured = (rng.random(n_rows) < np.where(young, 0.62, 0.35)).astype(np.int64)
+        damage_rate = np.where(previously_insured == 1, 0.02, 0.92)
+        vehicle_damage = rng.random(n_rows) < damage_rate
+
+        # Response rate: almost zero for insured customers, highest for middle aged customers with damage
+        response_rate = np.where(previously_insured == 1, 0.001, np.where(vehicle_damage, 0.24, 0.05))
+        response_rate = response_rate * np.where((age >= 30) & (age <= 55), 1.35, 0.75)
+        response = (rng.random(n_rows) < response_rate).astype(np.int64)
+
+        annual_premium = np.round(np.clip(rng.lognormal(10.45, 0.35, n_rows), 2630, 540165), 1)
+        annual_premium[rng.random(n_rows) < FLAT_ANNUAL_PREMIUM_RATE] = FLAT_ANNUAL_PREMIUM
+
+        df = pd.DataFrame({
+            "id": np.arange(start_id, start_id + n_rows, dtype=np.int64),
+            "Gender": rng.choice(GENDER_VALUES, n_rows, p=GENDER_PROBABILITIES),
+            "Age": age,
+            "Driving_License": (rng.random(n_rows) < 0.998).astype(np.int64),
+            "Region_Code": self._choice_with_frequent(rng, n_rows, FREQUENT_REGION_CODES, 0, 52),
+            "Previously_Insured": previously_insured,
+            "Vehicle_Age": np.asarray(VEHICLE_AGE_VALUES, dtype=object)[vehicle_age],
+            "Vehicle_Damage": np.where(vehicle_damage, "Yes", "No").astype(object),
+            "Annual_Premium": annual_premium,
+            "Policy_Sales_Channel": self._choice_with_frequent(rng, n_rows, FREQUENT_SALES_CHANNELS, 1, 163),
+            "Vintage": rng.integers(10, 300, n_rows),
+            "Response": response,
+        })
+
+        if self.na_fraction > 0:
+            for column in ("Annual_Premium", "Region_Code"):
+                mask = rng.random(n_rows) < self.na_fraction
+                df[column] = df[column].astype(object)
+                df.loc[mask, column] = "na"
+        return df
+
+    def iter_chunks(self, n_rows: int, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Yields n_rows records in DataFrames of at most chunk_size rows.
+        """
+        for chunk_index, start in enumerate(range(0, n_rows, chunk_size)):
+            yield self.generate(min(chunk_size, n_rows - start), start_id=start + 1, chunk_index=chunk_index)
+
+    def to_csv(self, file_path: str, n_rows: int, chunk_size: int = 100_000) -> str:
+        """
+        Writes n_rows records to a CSV file, one chunk at a time.
+        """
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            for chunk_index, chunk in enumerate(self.iter_chunks(n_rows, chunk_size)):
+                chunk.to_csv(file_path, mode="w" if chunk_index == 0 else "a", index=False, header=chunk_index == 0)
+            logging.info(f"Wrote {n_rows} synthetic records to {file_path}")
+            return file_path
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def to_parquet(self, file_path: str, n_rows: int, chunk_size: int = 100_000) -> str:
+        """
+        Writes n_rows records to a Parquet file, one row group per chunk. Requires pyarrow.
+        """
+        try:
+            import pyarrow as pa  # optional dependency, only needed for Parquet output
+            import pyarrow.parquet as pq
+
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            writer = None
+            try:
+                for chunk in self.iter_chunks(n_rows, chunk_size):
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(file_path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+            logging.info(f"Wrote {n_rows} synthetic records to {file_path}")
+            return file_path
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def insert_into_collection(self, collection, n_rows: int, chunk_size: int = 100_000) -> int:
+        """
+        Bulk inserts n_rows records into a MongoDB collection (or a compatible in-process stand-in).
+
+        :param collection: pymongo (or mongomock) collection
+        :return: number of inserted documents
+        """
+        try:
+            inserted = 0
+            for chunk in self.iter_chunks(n_rows, chunk_size):
+                result = collection.insert_many(chunk.to_dict(orient="records"), ordered=False)
+                inserted += len(result.inserted_ids)
+            logging.info(f"Inserted {inserted} synthetic records into {collection.name}")
+            return inserted
+        except Exception as e:
+            raise MyException(e, sys) from e
@@ -2,35 +2,107 @@
 Defines artifact entity classes for the Vehicle Insurance Data Pipeline MLops project.
 """
 from dataclasses import dataclass
+from typing import List, Optional
 
 
+@dataclass
+class StageProfileArtifact:
+    stage:str
+    wall_seconds:float
+    cpu_seconds:float
+    process_cpu_seconds:float
+    peak_rss_bytes:Optional[int] = None
+    peak_rss_increase_bytes:Optional[int] = None
+    rows:int = 0
+    bytes_read:Optional[int] = None
+    bytes_written:Optional[int] = None
+
 @dataclass
 class DataIngestionArtifact:
     trained_file_path:str 
     test_file_path:str
+    trained_file_hash:Optional[str] = None
+    test_file_hash:Optional[str] = None
+    data_sketch_file_path:Optional[str] = None
+    stage_profile:Optional[StageProfileArtifact] = None
 
 @dataclass
 class DataValidationArtifact:
     validation_status:bool
     message: str
     validation_report_file_path: str
+    stage_profile:Optional[StageProfileArtifact] = None
+
+@dataclass
+class DataDriftArtifact:
+    drift_status:bool
+    reference_found:bool
+    drifted_columns:List[str]
+    drift_report_file_path:str
+    stage_profile:Optional[StageProfileArtifact] = None
 
 @dataclass
 class DataTransformationArtifact:
     transformed_object_file_path:str 
     transformed_train_file_path:str
     transformed_test_file_path:str
+    transformed_train_target_file_path:str
+    transformed_test_target_file_path:str
+    class_weight:Optional[str] = None
+    resampling_strategy:Optional[str] = None
+    # Train rows before resampling, kept when resampling adds or drops rows (folds are built on them)
+    unresampled_train_file_path:Optional[str] = None
+    unresampled_train_target_file_path:Optional[str] = None
+    stage_profile:Optional[StageProfileArtifact] = None
+
+@dataclass
+class FoldMetricArtifact:
+    fold:int
+    f1_score:float
+    precision_score:float
+    recall_score:float
+    accuracy_score:float
+    train_rows:int
+    test_rows:int
+    fit_seconds:float
+    score_seconds:float
 
 @dataclass
 class ClassificationMetricArtifact:
     f1_score:float
     precision_score:float
     recall_score:float
+    accuracy_score:Optional[float] = None
+    fold_metrics:Optional[List[FoldMetricArtifact]] = None
+    cv_f1_mean:Optional[float] = None
+    cv_f1_std:Optional[float] = None
+
+@dataclass
+class ModelCostMetricArtifact:
+    train_seconds:float
+    model_size_bytes:int
+    single_row_latency_ms:float
+    batch_latency_ms:float
+    batch_size:int
+
+@dataclass
+class HyperparameterTrialArtifact:
+    params:dict
+    round:int
+    n_rows:int
+    mean_score:float
+    std_score:float
+    mean_fit_seconds:float
 
 @dataclass
 class ModelTrainerArtifact:
     trained_model_file_path:str 
     metric_artifact:ClassificationMetricArtifact
+    model_backend:Optional[str] = None
+    cost_metric_artifact:Optional[ModelCostMetricArtifact] = None
+    model_report_file_path:Optional[str] = None
+    search_trials:Optional[List[HyperparameterTrialArtifact]] = None
+    stage_profile:Optional[StageProfileArtifact] = None
 
 @dataclass
 class ModelEvaluationArtifact:
@@ -38,8 +110,10 @@ class ModelEvaluationArtifact:
     changed_accuracy:float
     s3_model_path:str 
     trained_model_path:str
+    stage_profile:Optional[StageProfileArtifact] = None
 
 @dataclass
 class ModelPusherArtifact:
     bucket_name:str
-    s3_model_path:str
\ No newline at end of file
+    s3_model_path:str
+    stage_profile:Optional[StageProfileArtifact] = None
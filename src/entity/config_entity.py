@@ -6,6 +6,7 @@ Defines configuration entity classes for the Vehicle Insurance Data Pipeline MLo
 import os
 from src.constants import *
 from dataclasses import dataclass
+from typing import Optional
 from datetime import datetime
 
 TIMESTAMP: str = datetime.now().strftime("%m_%d_%Y_%H_%M_%S")
@@ -26,12 +27,34 @@ class DataIngestionConfig:
     training_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+    random_state: int = DATA_INGESTION_RANDOM_STATE
     collection_name:str = DATA_INGESTION_COLLECTION_NAME
+    use_aggregation_pushdown: bool = DATA_INGESTION_USE_AGGREGATION_PUSHDOWN
+    encode_categories: bool = DATA_INGESTION_ENCODE_CATEGORIES
+    decode_raw_bson: bool = DATA_INGESTION_DECODE_RAW_BSON
+    data_sketch_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_SKETCH_DIR, DATA_SKETCH_FILE_NAME)
+    sketch_k: int = DATA_SKETCH_K
+    sketch_max_categories: int = DATA_SKETCH_MAX_CATEGORIES
 
 @dataclass
 class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)
     validation_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)
+    chunk_size: int = DATA_VALIDATION_CHUNK_SIZE
+    error_budget: int = DATA_VALIDATION_ERROR_BUDGET
+    use_cache: bool = DATA_VALIDATION_USE_CACHE
+    cache_dir: str = os.path.join(CACHE_DIR, DATA_VALIDATION_DIR_NAME)
+
+@dataclass
+class DataDriftConfig:
+    data_drift_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_DRIFT_DIR_NAME)
+    drift_report_file_path: str = os.path.join(data_drift_dir, DATA_DRIFT_REPORT_FILE_NAME)
+    bucket_name: str = MODEL_BUCKET_NAME
+    s3_sketch_key_path: str = MODEL_SKETCH_S3_KEY
+    psi_threshold: float = DATA_DRIFT_PSI_THRESHOLD
+    ks_threshold: float = DATA_DRIFT_KS_THRESHOLD
+    n_bins: int = DATA_DRIFT_N_BINS
+    skip_retraining: bool = DATA_DRIFT_SKIP_RETRAINING
 
 @dataclass
 class DataTransformationConfig:
@@ -40,9 +63,28 @@ class DataTransformationConfig:
                                                     TRAIN_FILE_NAME.replace("csv", "npy"))
     transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
                                                    TEST_FILE_NAME.replace("csv", "npy"))
+    transformed_train_target_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                           TRAIN_FILE_NAME.replace(".csv", DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + ".npy"))
+    transformed_test_target_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                          TEST_FILE_NAME.replace(".csv", DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + ".npy"))
+    unresampled_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                    TRAIN_FILE_NAME.replace(".csv", DATA_TRANSFORMATION_UNRESAMPLED_FILE_SUFFIX + ".npy"))
+    unresampled_train_target_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
+                                                           TRAIN_FILE_NAME.replace(".csv", DATA_TRANSFORMATION_UNRESAMPLED_FILE_SUFFIX
+                                                                                   + DATA_TRANSFORMATION_TARGET_FILE_SUFFIX + ".npy"))
     transformed_object_file_path: str = os.path.join(data_transformation_dir,
                                                      DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
                                                      PREPROCSSING_OBJECT_FILE_NAME)
+    feature_dtype: str = DATA_TRANSFORMATION_FEATURE_DTYPE
+    target_dtype: str = DATA_TRANSFORMATION_TARGET_DTYPE
+    resampling_strategy: str = DATA_TRANSFORMATION_RESAMPLING_STRATEGY
+    resampling_n_jobs: int = DATA_TRANSFORMATION_RESAMPLING_N_JOBS
+    resampling_chunk_size: int = DATA_TRANSFORMATION_RESAMPLING_CHUNK_SIZE
+    resample_test: bool = DATA_TRANSFORMATION_RESAMPLE_TEST
+    out_of_core: bool = DATA_TRANSFORMATION_OUT_OF_CORE
+    chunk_size: int = DATA_TRANSFORMATION_CHUNK_SIZE
+    use_cache: bool = DATA_TRANSFORMATION_USE_CACHE
+    cache_dir: str = os.path.join(CACHE_DIR, DATA_TRANSFORMATION_DIR_NAME)
     
 @dataclass
 class ModelTrainerConfig:
@@ -50,6 +92,13 @@ class ModelTrainerConfig:
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
     model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
+    model_backend: Optional[str] = None  # overrides the backend of model_config_file_path
+    hyperparameter_search: Optional[bool] = None  # overrides search.enabled of model_config_file_path
+    model_report_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_REPORT_FILE_NAME)
+    latency_batch_size: int = MODEL_TRAINER_LATENCY_BATCH_SIZE
+    latency_repeat: int = MODEL_TRAINER_LATENCY_REPEAT
+    cv_folds: int = MODEL_TRAINER_CV_FOLDS
+    cv_n_jobs: int = MODEL_TRAINER_CV_N_JOBS
     _n_estimators = MODEL_TRAINER_N_ESTIMATORS
     _min_samples_split = MODEL_TRAINER_MIN_SAMPLES_SPLIT
     _min_samples_leaf = MODEL_TRAINER_MIN_SAMPLES_LEAF
@@ -62,11 +111,29 @@ class ModelEvaluationConfig:
     changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    use_cache: bool = MODEL_EVALUATION_USE_CACHE
+    cache_dir: str = os.path.join(CACHE_DIR, MODEL_EVALUATION_DIR_NAME)
+    chunk_size: int = MODEL_EVALUATION_CHUNK_SIZE
+    n_jobs: int = MODEL_EVALUATION_N_JOBS
 
 @dataclass
 class ModelPusherConfig:
     bucket_name: str = MODEL_BUCKET_NAME
     s3_model_key_path: str = MODEL_FILE_NAME
+    s3_sketch_key_path: str = MODEL_SKETCH_S3_KEY
+
+@dataclass
+class FeatureMonitorConfig:
+    bucket_name: str = MODEL_BUCKET_NAME
+    s3_sketch_key_path: str = MODEL_SKETCH_S3_KEY
+    queue_size: int = MONITORING_QUEUE_SIZE
+    batch_size: int = MONITORING_BATCH_SIZE
+    flush_interval: float = MONITORING_FLUSH_INTERVAL
+    reference_ttl: float = MONITORING_REFERENCE_TTL
+    sketch_k: int = DATA_SKETCH_K
+    psi_threshold: float = DATA_DRIFT_PSI_THRESHOLD
+    ks_threshold: float = DATA_DRIFT_KS_THRESHOLD
+    n_bins: int = DATA_DRIFT_N_BINS
 
 @dataclass
 class VehiclePredictorConfig:
@@ -2,11 +2,16 @@
 Defines estimator entity classes for the Vehicle Insurance Data Pipeline MLops project.
 """
 import sys
+from typing import Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
+from src.constants import TARGET_COLUMN
 from src.exception import MyException
 from src.logger import logging
 
@@ -20,6 +25,147 @@ class TargetValueMapping:
         mapping_response = self._asdict()
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
+class FeatureEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encodes raw Vehicle-Insurance-Data records into the model features: binary columns are mapped to their
+    codes, one-hot columns are replaced by their dummy columns (baseline category dropped) and 'id',
+    '_id' and the target are removed.
+
+    The encodings come from the schema (`binary_columns`, `one_hot_columns`) and the output column order is
+    fixed at fit time, so every chunk gets the same columns whatever categories it contains. Records that
+    are already encoded (numeric binary columns, dummy columns present) are passed through, so the encoder
+    accepts both raw and encoded records.
+    """
+
+    def __init__(self, binary_columns: Optional[Dict[str, dict]] = None,
+                 one_hot_columns: Optional[Dict[str, dict]] = None,
+                 drop_columns: tuple = ("id", "_id", TARGET_COLUMN)):
+        """
+        :param binary_columns: {column: {category: code}}
+        :param one_hot_columns: {column: {dummy column: category}}
+        :param drop_columns: columns removed from the output
+        """
+        self.binary_columns = binary_columns
+        self.one_hot_columns = one_hot_columns
+        self.drop_columns = drop_columns
+
+    @classmethod
+    def from_schema(cls, schema_config: dict) -> "FeatureEncoder":
+        return cls(binary_columns=schema_config.get("binary_columns", {}),
+                   one_hot_columns=schema_config.get("one_hot_columns", {}),
+                   drop_columns=("id", schema_config["drop_columns"], TARGET_COLUMN))
+
+    def fit(self, X: DataFrame, y=None) -> "FeatureEncoder":
+        """
+        Fixes the category codes and the output column order from the columns of X.
+        """
+        try:
+            one_hot_columns = self.one_hot_columns or {}
+            self.binary_codes_ = {column: dict(mapping) for column, mapping in (self.binary_columns or {}).items()}
+            self.dummy_columns_ = [dummy for dummies in one_hot_columns.values() for dummy in dummies]
+            skip = set(self.drop_columns) | set(one_hot_columns) | set(self.dummy_columns_)
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            self.output_columns_: List[str] = [column for column in X.columns if column not in skip]
+            self.output_columns_ += self.dummy_columns_
+            return self
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    @staticmethod
+    def _lookup(positions: np.ndarray, uniques, codes: dict, missing: int) -> np.ndarray:
+        """
+        Maps every value of a factorized categorical column to its code: the few distinct values are looked
+        up and broadcast back with numpy. Missing values and categories absent from codes get `missing`.
+        """
+        table = np.fromiter((codes.get(value, missing) for value in uniques), dtype=np.int64, count=len(uniques))
+        # position -1 (missing value) picks the sentinel appended at the end
+        return np.append(table, missing)[positions]
+
+    def _encode_binary(self, column: str, series: pd.Series) -> np.ndarray:
+        if pd.api.types.is_numeric_dtype(series):
+            return series.to_numpy()
+        positions, uniques = pd.factorize(series)
+        codes = self._lookup(positions, uniques, self.binary_codes_[column], missing=-1)
+        if (codes < 0).any():
+            unknown = sorted(set(series[codes < 0].astype(str)))
+            raise ValueError(f"Unknown categories {unknown} in column '{column}'")
+        return codes
+
+    def transform(self, X: DataFrame) -> DataFrame:
+        """
+        Encodes X column by column with vectorized lookups (no get_dummies, no intermediate frames).
+        Categories of one-hot columns that are not in the schema encode to the baseline (all dummies 0).
+        """
+        try:
+            encoded = {}
+            for column in self.output_columns_:
+                if column in self.dummy_columns_:
+                    continue
+                series = X[column]
+                encoded[column] = (self._encode_binary(column, series) if column in self.binary_codes_
+                                   else series.to_numpy())
+            for column, dummies in (self.one_hot_columns or {}).items():
+                if column in X.columns:
+                    # each value is hashed once, whatever the number of dummy columns
+                    positions, uniques = pd.factorize(X[column])
+                    for dummy, category in dummies.items():
+                        encoded[dummy] = self._lookup(positions, uniques, {category: 1}, missing=0)
+                else:
+                    for dummy in dummies:
+                        encoded[dummy] = X[dummy].to_numpy()
+            return DataFrame(encoded, columns=self.output_columns_, index=X.index, copy=False)
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        return np.asarray(self.output_columns_, dtype=object)
+
+
+class IncrementalPreprocessor(BaseEstimator, TransformerMixin):
+    """
+    Scales num_features with a StandardScaler and mm_columns with a MinMaxScaler and passes the other
+    columns through, with the same output layout as the ColumnTransformer of DataTransformation.
+    Both scalers are fitted with partial_fit, so the data can be streamed in chunks.
+    """
+
+    def __init__(self, num_features: List[str], mm_columns: List[str]):
+        """
+        :param num_features: columns scaled with a StandardScaler
+        :param mm_columns: columns scaled with a MinMaxScaler
+        """
+        self.num_features = num_features
+        self.mm_columns = mm_columns
+
+    def partial_fit(self, X: DataFrame, y=None) -> "IncrementalPreprocessor":
+        """
+        Updates the scalers with one chunk of X.
+        """
+        try:
+            if not hasattr(self, "remainder_columns_"):
+                self.standard_scaler_ = StandardScaler()
+                self.min_max_scaler_ = MinMaxScaler()
+                scaled = set(self.num_features) | set(self.mm_columns)
+                self.remainder_columns_ = [column for column in X.columns if column not in scaled]
+            self.standard_scaler_.partial_fit(X[self.num_features])
+            self.min_max_scaler_.partial_fit(X[self.mm_columns])
+            return self
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def fit(self, X: DataFrame, y=None) -> "IncrementalPreprocessor":
+        for attribute in ("standard_scaler_", "min_max_scaler_", "remainder_columns_"):
+            self.__dict__.pop(attribute, None)
+        return self.partial_fit(X)
+
+    def transform(self, X: DataFrame) -> np.ndarray:
+        try:
+            return np.hstack([self.standard_scaler_.transform(X[self.num_features]),
+                              self.min_max_scaler_.transform(X[self.mm_columns]),
+                              X[self.remainder_columns_].to_numpy(dtype=np.float64)])
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
 class MyModel:
     def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
         """
@@ -31,8 +177,9 @@ class MyModel:
 
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
-        Function accepts preprocessed inputs (with all custom transformations already applied),
-        applies scaling using preprocessing_object, and performs prediction on transformed features.
+        Function accepts encoded inputs (with all custom transformations already applied) or, when the
+        preprocessing object starts with a FeatureEncoder, raw records; applies the encoding and scaling
+        using preprocessing_object, and performs prediction on transformed features.
         """
         try:
             logging.info("Starting prediction process.")
@@ -51,6 +198,12 @@ class MyModel:
             raise MyException(e, sys) from e
 
 
+    @property
+    def feature_encoder(self) -> Optional[FeatureEncoder]:
+        """FeatureEncoder saved as the first step of the preprocessing object (None for older models)."""
+        steps = getattr(self.preprocessing_object, "named_steps", {})
+        return steps.get("FeatureEncoder")
+
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
 
@@ -6,6 +6,7 @@ from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import MyException
 from src.entity.estimator import MyModel
 import sys
+from typing import Optional
 from pandas import DataFrame
 
 
@@ -23,6 +24,7 @@ class Proj1Estimator:
         self.s3 = SimpleStorageService()
         self.model_path = model_path
         self.loaded_model:MyModel=None
+        self.model_version:Optional[str]=None
 
 
     def is_model_present(self,model_path):
@@ -32,6 +34,20 @@ class Proj1Estimator:
             print(e)
             return False
 
+    def get_model_version(self) -> Optional[str]:
+        """
+        Identifies the model object in the bucket by its ETag and VersionId (HEAD request, no download)
+        :return: version string, None if there is no model at model_path
+        """
+        try:
+            version = self.s3.get_object_version(bucket_name=self.bucket_name, s3_key=self.model_path)
+            if version is None:
+                return None
+            self.model_version = f"{version['etag']}:{version['version_id'] or ''}"
+            return self.model_version
+        except Exception as e:
+            raise MyException(e, sys)
+
     def load_model(self,)->MyModel:
         """
         Load the model from the model_path
@@ -48,11 +64,11 @@ class Proj1Estimator:
         :return:
         """
         try:
-            self.s3.upload_file(from_file,
-                                to_filename=self.model_path,
-                                bucket_name=self.bucket_name,
-                                remove=remove
-                                )
+            self.s3.upload_model(from_file,
+                                 to_filename=self.model_path,
+                                 bucket_name=self.bucket_name,
+                                 remove=remove
+                                 )
         except Exception as e:
             raise MyException(e, sys)
 
@@ -0,0 +1,170 @@
+"""
+Live feature monitoring of served predictions for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+from src.entity.config_entity import FeatureMonitorConfig
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml_file
+from src.utils.sketch_utils import DatasetSketch, FrequencySketch, QuantileSketch, encode_categorical_sketches
+
+
+class FeatureMonitor:
+    """
+    Keeps constant-memory sketches of the features and predictions of served requests and compares them
+    with the sketch of the data the production model was trained on.
+
+    observe() only appends to a bounded deque (no lock, no conversion), so the cost on the request path
+    stays around a microsecond. A background thread drains the deque in batches and updates the sketches;
+    when requests arrive faster than it drains, the oldest pending observations are dropped and counted.
+    """
+
+    def __init__(self, monitor_config: FeatureMonitorConfig = FeatureMonitorConfig()) -> None:
+        """
+        :param monitor_config: Configuration for feature monitoring
+        """
+        try:
+            self.monitor_config = monitor_config
+            self._schema_config = read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self._pending = deque(maxlen=monitor_config.queue_size)
+            self.requests_observed = 0
+            self._processed = 0
+            self._lock = threading.Lock()
+            self._reference: Optional[DatasetSketch] = None
+            self._reference_loaded_at: Optional[float] = None
+            self._stop = threading.Event()
+            self.reset()
+            self._thread = threading.Thread(target=self._run, name="FeatureMonitor", daemon=True)
+            self._thread.start()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def _encoded_columns(self) -> list:
+        binary_columns = list(self._schema_config.get("binary_columns", {}))
+        dummy_columns = [dummy for dummies in self._schema_config.get("one_hot_columns", {}).values()
+                         for dummy in dummies]
+        return binary_columns + dummy_columns
+
+    def reset(self) -> None:
+        """
+        Starts new live sketches (e.g. after a new model is pushed).
+        """
+        with self._lock:
+            self.feature_sketch = DatasetSketch(k=self.monitor_config.sketch_k,
+                                                categorical_columns=self._encoded_columns())
+            self.prediction_sketch = FrequencySketch()
+
+    def observe(self, dataframe: DataFrame, predictions) -> None:
+        """
+        Records the features and predictions of a served request. Called on the request path.
+        """
+        self._pending.append((dataframe, predictions))
+        self.requests_observed += 1
+
+    def _drain(self) -> None:
+        batch = []
+        while len(batch) < self.monitor_config.batch_size:
+            try:
+                batch.append(self._pending.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+        features = pd.concat([dataframe for dataframe, _ in batch], ignore_index=True)
+        predictions = np.concatenate([np.ravel(np.asarray(prediction)) for _, prediction in batch])
+        with self._lock:
+            self.feature_sketch.update(features)
+            self.prediction_sketch.update(predictions.astype(np.int64))
+            self._processed += len(batch)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.monitor_config.flush_interval):
+            try:
+                while self._pending:
+                    self._drain()
+            except Exception as e:
+                logging.error(f"Feature monitor failed to update sketches: {e}")
+
+    def flush(self) -> None:
+        """
+        Drains the pending observations into the sketches right away.
+        """
+        while self._pending:
+            self._drain()
+
+    def get_reference_sketch(self) -> Optional[DatasetSketch]:
+        """
+        Loads (and caches for reference_ttl seconds) the sketch stored with the production model,
+        with categorical columns encoded the way the served features are.
+        """
+        now = time.monotonic()
+        if self._reference_loaded_at is not None and now - self._reference_loaded_at < self.monitor_config.reference_ttl:
+            return self._reference
+        try:
+            s3 = SimpleStorageService()
+            reference = None
+            if s3.s3_key_path_available(bucket_name=self.monitor_config.bucket_name,
+                                        s3_key=self.monitor_config.s3_sketch_key_path):
+                reference = encode_categorical_sketches(
+                    DatasetSketch.from_dict(s3.read_json(self.monitor_config.s3_sketch_key_path,
+                                                         bucket_name=self.monitor_config.bucket_name)),
+                    self._schema_config)
+        except Exception as e:
+            logging.error(f"Could not load the reference sketch: {e}")
+            reference = None
+        self._reference, self._reference_loaded_at = reference, now
+        return reference
+
+    def report(self) -> dict:
+        """
+        Compares the live sketches with the training-time reference (PSI and KS statistic per feature)
+        and the prediction rate with the training response rate.
+        """
+        try:
+            self.flush()
+            reference = self.get_reference_sketch()
+            with self._lock:
+                observed = self.requests_observed
+                processed = self._processed
+                prediction_count = self.prediction_sketch.count
+                prediction_rate = (self.prediction_sketch.counts.get("1", 0) / prediction_count
+                                   if prediction_count else None)
+                scores = reference.compare(self.feature_sketch, n_bins=self.monitor_config.n_bins) if reference else {}
+
+            for score in scores.values():
+                score["drift"] = (score["psi"] > self.monitor_config.psi_threshold
+                                  or score["ks"] > self.monitor_config.ks_threshold)
+
+            reference_response_rate = None
+            if reference is not None and TARGET_COLUMN in reference.columns:
+                target_sketch = reference.columns[TARGET_COLUMN]
+                reference_response_rate = (float(1 - target_sketch.cdf([0])[0])
+                                           if isinstance(target_sketch, QuantileSketch)
+                                           else float(target_sketch.frequencies(["1"])[0]))
+            return {
+                "requests_observed": observed,
+                "requests_sketched": processed,
+                "requests_dropped": max(observed - processed - len(self._pending), 0),
+                "reference_found": reference is not None,
+                "prediction_rate": prediction_rate,
+                "reference_response_rate": reference_response_rate,
+                "drifted_columns": [name for name, score in scores.items() if score["drift"]],
+                "columns": scores,
+            }
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
@@ -1,19 +1,31 @@
 """
 Handles training pipeline orchestration for the Vehicle Insurance Data Pipeline MLops project.
 """
+import os
+import shutil
 import sys
+import time
+from functools import partial
+from typing import Optional
+
+from src.constants import (ARTIFACT_DIR, PIPELINE_CHECKPOINT_FILE_NAME, PIPELINE_CONCURRENT, PIPELINE_MAX_WORKERS,
+                           PIPELINE_REPORT_FILE_NAME, PIPELINE_PROFILE_FILE_NAME, PIPELINE_PROFILE_BASELINE_FILE_PATH,
+                           PIPELINE_PROFILE_REGRESSION_THRESHOLD, PIPELINE_PREDICTION_CACHE_MAX_ENTRIES)
 from src.exception import MyException
 from src.logger import logging
 
 from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
+from src.components.data_drift import DataDrift
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
 
-from src.entity.config_entity import (DataIngestionConfig,
+from src.entity.config_entity import (training_pipeline_config,
+                                          DataIngestionConfig,
                                           DataValidationConfig,
+                                          DataDriftConfig,
                                           DataTransformationConfig,
                                           ModelTrainerConfig,
                                           ModelEvaluationConfig,
@@ -21,22 +33,96 @@ from src.entity.config_entity import (DataIngestionConfig,
                                           
 from src.entity.artifact_entity import (DataIngestionArtifact,
                                             DataValidationArtifact,
+                                            DataDriftArtifact,
                                             DataTransformationArtifact,
                                             ModelTrainerArtifact,
                                             ModelEvaluationArtifact,
-                                            ModelPusherArtifact)
+                                            ModelPusherArtifact,
+                                            StageProfileArtifact)
+from src.utils.checkpoint_utils import PipelineCheckpoint, rebase_paths
+from src.utils.dag_utils import DAGExecutor, Task, format_report
+from src.utils.main_utils import read_json_file, write_json_file
+from src.utils.metrics_utils import PredictionCache
+from src.utils.profiling_utils import StageProfiler, compare_profiles
+
+# Stages of the training pipeline and the stages whose artifacts (or decisions) they depend on
+STAGE_DEPENDENCIES = {
+    "data_ingestion": (),
+    "data_validation": ("data_ingestion",),
+    "data_drift": ("data_ingestion",),
+    "data_transformation": ("data_ingestion", "data_validation", "data_drift"),
+    "model_trainer": ("data_transformation",),
+    "model_evaluation": ("data_ingestion", "model_trainer"),
+    "model_pusher": ("data_ingestion", "model_evaluation"),
+}
+
+
+def upstream_stages(stage: str) -> set:
+    """Stages a stage depends on, directly or not."""
+    upstream = set()
+    for dependency in STAGE_DEPENDENCIES[stage]:
+        upstream |= {dependency, *upstream_stages(dependency)}
+    return upstream
 
 
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, artifact_dir: Optional[str] = None, resume: bool = False,
+                 concurrent: bool = PIPELINE_CONCURRENT,
+                 profile_baseline_file_path: Optional[str] = PIPELINE_PROFILE_BASELINE_FILE_PATH):
+        """
+        :param artifact_dir: run directory to write to (a new timestamped directory by default)
+        :param resume: reuse the checkpointed artifacts of completed stages of artifact_dir
+        :param concurrent: run independent stages concurrently (see run_pipeline_concurrent)
+        :param profile_baseline_file_path: run profile the stage profiles are compared with (None to skip)
+        """
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
+        self.data_drift_config = DataDriftConfig()
         self.data_transformation_config = DataTransformationConfig()
         self.model_trainer_config = ModelTrainerConfig()
         self.model_evaluation_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
 
+        self.artifact_dir = artifact_dir or training_pipeline_config.artifact_dir
+        if os.path.normpath(self.artifact_dir) != os.path.normpath(training_pipeline_config.artifact_dir):
+            for name, config in vars(self).copy().items():
+                if name.endswith("_config"):
+                    setattr(self, name, rebase_paths(config, training_pipeline_config.artifact_dir, self.artifact_dir))
+        self.checkpoint = PipelineCheckpoint(self.artifact_dir)
+        self.resume = resume
+        self.concurrent = concurrent
+        self._rerun_stages = set()
+        self.profile_baseline_file_path = profile_baseline_file_path
+        self.stage_profiles = {}
+        # Predictions shared by the trainer and evaluation stages of this run, cleared when the run ends
+        self.prediction_cache = PredictionCache(max_entries=PIPELINE_PREDICTION_CACHE_MAX_ENTRIES)
+
+    def run_stage(self, stage: str, artifact_class, start_stage, **kwargs):
+        """
+        Runs a stage, profiles it (attached to the artifact as stage_profile) and checkpoints its artifact.
+        When resuming, the checkpointed artifact is returned instead as long as it is valid and none of
+        the stages it depends on had to run again.
+        """
+        if self.resume and not self._rerun_stages & upstream_stages(stage):
+            artifact = self.checkpoint.load_stage(stage, artifact_class)
+            if artifact is not None:
+                logging.info(f"Resuming: reusing checkpointed artifact of [{stage}]")
+                return artifact
+            logging.info(f"Resuming from stage [{stage}]")
+        self._rerun_stages.add(stage)
+        try:
+            with StageProfiler(stage) as profiler:
+                artifact = start_stage(**kwargs)
+        except Exception:
+            self.checkpoint.set_status("failed", failed_stage=stage)
+            raise
+        artifact.stage_profile = StageProfileArtifact(**profiler.result)
+        self.stage_profiles[stage] = profiler.result
+        logging.info(f"Stage [{stage}] profile: {profiler.result}")
+        self.checkpoint.save_stage(stage, artifact,
+                                   downstream=[name for name in STAGE_DEPENDENCIES if stage in upstream_stages(name)])
+        return artifact
 
     
     def start_data_ingestion(self) -> DataIngestionArtifact:
@@ -74,6 +160,18 @@ class TrainPipeline:
         except Exception as e:
             raise MyException(e, sys) from e
         
+    def start_data_drift(self, data_ingestion_artifact: DataIngestionArtifact) -> DataDriftArtifact:
+        """
+        This method of TrainPipeline class is responsible for starting data drift component
+        """
+        try:
+            data_drift = DataDrift(data_ingestion_artifact=data_ingestion_artifact,
+                                   data_drift_config=self.data_drift_config)
+            data_drift_artifact = data_drift.initiate_data_drift()
+            return data_drift_artifact
+        except Exception as e:
+            raise MyException(e, sys)
+
     def start_data_transformation(self, data_ingestion_artifact: DataIngestionArtifact, data_validation_artifact: DataValidationArtifact) -> DataTransformationArtifact:
         """
         This method of TrainPipeline class is responsible for starting data transformation component
@@ -93,8 +191,8 @@ class TrainPipeline:
         """
         try:
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
-                                         model_trainer_config=self.model_trainer_config
-                                         )
+                                         model_trainer_config=self.model_trainer_config,
+                                         prediction_cache=self.prediction_cache)
             model_trainer_artifact = model_trainer.initiate_model_trainer()
             return model_trainer_artifact
 
@@ -102,26 +200,31 @@ class TrainPipeline:
             raise MyException(e, sys)
 
     def start_model_evaluation(self, data_ingestion_artifact: DataIngestionArtifact,
-                               model_trainer_artifact: ModelTrainerArtifact) -> ModelEvaluationArtifact:
+                               model_trainer_artifact: ModelTrainerArtifact,
+                               best_model=None, test_data=None) -> ModelEvaluationArtifact:
         """
         This method of TrainPipeline class is responsible for starting modle evaluation
         """
         try:
             model_evaluation = ModelEvaluation(model_eval_config=self.model_evaluation_config,
                                                data_ingestion_artifact=data_ingestion_artifact,
-                                               model_trainer_artifact=model_trainer_artifact)
+                                               model_trainer_artifact=model_trainer_artifact,
+                                               best_model=best_model, test_data=test_data,
+                                               prediction_cache=self.prediction_cache)
             model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
             return model_evaluation_artifact
         except Exception as e:
             raise MyException(e, sys)
 
-    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact) -> ModelPusherArtifact:
+    def start_model_pusher(self, model_evaluation_artifact: ModelEvaluationArtifact,
+                           data_ingestion_artifact: DataIngestionArtifact = None) -> ModelPusherArtifact:
         """
         This method of TrainPipeline class is responsible for starting model pushing
         """
         try:
             model_pusher = ModelPusher(model_evaluation_artifact=model_evaluation_artifact,
-                                       model_pusher_config=self.model_pusher_config
+                                       model_pusher_config=self.model_pusher_config,
+                                       data_ingestion_artifact=data_ingestion_artifact
                                        )
             model_pusher_artifact = model_pusher.initiate_model_pusher()
             return model_pusher_artifact
@@ -133,17 +236,191 @@ class TrainPipeline:
         This method of TrainPipeline class is responsible for running complete pipeline
         """
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
+            if self.concurrent:
+                return self.run_pipeline_concurrent()
+            return self.run_pipeline_sequential()
+        finally:
+            self.prediction_cache.clear()
+
+    def should_retrain(self, data_drift_artifact: DataDriftArtifact) -> bool:
+        if self.data_drift_config.skip_retraining and not data_drift_artifact.drift_status:
+            logging.info("No drift against the production model's training data, skipping retraining.")
+            return False
+        return True
+
+    def should_push(self, model_evaluation_artifact: ModelEvaluationArtifact) -> bool:
+        if not model_evaluation_artifact.is_model_accepted:
+            logging.info(f"Model not accepted.")
+            return False
+        return True
+
+    def run_pipeline_concurrent(self) -> None:
+        """
+        Runs the pipeline as a dependency graph: each task starts as soon as its inputs are ready.
+        Validation and drift scoring run side by side, and the production model download and the
+        encoding of the evaluation test set overlap data transformation and model training.
+        Task timings, overlap and the critical path are written to pipeline_report.json of the run.
+        """
+        def retrain(results: dict) -> bool:
+            return self.should_retrain(results["data_drift"])
+
+        ingestion = {"data_ingestion_artifact": "data_ingestion"}
+        # A chunked evaluation streams the test file itself, the whole test set is not prefetched
+        evaluation_inputs = {**ingestion, "model_trainer_artifact": "model_trainer", "best_model": "production_model"}
+        if self.model_evaluation_config.chunk_size <= 0:
+            evaluation_inputs["test_data"] = "evaluation_data"
+        tasks = [
+            Task("data_ingestion", partial(self.run_stage, "data_ingestion", DataIngestionArtifact,
+                                           self.start_data_ingestion)),
+            Task("data_validation", partial(self.run_stage, "data_validation", DataValidationArtifact,
+                                            self.start_data_validation), inputs=ingestion),
+            Task("data_drift", partial(self.run_stage, "data_drift", DataDriftArtifact, self.start_data_drift),
+                 inputs=ingestion),
+            Task("production_model", partial(ModelEvaluation.load_best_model, self.model_evaluation_config),
+                 inputs=ingestion, after=("data_drift",), condition=retrain),
+            Task("data_transformation", partial(self.run_stage, "data_transformation", DataTransformationArtifact,
+                                                self.start_data_transformation),
+                 inputs={**ingestion, "data_validation_artifact": "data_validation"},
+                 after=("data_drift",), condition=retrain),
+            Task("model_trainer", partial(self.run_stage, "model_trainer", ModelTrainerArtifact,
+                                          self.start_model_trainer),
+                 inputs={"data_transformation_artifact": "data_transformation"}),
+            Task("model_evaluation", partial(self.run_stage, "model_evaluation", ModelEvaluationArtifact,
+                                             self.start_model_evaluation),
+                 inputs=evaluation_inputs),
+            Task("model_pusher", partial(self.run_stage, "model_pusher", ModelPusherArtifact,
+                                         self.start_model_pusher),
+                 inputs={**ingestion, "model_evaluation_artifact": "model_evaluation"},
+                 condition=lambda results: self.should_push(results["model_evaluation"])),
+        ]
+        if "test_data" in evaluation_inputs:
+            tasks.append(Task("evaluation_data", ModelEvaluation.load_test_data, inputs=ingestion,
+                              after=("data_drift",), condition=retrain))
+        executor = DAGExecutor(tasks, max_workers=PIPELINE_MAX_WORKERS)
+        try:
+            self.checkpoint.set_status("running", failed_stage=None)
+            executor.run()
+            self.checkpoint.set_status("completed")
+        except Exception as e:
+            # run_stage only records failures of stages, not of the other tasks (e.g. the production model download)
+            self.checkpoint.set_status("failed", failed_stage=executor.failed_task)
+            raise MyException(e, sys)
+        finally:
+            report = executor.report()
+            write_json_file(os.path.join(self.artifact_dir, PIPELINE_REPORT_FILE_NAME), report)
+            logging.info(f"Pipeline run report:\n{format_report(report)}")
+            self.write_run_profile(wall_seconds=executor.wall_seconds)
+
+    def run_pipeline_sequential(self) -> None:
+        """
+        Runs the stages one after another.
+        """
+        start = time.perf_counter()
+        try:
+            self._run_stages_sequentially()
+        finally:
+            self.write_run_profile(wall_seconds=time.perf_counter() - start)
+
+    def _run_stages_sequentially(self) -> None:
+        try:
+            self.checkpoint.set_status("running", failed_stage=None)
+            data_ingestion_artifact = self.run_stage("data_ingestion", DataIngestionArtifact,
+                                                     self.start_data_ingestion)
+            data_validation_artifact = self.run_stage("data_validation", DataValidationArtifact,
+                                                      self.start_data_validation,
+                                                      data_ingestion_artifact=data_ingestion_artifact)
+            data_drift_artifact = self.run_stage("data_drift", DataDriftArtifact, self.start_data_drift,
+                                                 data_ingestion_artifact=data_ingestion_artifact)
+            if not self.should_retrain(data_drift_artifact):
+                self.checkpoint.set_status("completed")
+                return None
+            data_transformation_artifact = self.run_stage(
+                "data_transformation", DataTransformationArtifact, self.start_data_transformation,
                 data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
-            if not model_evaluation_artifact.is_model_accepted:
-                logging.info(f"Model not accepted.")
+            model_trainer_artifact = self.run_stage("model_trainer", ModelTrainerArtifact, self.start_model_trainer,
+                                                    data_transformation_artifact=data_transformation_artifact)
+            model_evaluation_artifact = self.run_stage("model_evaluation", ModelEvaluationArtifact,
+                                                       self.start_model_evaluation,
+                                                       data_ingestion_artifact=data_ingestion_artifact,
+                                                       model_trainer_artifact=model_trainer_artifact)
+            if not self.should_push(model_evaluation_artifact):
+                self.checkpoint.set_status("completed")
                 return None
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+            model_pusher_artifact = self.run_stage("model_pusher", ModelPusherArtifact, self.start_model_pusher,
+                                                   model_evaluation_artifact=model_evaluation_artifact,
+                                                   data_ingestion_artifact=data_ingestion_artifact)
+            self.checkpoint.set_status("completed")
             
         except Exception as e:
-            raise MyException(e, sys)
\ No newline at end of file
+            raise MyException(e, sys)
+
+
+    def write_run_profile(self, wall_seconds: Optional[float] = None) -> Optional[dict]:
+        """
+        Writes the profiles of the stages run in this run to run_profile.json and warns about
+        regressions against the baseline profile when one is stored.
+        """
+        try:
+            run_profile = {
+                "run_dir": self.artifact_dir,
+                "concurrent": self.concurrent,
+                "wall_seconds": wall_seconds,
+                "stages": self.stage_profiles,
+                "regressions": [],
+            }
+            if self.profile_baseline_file_path and os.path.exists(self.profile_baseline_file_path):
+                baseline = read_json_file(self.profile_baseline_file_path)
+                run_profile["baseline_file_path"] = self.profile_baseline_file_path
+                run_profile["regressions"] = compare_profiles(self.stage_profiles, baseline.get("stages", {}),
+                                                              threshold=PIPELINE_PROFILE_REGRESSION_THRESHOLD)
+                for regression in run_profile["regressions"]:
+                    logging.warning(f"Profile regression in [{regression['stage']}]: {regression['metric']} "
+                                    f"{regression['value']} vs baseline {regression['baseline']}")
+            write_json_file(os.path.join(self.artifact_dir, PIPELINE_PROFILE_FILE_NAME), run_profile)
+            return run_profile
+        except Exception as e:
+            logging.error(f"Could not write the run profile: {e}")
+            return None
+
+
+def save_profile_baseline(artifact_dir: Optional[str] = None,
+                          baseline_file_path: str = PIPELINE_PROFILE_BASELINE_FILE_PATH) -> str:
+    """
+    Stores the run profile of a run (the latest checkpointed run by default) as the baseline later runs
+    are compared with.
+    """
+    try:
+        artifact_dir = artifact_dir or latest_run_dir()
+        if artifact_dir is None:
+            raise Exception(f"No run found under {ARTIFACT_DIR}")
+        os.makedirs(os.path.dirname(baseline_file_path) or ".", exist_ok=True)
+        shutil.copyfile(os.path.join(artifact_dir, PIPELINE_PROFILE_FILE_NAME), baseline_file_path)
+        logging.info(f"Stored the run profile of [{artifact_dir}] as baseline [{baseline_file_path}]")
+        return baseline_file_path
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def latest_run_dir(artifact_root: str = ARTIFACT_DIR) -> Optional[str]:
+    """
+    Returns the most recently checkpointed run directory under artifact_root, None when there is none.
+    """
+    manifests = [os.path.join(artifact_root, name, PIPELINE_CHECKPOINT_FILE_NAME)
+                 for name in os.listdir(artifact_root)] if os.path.isdir(artifact_root) else []
+    manifests = [path for path in manifests if os.path.isfile(path)]
+    return os.path.dirname(max(manifests, key=os.path.getmtime)) if manifests else None
+
+
+def resume_pipeline(artifact_dir: Optional[str] = None) -> None:
+    """
+    Resumes a training run (the latest checkpointed run by default): completed stages whose files are
+    unchanged are reloaded from the checkpoint manifest, the pipeline continues from the first other stage.
+    """
+    try:
+        artifact_dir = artifact_dir or latest_run_dir()
+        if artifact_dir is None:
+            raise Exception(f"No checkpointed run found under {ARTIFACT_DIR}")
+        logging.info(f"Resuming training run [{artifact_dir}]")
+        TrainPipeline(artifact_dir=artifact_dir, resume=True).run_pipeline()
+    except Exception as e:
+        raise MyException(e, sys) from e
\ No newline at end of file
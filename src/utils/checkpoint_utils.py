@@ -0,0 +1,145 @@
+"""
+Stage checkpoints of training pipeline runs for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import dataclasses
+import os
+import sys
+import threading
+import typing
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from src.constants import PIPELINE_CHECKPOINT_FILE_NAME
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import hash_file, read_json_file, write_json_file
+
+
+def dataclass_from_dict(cls, data: Any):
+    """
+    Rebuilds a (possibly nested) dataclass from the output of dataclasses.asdict, following the
+    type hints of its fields (nested dataclasses, Optional[...] and List[...] of dataclasses).
+    """
+    if data is None:
+        return None
+    origin = typing.get_origin(cls)
+    if origin is typing.Union:
+        types = [arg for arg in typing.get_args(cls) if arg is not type(None)]
+        return dataclass_from_dict(types[0], data) if len(types) == 1 else data
+    if origin in (list, typing.List):
+        (item_type,) = typing.get_args(cls) or (Any,)
+        return [dataclass_from_dict(item_type, item) for item in data]
+    if dataclasses.is_dataclass(cls):
+        hints = typing.get_type_hints(cls)
+        return cls(**{field.name: dataclass_from_dict(hints[field.name], data[field.name])
+                      for field in dataclasses.fields(cls) if field.name in data})
+    return data
+
+
+def artifact_file_paths(artifact) -> list:
+    """
+    Returns the existing files referenced by the string fields of an artifact (nested artifacts included).
+    """
+    paths = []
+    for value in dataclasses.asdict(artifact).values() if dataclasses.is_dataclass(artifact) else []:
+        values = value.values() if isinstance(value, dict) else [value]
+        paths.extend(item for item in values if isinstance(item, str) and os.path.isfile(item))
+    return sorted(set(paths))
+
+
+def rebase_paths(config, old_root: str, new_root: str):
+    """
+    Returns a copy of a config dataclass whose path fields under old_root point under new_root instead.
+    """
+    old_root = os.path.normpath(old_root)
+    changes = {}
+    for field in dataclasses.fields(config):
+        value = getattr(config, field.name)
+        if isinstance(value, str) and (value == old_root or value.startswith(old_root + os.sep)):
+            changes[field.name] = os.path.join(new_root, os.path.relpath(value, old_root))
+    return dataclasses.replace(config, **changes)
+
+
+class PipelineCheckpoint:
+    """
+    Checkpoint manifest of a pipeline run (checkpoint.json in the run directory).
+
+    Each completed stage records its artifact dataclass and the SHA-256 of every file the artifact
+    references, in completion order. Re-recording a stage drops the stages computed from its previous
+    output: the given downstream stages, or every stage recorded after it.
+    """
+
+    def __init__(self, artifact_dir: str, file_name: str = PIPELINE_CHECKPOINT_FILE_NAME) -> None:
+        """
+        :param artifact_dir: run directory the manifest is kept in
+        :param file_name: name of the manifest file
+        """
+        self.artifact_dir = artifact_dir
+        self.manifest_file_path = os.path.join(artifact_dir, file_name)
+        self.manifest = self._read_manifest()
+        self._lock = threading.Lock()  # stages may complete concurrently
+
+    def _read_manifest(self) -> dict:
+        if os.path.exists(self.manifest_file_path):
+            return read_json_file(self.manifest_file_path)
+        return {"status": "running", "stages": {}}
+
+    def _write_manifest(self) -> None:
+        write_json_file(self.manifest_file_path, self.manifest)
+
+    @property
+    def completed_stages(self) -> list:
+        return list(self.manifest["stages"])
+
+    def save_stage(self, stage: str, artifact, downstream: Optional[Iterable[str]] = None) -> None:
+        """
+        Records a completed stage with its artifact and the checksums of the artifact files.
+        downstream lists the stages that depend on it (default: the stages recorded after it).
+        """
+        try:
+            record = {
+                "artifact_type": type(artifact).__name__,
+                "artifact": dataclasses.asdict(artifact),
+                "files": {path: {"size": os.path.getsize(path), "sha256": hash_file(path)}
+                          for path in artifact_file_paths(artifact)},
+                "completed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            with self._lock:
+                stages = self.manifest["stages"]
+                if stage in stages:
+                    dropped = (set(self.completed_stages[self.completed_stages.index(stage):])
+                               if downstream is None else {stage, *downstream})
+                    self.manifest["stages"] = stages = {name: record for name, record in stages.items()
+                                                        if name not in dropped}
+                stages[stage] = record
+                self._write_manifest()
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def load_stage(self, stage: str, artifact_class) -> Optional[Any]:
+        """
+        Returns the recorded artifact of a stage, or None when the stage is not recorded or one of its
+        files is missing or no longer matches its checksum.
+        """
+        try:
+            record = self.manifest["stages"].get(stage)
+            if record is None:
+                return None
+            for path, checksum in record["files"].items():
+                if not os.path.isfile(path):
+                    logging.info(f"Checkpoint of [{stage}] is stale: {path} is missing")
+                    return None
+                if os.path.getsize(path) != checksum["size"] or hash_file(path) != checksum["sha256"]:
+                    logging.info(f"Checkpoint of [{stage}] is stale: {path} changed")
+                    return None
+            return dataclass_from_dict(artifact_class, record["artifact"])
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def set_status(self, status: str, **details) -> None:
+        """
+        Records the status of the run (running, completed, failed) with optional details.
+        """
+        with self._lock:
+            self.manifest.update(status=status, **details)
+            self._write_manifest()
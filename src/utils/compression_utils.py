@@ -0,0 +1,120 @@
+"""
+Streaming compression of model artifacts for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import gzip
+import hashlib
+import sys
+from typing import BinaryIO, List
+
+from src.exception import MyException
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional, falls back to the next codec
+    zstandard = None
+try:
+    import lz4.frame as lz4_frame  # type: ignore
+except ImportError:  # optional, falls back to the next codec
+    lz4_frame = None
+
+# Fastest first: "auto" picks the first installed codec
+CODEC_PREFERENCE = ("zstd", "lz4", "gzip")
+CODECS = CODEC_PREFERENCE + ("none",)
+BLOCK_SIZE = 1 << 20
+
+
+def available_codecs() -> List[str]:
+    """
+    Returns the installed codecs, fastest first ("gzip" and "none" are always available).
+    """
+    installed = {"zstd": zstandard is not None, "lz4": lz4_frame is not None, "gzip": True, "none": True}
+    return [codec for codec in CODECS if installed[codec]]
+
+
+def resolve_codec(codec: str = "auto") -> str:
+    """
+    Returns the codec to use: codec itself, or the fastest installed one for "auto".
+    """
+    try:
+        if codec == "auto":
+            return available_codecs()[0]
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}', expected one of {CODECS} or 'auto'")
+        if codec not in available_codecs():
+            raise ImportError(f"Codec '{codec}' is not installed (pip install "
+                              f"{'zstandard' if codec == 'zstd' else codec})")
+        return codec
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def open_compressed_writer(file_obj: BinaryIO, codec: str) -> BinaryIO:
+    """
+    Wraps a binary file opened for writing: bytes written to the result are compressed into file_obj.
+    Closing the result finishes the compressed stream but leaves file_obj open.
+    """
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=3).stream_writer(file_obj, closefd=False)
+    if codec == "lz4":
+        return lz4_frame.LZ4FrameFile(file_obj, mode="wb")
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=file_obj, mode="wb", compresslevel=1)
+    return _Uncompressed(file_obj)
+
+
+def open_decompressed_reader(file_obj: BinaryIO, codec: str) -> BinaryIO:
+    """
+    Wraps a binary file opened for reading: reading the result decompresses file_obj as it is consumed.
+    """
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().stream_reader(file_obj, closefd=False)
+    if codec == "lz4":
+        return lz4_frame.LZ4FrameFile(file_obj, mode="rb")
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=file_obj, mode="rb")
+    return _Uncompressed(file_obj)
+
+
+class _Uncompressed:
+    # Pass-through for codec "none" that, like the codec wrappers, does not close the wrapped file
+    def __init__(self, file_obj: BinaryIO) -> None:
+        self._file_obj = file_obj
+        self.read = file_obj.read
+        self.readline = file_obj.readline
+        self.write = file_obj.write
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def compress_file(source_path: str, target_path: str, codec: str = "auto") -> dict:
+    """
+    Compresses source_path into target_path block by block (the file is never fully in memory)
+    and checksums the compressed bytes, which are what gets stored.
+
+    Output      :   Returns {"codec", "size", "compressed_size", "sha256"}
+    """
+    try:
+        codec = resolve_codec(codec)
+        size = 0
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            with open_compressed_writer(target, codec) as writer:
+                for block in iter(lambda: source.read(BLOCK_SIZE), b""):
+                    writer.write(block)
+                    size += len(block)
+        checksum = hashlib.sha256()
+        compressed_size = 0
+        with open(target_path, "rb") as target:
+            for block in iter(lambda: target.read(BLOCK_SIZE), b""):
+                checksum.update(block)
+                compressed_size += len(block)
+        return {"codec": codec, "size": size, "compressed_size": compressed_size, "sha256": checksum.hexdigest()}
+    except Exception as e:
+        raise MyException(e, sys) from e
+
@@ -0,0 +1,226 @@
+"""
+Dependency-graph task execution for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.exception import MyException
+from src.logger import logging
+
+EXECUTORS = ("thread", "process")
+
+
+@dataclass
+class Task:
+    """
+    A node of the graph. func is called with the results of other tasks as keyword arguments
+    (inputs maps argument name -> task name); after lists tasks that must finish first without passing
+    their result. condition, when given, is called with the results of all finished tasks just before
+    the task would start; False skips the task and every task depending on it.
+    """
+    name: str
+    func: Callable
+    inputs: Dict[str, str] = field(default_factory=dict)
+    after: Tuple[str, ...] = ()
+    condition: Optional[Callable[[dict], bool]] = None
+
+    @property
+    def dependencies(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys((*self.inputs.values(), *self.after)))
+
+
+def _timed_call(func: Callable, kwargs: dict) -> Tuple[object, float, float]:
+    start = time.time()
+    result = func(**kwargs)
+    return result, start, time.time()
+
+
+class DAGExecutor:
+    """
+    Runs tasks on a thread or process pool, each as soon as the tasks it depends on have finished.
+
+    Threads suit pipeline stages (pandas, numpy, sklearn and network I/O release the GIL, and stage
+    objects need not be picklable); with processes, functions, arguments and results must be picklable.
+    The first failing task stops the scheduling of new tasks, waits for running ones and re-raises.
+    """
+
+    def __init__(self, tasks: List[Task], max_workers: int = 4, executor: str = "thread") -> None:
+        """
+        :param tasks: tasks of the graph, names must be unique
+        :param max_workers: tasks run at the same time
+        :param executor: "thread" or "process"
+        """
+        try:
+            if executor not in EXECUTORS:
+                raise ValueError(f"Unknown executor '{executor}', expected one of {EXECUTORS}")
+            self.tasks = {task.name: task for task in tasks}
+            if len(self.tasks) != len(tasks):
+                raise ValueError("Task names must be unique")
+            for task in tasks:
+                missing = set(task.dependencies) - set(self.tasks)
+                if missing:
+                    raise ValueError(f"Task [{task.name}] depends on unknown tasks {sorted(missing)}")
+            self.order = self._topological_order()
+        except Exception as e:
+            raise MyException(e, sys) from e
+        self.max_workers = max_workers
+        self.executor = executor
+        self.results: Dict[str, object] = {}
+        self.status: Dict[str, str] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self.wall_seconds: Optional[float] = None
+        self.failed_task: Optional[str] = None
+
+    def _topological_order(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in the task graph at [{name}]")
+            state[name] = "visiting"
+            for dependency in self.tasks[name].dependencies:
+                visit(dependency)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.tasks:
+            visit(name)
+        return order
+
+    def _ready(self) -> List[str]:
+        return [name for name in self.order if name not in self.status
+                and all(self.status.get(dependency) in ("done", "skipped")
+                        for dependency in self.tasks[name].dependencies)]
+
+    def run(self) -> Dict[str, object]:
+        """
+        Runs the graph and returns the result of every task that ran (skipped tasks are absent).
+        On failure, failed_task names the task whose error is re-raised.
+        """
+        pool_class = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+        start = time.time()
+        running = {}
+        error = None
+        with pool_class(max_workers=self.max_workers) as pool:
+            while True:
+                for name in self._ready() if error is None else []:
+                    task = self.tasks[name]
+                    if any(self.status[dependency] == "skipped" for dependency in task.dependencies) or \
+                            (task.condition is not None and not task.condition(self.results)):
+                        self.status[name] = "skipped"
+                        logging.info(f"Task [{name}] skipped")
+                        continue
+                    kwargs = {argument: self.results[source] for argument, source in task.inputs.items()}
+                    running[pool.submit(_timed_call, task.func, kwargs)] = name
+                    self.status[name] = "running"
+                if not running:
+                    if error is None and self._ready():
+                        continue  # skipped tasks unblocked others
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        result, task_start, task_end = future.result()
+                    except Exception as e:
+                        self.status[name] = "failed"
+                        logging.error(f"Task [{name}] failed: {e}")
+                        if error is None:
+                            error, self.failed_task = e, name
+                        continue
+                    self.results[name] = result
+                    self.status[name] = "done"
+                    self.timings[name] = (task_start - start, task_end - start)
+                    logging.info(f"Task [{name}] done in {task_end - task_start:.2f}s")
+        self.wall_seconds = time.time() - start
+        if error is not None:
+            raise error
+        return self.results
+
+    def critical_path(self) -> Tuple[List[str], float]:
+        """
+        Returns the chain of dependent tasks with the largest total runtime and that runtime:
+        the wall-clock time the graph needs however many workers are available.
+        """
+        length, previous = {}, {}
+        for name in self.order:
+            if name not in self.timings:
+                continue
+            task_start, task_end = self.timings[name]
+            candidates = [dependency for dependency in self.tasks[name].dependencies if dependency in length]
+            before = max(candidates, key=length.get, default=None)
+            length[name] = (task_end - task_start) + (length[before] if before else 0.0)
+            previous[name] = before
+        if not length:
+            return [], 0.0
+        name = max(length, key=length.get)
+        total, path = length[name], []
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return path[::-1], total
+
+    def _overlap_seconds(self, name: str) -> float:
+        task_start, task_end = self.timings[name]
+        intervals = sorted((max(start, task_start), min(end, task_end)) for other, (start, end) in self.timings.items()
+                           if other != name and start < task_end and end > task_start)
+        overlap, covered_until = 0.0, task_start
+        for start, end in intervals:
+            start = max(start, covered_until)
+            if end > start:
+                overlap += end - start
+                covered_until = end
+        return overlap
+
+    def report(self) -> dict:
+        """
+        Summarizes the last run: per task start, end, runtime and how much of it overlapped other tasks;
+        the critical path; and the wall-clock time against running the tasks one after another.
+        """
+        sequential_seconds = sum(end - start for start, end in self.timings.values())
+        path, path_seconds = self.critical_path()
+        tasks = {}
+        for name in self.order:
+            entry = {"status": self.status.get(name, "not run")}
+            if name in self.timings:
+                start, end = self.timings[name]
+                overlap = self._overlap_seconds(name)
+                entry.update(start=start, end=end, seconds=end - start, overlap_seconds=overlap,
+                             overlap_fraction=overlap / (end - start) if end > start else 0.0,
+                             critical=name in path)
+            tasks[name] = entry
+        return {
+            "executor": self.executor,
+            "max_workers": self.max_workers,
+            "wall_seconds": self.wall_seconds,
+            "sequential_seconds": sequential_seconds,
+            "speedup": sequential_seconds / self.wall_seconds if self.wall_seconds else None,
+            "critical_path": path,
+            "critical_path_seconds": path_seconds,
+            "tasks": tasks,
+        }
+
+
+def format_report(report: dict) -> str:
+    """
+    Renders a DAGExecutor report as a table.
+    """
+    lines = ["=" * 78,
+             f"{'task':>24} | {'status':>8} | {'start s':>8} | {'seconds':>8} | {'overlap':>7} | critical",
+             "=" * 78]
+    for name, task in report["tasks"].items():
+        if "seconds" in task:
+            lines.append(f"{name:>24} | {task['status']:>8} | {task['start']:>8.2f} | {task['seconds']:>8.2f} | "
+                         f"{task['overlap_fraction']:>6.0%} | {'*' if task['critical'] else ''}")
+        else:
+            lines.append(f"{name:>24} | {task['status']:>8} |")
+    lines.append("-" * 78)
+    lines.append(f"wall clock {report['wall_seconds']:.2f}s, sequential {report['sequential_seconds']:.2f}s "
+                 f"(x{report['speedup'] or 0:.2f}), critical path {report['critical_path_seconds']:.2f}s: "
+                 f"{' -> '.join(report['critical_path'])}")
+    return "\n".join(lines)
@@ -1,5 +1,9 @@
 import os
 import sys
+import json
+import hashlib
+import inspect
+import shutil
 
 import numpy as np
 import dill #type: ignore
@@ -39,6 +43,115 @@ def write_yaml_file(file_path: str, content: object, replace: bool = False) -> N
         raise MyException(e, sys) from e
 
 
+def read_json_file(file_path: str) -> dict:
+    try:
+        with open(file_path, "r") as json_file:
+            return json.load(json_file)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+def write_json_file(file_path: str, content: object) -> None:
+    """
+    Writes content as JSON. The file is written under a temporary name and renamed,
+    so readers never see a partially written file.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_file_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(tmp_file_path, "w") as file:
+            json.dump(content, file, indent=4, default=str)
+        os.replace(tmp_file_path, file_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+class HashingWriter:
+    """
+    Text file wrapper that computes the SHA-256 of the bytes while they are written,
+    so the fingerprint of a file is known without reading it back.
+    file_path: str location of file to write
+    """
+    def __init__(self, file_path: str, encoding: str = "utf-8"):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self._file = open(file_path, "wb")
+        self._hash = hashlib.sha256()
+        self.encoding = encoding
+
+    def write(self, text: str) -> int:
+        data = text.encode(self.encoding)
+        self._hash.update(data)
+        self._file.write(data)
+        return len(text)
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "HashingWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    Returns the SHA-256 of a file, read in blocks.
+    file_path: str location of file to hash
+    """
+    try:
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def link_or_copy(source_path: str, target_path: str) -> None:
+    """
+    Makes target_path a hard link to source_path (no data copied), or a copy when hard links are not
+    possible (e.g. different file systems). An existing target is replaced.
+    """
+    try:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if os.path.lexists(target_path):
+            os.remove(target_path)
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copy2(source_path, target_path)
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def compute_fingerprint(*parts: object) -> str:
+    """
+    Returns a SHA-256 fingerprint of the string representation of the given parts (cache keys).
+    """
+    fingerprint = hashlib.sha256()
+    for part in parts:
+        fingerprint.update(repr(part).encode("utf-8"))
+        fingerprint.update(b"\0")
+    return fingerprint.hexdigest()
+
+
+def hash_source(*objects: object) -> str:
+    """
+    Returns a SHA-256 fingerprint of the source files defining the given modules/classes/functions (cache key
+    salt), so cached outputs are not reused once the code that produced them changes. Only the file contents are
+    hashed, keys do not depend on where the project is checked out.
+    """
+    try:
+        source_files = {os.path.abspath(inspect.getsourcefile(obj)) for obj in objects}
+        return compute_fingerprint(*sorted(hash_file(source_file) for source_file in source_files))
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
 def load_object(file_path: str) -> object:
     """
     Returns model/object from project directory.
@@ -67,13 +180,16 @@ def save_numpy_array_data(file_path: str, array: np.array):
         raise MyException(e, sys) from e
 
 
-def load_numpy_array_data(file_path: str) -> np.array:
+def load_numpy_array_data(file_path: str, mmap_mode: str = None) -> np.array:
     """
     load numpy array data from file
     file_path: str location of file to load
+    mmap_mode: str open the file as a memory map (e.g. "r") instead of reading it into memory
     return: np.array data loaded
     """
     try:
+        if mmap_mode is not None:
+            return np.load(file_path, mmap_mode=mmap_mode)
         with open(file_path, 'rb') as file_obj:
             return np.load(file_obj)
     except Exception as e:
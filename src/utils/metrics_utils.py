@@ -0,0 +1,128 @@
+"""
+Classification metrics and prediction reuse for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+import numpy as np
+
+from src.constants import PIPELINE_PREDICTION_CACHE_MAX_ENTRIES
+from src.exception import MyException
+from src.logger import logging
+
+
+def confusion_counts(y_true, y_pred, pos_label=1) -> dict:
+    """
+    Counts true/false positives/negatives of binary predictions in one pass over the labels.
+
+    Output      :   Returns {"tp", "fp", "fn", "tn"}
+    """
+    try:
+        actual = np.asarray(y_true) == pos_label
+        predicted = np.asarray(y_pred) == pos_label
+        if actual.shape != predicted.shape:
+            raise ValueError(f"Labels and predictions differ in shape: {actual.shape} != {predicted.shape}")
+        # Cell index 2 * actual + predicted: 0 = tn, 1 = fp, 2 = fn, 3 = tp
+        tn, fp, fn, tp = np.bincount(2 * actual.ravel().astype(np.intp) + predicted.ravel(), minlength=4)
+        return {"tp": int(tp), "fp": int(fp), "fn": int(fn), "tn": int(tn)}
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def metrics_from_counts(tp: int, fp: int, fn: int, tn: int) -> dict:
+    """
+    Accuracy, precision, recall and F1 of the positive class from confusion counts
+    (0.0 when undefined, like sklearn's zero_division default).
+    """
+    total = tp + fp + fn + tn
+    return {
+        "accuracy_score": (tp + tn) / total if total else 0.0,
+        "precision_score": tp / (tp + fp) if tp + fp else 0.0,
+        "recall_score": tp / (tp + fn) if tp + fn else 0.0,
+        "f1_score": 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0,
+    }
+
+
+def classification_metrics(y_true, y_pred, pos_label=1) -> dict:
+    """
+    Computes every binary classification metric from a single confusion-matrix pass
+    instead of one pass per sklearn metric function.
+
+    Output      :   Returns the metrics of metrics_from_counts and the confusion counts
+    """
+    counts = confusion_counts(y_true, y_pred, pos_label=pos_label)
+    return {**metrics_from_counts(**counts), **counts}
+
+
+class PredictionCache:
+    """
+    Keeps the predictions of a model on a dataset for the duration of a run, so that stages scoring
+    the same (model, dataset) pair predict it once. Keys are chosen by the caller (e.g. the model file
+    path or S3 version and the dataset file path or hash); predictions are stored as small label arrays.
+
+    The cache belongs to one run (TrainPipeline creates it, passes it to its stages and clears it when the
+    run ends) and holds at most max_entries predictions, the least recently used are dropped first.
+    """
+
+    def __init__(self, max_entries: int = PIPELINE_PREDICTION_CACHE_MAX_ENTRIES) -> None:
+        """
+        :param max_entries: number of (model, dataset) predictions kept
+        """
+        self.max_entries = max_entries
+        self._predictions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._predictions)
+
+    def predict(self, model, X, model_key: Hashable, dataset_key: Hashable) -> np.ndarray:
+        """
+        Returns the predictions of model on X, computing them on the first call for (model_key, dataset_key).
+        """
+        predictions = self.get(model_key, dataset_key)
+        if predictions is not None:
+            self.hits += 1
+            return predictions
+        self.misses += 1
+        predictions = np.asarray(model.predict(X))
+        self.put(model_key, dataset_key, predictions)
+        logging.info(f"Cached {len(predictions)} predictions of [{model_key}] on [{dataset_key}]")
+        return predictions
+
+    def get(self, model_key: Hashable, dataset_key: Hashable) -> Optional[np.ndarray]:
+        key = (model_key, dataset_key)
+        with self._lock:
+            if key not in self._predictions:
+                return None
+            self._predictions.move_to_end(key)
+            return self._predictions[key]
+
+    def put(self, model_key: Hashable, dataset_key: Hashable, predictions) -> None:
+        key = (model_key, dataset_key)
+        with self._lock:
+            self._predictions[key] = np.asarray(predictions)
+            self._predictions.move_to_end(key)
+            while len(self._predictions) > self.max_entries:
+                evicted_key, _ = self._predictions.popitem(last=False)
+                logging.info(f"Dropped the least recently used predictions of [{evicted_key[0]}] on [{evicted_key[1]}]")
+
+    def invalidate(self, model_key: Optional[Hashable] = None) -> None:
+        """
+        Drops the predictions of a model (all predictions when model_key is None).
+        """
+        with self._lock:
+            if model_key is None:
+                self._predictions.clear()
+            else:
+                for key in [key for key in self._predictions if key[0] == model_key]:
+                    del self._predictions[key]
+
+    def clear(self) -> None:
+        """
+        Drops every prediction, at the end of a run.
+        """
+        self.invalidate()
@@ -0,0 +1,282 @@
+"""
+Model backends, hyperparameter search and cost measurements for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import dill  # type: ignore
+import numpy as np
+from imblearn.pipeline import Pipeline as ResamplingPipeline  # type: ignore
+from joblib import Parallel, delayed
+from scipy.stats import loguniform, randint, uniform
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  # type: ignore
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV, StratifiedKFold
+
+from src.constants import (MIN_SAMPLES_SPLIT_CRITERION, MIN_SAMPLES_SPLIT_MAX_DEPTH, MIN_SAMPLES_SPLIT_RANDOM_STATE,
+                           MODEL_TRAINER_BACKEND, MODEL_TRAINER_MIN_SAMPLES_LEAF, MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+                           MODEL_TRAINER_N_ESTIMATORS, MODEL_TRAINER_N_JOBS)
+from src.exception import MyException
+from src.logger import logging
+from src.utils.main_utils import read_yaml_file
+from src.utils.metrics_utils import classification_metrics
+
+# Backend name -> (estimator class, default hyperparameters)
+MODEL_BACKENDS = {
+    "hist_gradient_boosting": (HistGradientBoostingClassifier, {
+        "learning_rate": 0.1,
+        "max_iter": 200,
+        "max_leaf_nodes": 31,
+        "min_samples_leaf": 20,
+    }),
+    "random_forest": (RandomForestClassifier, {
+        "n_estimators": MODEL_TRAINER_N_ESTIMATORS,
+        "min_samples_split": MODEL_TRAINER_MIN_SAMPLES_SPLIT,
+        "min_samples_leaf": MODEL_TRAINER_MIN_SAMPLES_LEAF,
+        "max_depth": MIN_SAMPLES_SPLIT_MAX_DEPTH,
+        "criterion": MIN_SAMPLES_SPLIT_CRITERION,
+        "n_jobs": MODEL_TRAINER_N_JOBS,
+        "oob_score": True,  # out-of-bag accuracy replaces re-predicting the training set
+    }),
+    "logistic_regression": (LogisticRegression, {
+        "C": 1.0,
+        "max_iter": 1000,
+    }),
+}
+
+SEARCH_METHODS = ("halving", "random")
+SEARCH_DEFAULTS = {
+    "enabled": False,
+    "method": "halving",
+    "n_candidates": 24,
+    "factor": 3,
+    "cv": 3,
+    "scoring": "f1",
+    "n_jobs": -1,
+    "space": {},
+}
+
+
+def read_model_config(file_path: str, backend: Optional[str] = None) -> Tuple[str, dict]:
+    """
+    Reads the backend and its hyperparameters from the model config file (config/model.yaml).
+    backend overrides the backend selected in the file; an empty or missing file gives the defaults.
+
+    Output      :   Returns (backend name, hyperparameters)
+    """
+    try:
+        model_config = read_yaml_file(file_path) or {}
+        backend = backend or model_config.get("backend") or MODEL_TRAINER_BACKEND
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend '{backend}', expected one of {tuple(MODEL_BACKENDS)}")
+        params = dict(MODEL_BACKENDS[backend][1])
+        params.update((model_config.get("backends") or {}).get(backend) or {})
+        return backend, params
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def build_model(backend: str, params: Optional[dict] = None, class_weight: Optional[str] = None,
+                random_state: Optional[int] = MIN_SAMPLES_SPLIT_RANDOM_STATE):
+    """
+    Creates the estimator of a backend. class_weight and random_state are set when the estimator supports them.
+    """
+    try:
+        estimator_class, default_params = MODEL_BACKENDS[backend]
+        model = estimator_class(**(default_params if params is None else params))
+        supported = model.get_params()
+        model.set_params(**{name: value for name, value in (("class_weight", class_weight),
+                                                            ("random_state", random_state))
+                            if name in supported})
+        return model
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def model_size_bytes(model: object) -> int:
+    """
+    Returns the size of the serialized model (as written by save_object).
+    """
+    return len(dill.dumps(model))
+
+
+def measure_inference_latency(model, X, batch_size: int = 1000, repeat: int = 50) -> dict:
+    """
+    Measures the prediction latency of a fitted model on rows of X:
+    the median of `repeat` single-row predictions and the best of a few predictions of `batch_size` rows.
+
+    Output      :   Returns {"single_row_latency_ms", "batch_latency_ms", "batch_size"}
+    """
+    try:
+        X = np.asarray(X)
+        rows = np.random.default_rng(0).integers(0, len(X), size=repeat)
+        single_row = []
+        for row in rows:
+            sample = X[row:row + 1]
+            start = time.perf_counter()
+            model.predict(sample)
+            single_row.append(time.perf_counter() - start)
+
+        batch = np.ascontiguousarray(X[:batch_size])
+        batch_seconds = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            model.predict(batch)
+            batch_seconds = min(batch_seconds, time.perf_counter() - start)
+        return {
+            "single_row_latency_ms": float(np.median(single_row)) * 1000,
+            "batch_latency_ms": batch_seconds * 1000,
+            "batch_size": len(batch),
+        }
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def read_search_config(file_path: str) -> dict:
+    """
+    Reads the hyperparameter search settings (the search section of config/model.yaml) with their defaults.
+    """
+    try:
+        search_config = dict(SEARCH_DEFAULTS)
+        search_config.update((read_yaml_file(file_path) or {}).get("search") or {})
+        if search_config["method"] not in SEARCH_METHODS:
+            raise ValueError(f"Unknown search method '{search_config['method']}', expected one of {SEARCH_METHODS}")
+        return search_config
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def with_fold_resampling(model, resampler=None):
+    """
+    Wraps a model in an imblearn Pipeline that resamples the rows the model is fitted on (and only those,
+    predictions are made on the rows as they are), or returns the model itself without a resampler.
+    Cross-validated on unresampled rows, the held-out fold then never contains synthetic neighbours of
+    its own rows, as it would if the whole set had been resampled before splitting.
+    """
+    if resampler is None:
+        return model
+    return ResamplingPipeline([("resampler", resampler), ("model", model)])
+
+
+def _search_distribution(values):
+    # A list is sampled as choices, a {low, high, log} range as a (log-)uniform distribution
+    if not isinstance(values, dict):
+        return list(values)
+    low, high = values["low"], values["high"]
+    if values.get("log"):
+        return loguniform(low, high)
+    if isinstance(low, int) and isinstance(high, int):
+        return randint(low, high + 1)
+    return uniform(low, high - low)
+
+
+def search_hyperparameters(model, space: dict, X, y, search_config: dict,
+                           random_state: Optional[int] = None, resampler=None) -> Tuple[dict, List[dict]]:
+    """
+    Searches the hyperparameters of an unfitted model over space with successive halving or random search.
+    With a resampler, X and y are the unresampled rows and only the training rows of each split are resampled.
+
+    Configurations are evaluated by cross-validation on search_config["n_jobs"] cores (one core per model).
+    X and y should be memmaps (np.load(..., mmap_mode="r")): joblib then sends workers the file to map
+    instead of a copy of the arrays. With halving, each round keeps the best 1/factor of the configurations
+    and gives them factor times more rows (the last round uses all rows), so losing configurations stop
+    after a fraction of the data.
+
+    Output      :   Returns (best parameters, trials) where a trial is a dict with the parameters, round,
+                    number of rows, mean/std score and mean fit time of one configuration in one round
+    """
+    try:
+        if model.get_params().get("n_jobs") not in (None, 1):
+            model.set_params(n_jobs=1)  # parallelism is across configurations
+        if model.get_params().get("oob_score"):
+            model.set_params(oob_score=False)  # candidates are scored by cross-validation
+        prefix = "" if resampler is None else "model__"
+        distributions = {prefix + name: _search_distribution(values) for name, values in space.items()}
+        estimator = with_fold_resampling(model, resampler)
+        cv = StratifiedKFold(n_splits=search_config["cv"], shuffle=True, random_state=random_state)
+        common = dict(scoring=search_config["scoring"], cv=cv, n_jobs=search_config["n_jobs"], refit=False,
+                      random_state=random_state, error_score=np.nan)
+        if search_config["method"] == "halving":
+            search = HalvingRandomSearchCV(estimator, distributions, n_candidates=search_config["n_candidates"],
+                                           factor=search_config["factor"], min_resources="exhaust", **common)
+        else:
+            search = RandomizedSearchCV(estimator, distributions, n_iter=search_config["n_candidates"], **common)
+
+        start = time.perf_counter()
+        search.fit(X, y)
+        results = search.cv_results_
+        trials = [{
+            "params": {name[len(prefix):]: value.item() if isinstance(value, np.generic) else value
+                       for name, value in results["params"][i].items()},
+            "round": int(results["iter"][i]) if "iter" in results else 0,
+            "n_rows": int(results["n_resources"][i]) if "n_resources" in results else len(y),
+            "mean_score": float(results["mean_test_score"][i]),
+            "std_score": float(results["std_test_score"][i]),
+            "mean_fit_seconds": float(results["mean_fit_time"][i]),
+        } for i in range(len(results["params"]))]
+        best_params = trials[int(search.best_index_)]["params"]
+        logging.info(f"{search_config['method']} search: {len(trials)} trials in {time.perf_counter() - start:.2f}s, "
+                     f"best {search_config['scoring']} {search.best_score_:.4f} with {best_params}")
+        return best_params, trials
+    except Exception as e:
+        raise MyException(e, sys) from e
+
+
+def _fit_and_score_fold(model, X, y, train_index: np.ndarray, test_index: np.ndarray, fold: int) -> dict:
+    # Runs in a worker: X and y arrive as memmaps of the transformed files, only this fold's rows
+    # are gathered from them
+    start = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    metrics = classification_metrics(y[test_index], model.predict(X[test_index]))
+    return {
+        "fold": fold,
+        "f1_score": metrics["f1_score"],
+        "precision_score": metrics["precision_score"],
+        "recall_score": metrics["recall_score"],
+        "accuracy_score": metrics["accuracy_score"],
+        "train_rows": len(train_index),
+        "test_rows": len(test_index),
+        "fit_seconds": fit_seconds,
+        "score_seconds": time.perf_counter() - start,
+    }
+
+
+def cross_validate_model(model, X, y, n_folds: int = 5, n_jobs: Optional[int] = -1,
+                         random_state: Optional[int] = None, resampler=None) -> List[dict]:
+    """
+    Stratified k-fold cross-validation of an unfitted model, folds fitted in parallel worker processes.
+    With a resampler, X and y are the unresampled rows: the training rows of each fold are resampled before
+    the fit and the held-out rows are scored as they are (see with_fold_resampling).
+
+    X and y should be read-only memmaps (np.load(..., mmap_mode="r")): joblib passes them to the
+    workers as references to the .npy files, and each fold receives only its (sorted) row indices,
+    so the data is stored once on disk and never pickled per fold. Larger in-memory arrays are
+    dumped once to a shared temporary memmap by joblib instead.
+
+    Output      :   Returns one dict per fold with F1, precision, recall, accuracy, rows and fit/score seconds
+                    (train_rows counts the rows before resampling)
+    """
+    try:
+        if n_jobs != 1 and model.get_params().get("n_jobs") not in (None, 1):
+            model = clone(model).set_params(n_jobs=1)  # parallelism is across folds
+        if model.get_params().get("oob_score"):
+            model = clone(model).set_params(oob_score=False)  # folds are scored on their held-out rows
+        model = with_fold_resampling(model, resampler)
+        folds = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state).split(
+            np.zeros((len(y), 1)), y)
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs, backend="loky")(
+            delayed(_fit_and_score_fold)(clone(model), X, y, train_index, test_index, fold)
+            for fold, (train_index, test_index) in enumerate(folds)
+        )
+        f1_scores = [result["f1_score"] for result in results]
+        logging.info(f"{n_folds}-fold cross-validation in {time.perf_counter() - start:.2f}s: "
+                     f"F1 {np.mean(f1_scores):.4f} +/- {np.std(f1_scores):.4f}")
+        return results
+    except Exception as e:
+        raise MyException(e, sys) from e
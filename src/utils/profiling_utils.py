@@ -0,0 +1,182 @@
+"""
+Resource measurement helpers for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import os
+import resource
+import threading
+import time
+from typing import List, Optional, Tuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Returns the resident set size of the current process, or None when /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def max_rss_bytes() -> int:
+    """
+    Returns the peak resident set size of the process since it started (ru_maxrss).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSSSampler:
+    """
+    Samples the resident set size from a background thread and keeps its peak.
+
+    Unlike ru_maxrss, the peak can be measured for a section of the program:
+
+        with PeakRSSSampler() as sampler:
+            run_stage()
+        print(sampler.peak_bytes, sampler.peak_increase_bytes)
+
+    Falls back to ru_maxrss when /proc is not available.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.start_bytes: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.start_bytes = current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._run, name="PeakRSSSampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._sample()
+        else:
+            self.peak_bytes = max_rss_bytes()
+
+    @property
+    def peak_increase_bytes(self) -> Optional[int]:
+        """Peak RSS above the RSS at the start of the section."""
+        if self.start_bytes is None or self.peak_bytes is None:
+            return None
+        return max(self.peak_bytes - self.start_bytes, 0)
+
+
+def io_counters() -> Optional[Tuple[int, int]]:
+    """
+    Returns the bytes read and written by the process so far (rchar/wchar of /proc/self/io, page cache
+    included, memory-mapped access excluded), or None when /proc is not available.
+    """
+    try:
+        with open("/proc/self/io", "rb") as io:
+            counters = dict(line.split(b":") for line in io.read().splitlines())
+        return int(counters[b"rchar"]), int(counters[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+_active = threading.local()
+
+
+def record_rows(rows: int) -> None:
+    """
+    Adds rows to the StageProfiler active in the calling thread (no-op outside a profiled stage).
+    """
+    profiler = getattr(_active, "profiler", None)
+    if profiler is not None:
+        profiler.rows += int(rows)
+
+
+class StageProfiler:
+    """
+    Measures a section of the program (a pipeline stage):
+
+        with StageProfiler("model_trainer") as profiler:
+            artifact = run_stage()
+        profiler.result  # {"stage", "wall_seconds", "cpu_seconds", ..., "rows", "bytes_read", ...}
+
+    cpu_seconds is the CPU time of the calling thread, process_cpu_seconds that of the whole process.
+    Peak RSS and bytes read/written are process-wide, so stages running concurrently share them.
+    Code running inside the section reports the rows it processed through record_rows.
+    """
+
+    def __init__(self, stage: str, rss_interval: float = 0.01) -> None:
+        self.stage = stage
+        self.rows = 0
+        self._rss_sampler = PeakRSSSampler(interval=rss_interval)
+        self._previous = None
+        self.result: Optional[dict] = None
+
+    def __enter__(self) -> "StageProfiler":
+        self._previous = getattr(_active, "profiler", None)
+        _active.profiler = self
+        self._rss_sampler.__enter__()
+        self._io = io_counters()
+        self._start = (time.perf_counter(), time.thread_time(), time.process_time())
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        wall, thread_cpu, process_cpu = (time.perf_counter(), time.thread_time(), time.process_time())
+        io = io_counters()
+        self._rss_sampler.__exit__(*exc_info)
+        _active.profiler = self._previous
+        self.result = {
+            "stage": self.stage,
+            "wall_seconds": wall - self._start[0],
+            "cpu_seconds": thread_cpu - self._start[1],
+            "process_cpu_seconds": process_cpu - self._start[2],
+            "peak_rss_bytes": self._rss_sampler.peak_bytes,
+            "peak_rss_increase_bytes": self._rss_sampler.peak_increase_bytes,
+            "rows": self.rows,
+            "bytes_read": io[0] - self._io[0] if io and self._io else None,
+            "bytes_written": io[1] - self._io[1] if io and self._io else None,
+        }
+
+
+# Metric -> smallest absolute increase reported as a regression (filters out noise on tiny stages)
+REGRESSION_METRICS = {
+    "wall_seconds": 0.5,
+    "cpu_seconds": 0.5,
+    "peak_rss_increase_bytes": 16 * 1024 ** 2,
+    "bytes_read": 16 * 1024 ** 2,
+    "bytes_written": 16 * 1024 ** 2,
+}
+
+
+def compare_profiles(current: dict, baseline: dict, threshold: float = 0.2) -> List[dict]:
+    """
+    Compares stage profiles ({stage: profile}) with a baseline and returns the regressions:
+    metrics more than `threshold` (relative) and REGRESSION_METRICS (absolute) above the baseline.
+    """
+    regressions = []
+    for stage, profile in current.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        for metric, min_increase in REGRESSION_METRICS.items():
+            value, base = profile.get(metric), reference.get(metric)
+            if value is None or base is None:
+                continue
+            if value > base * (1 + threshold) and value - base > min_increase:
+                regressions.append({"stage": stage, "metric": metric, "value": value, "baseline": base,
+                                    "change": (value - base) / base if base else None})
+    return regressions
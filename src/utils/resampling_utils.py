@@ -0,0 +1,145 @@
+"""
+Class imbalance resampling strategies for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed
+from imblearn.combine import SMOTEENN  # type: ignore
+from imblearn.over_sampling import SMOTE  # type: ignore
+from imblearn.under_sampling import EditedNearestNeighbours, RandomUnderSampler  # type: ignore
+from sklearn.base import BaseEstimator
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import NearestNeighbors
+
+from src.exception import MyException
+from src.logger import logging
+
+RESAMPLING_STRATEGIES = ("smoteenn", "smoteenn_chunked", "random_under", "class_weight", "none")
+STREAMING_STRATEGIES = ("random_under", "class_weight", "none")  # usable on data streamed in chunks
+ROW_CHANGING_STRATEGIES = ("smoteenn", "smoteenn_chunked", "random_under")  # add or drop training rows
+
+
+class Resampler(BaseEstimator):
+    """
+    Pluggable resampling stage run on the transformed features. It is a scikit-learn estimator with
+    fit_resample, so it can also be the first step of an imblearn Pipeline that resamples the training
+    rows of every cross-validation fold.
+
+    Strategies:
+        smoteenn          SMOTE + Edited Nearest Neighbours on the whole set, neighbour searches run on n_jobs cores
+        smoteenn_chunked  the same on stratified chunks of about chunk_size rows resampled in parallel; neighbours
+                          are searched within a chunk only (approximate), so the cost grows linearly with the rows
+        random_under      randomly drops majority rows down to the minority count (no neighbour search)
+        class_weight      keeps the data as is, the trainer weights classes instead ("balanced")
+        none              keeps the data as is
+    """
+
+    def __init__(self, strategy: str = "smoteenn", n_jobs: Optional[int] = None, chunk_size: int = 50_000,
+                 random_state: Optional[int] = None) -> None:
+        """
+        :param strategy: one of RESAMPLING_STRATEGIES
+        :param n_jobs: cores used by neighbour searches and chunks (-1 for all)
+        :param chunk_size: rows per chunk of the smoteenn_chunked strategy
+        :param random_state: seed of the resampling
+        """
+        try:
+            if strategy not in RESAMPLING_STRATEGIES:
+                raise ValueError(f"Unknown resampling strategy '{strategy}', expected one of {RESAMPLING_STRATEGIES}")
+        except Exception as e:
+            raise MyException(e, sys) from e
+        self.strategy = strategy
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+
+    @property
+    def class_weight(self) -> Optional[str]:
+        """class_weight the model should be trained with for this strategy."""
+        return "balanced" if self.strategy == "class_weight" else None
+
+    @property
+    def changes_rows(self) -> bool:
+        """True when the strategy adds or drops rows (the data as is cannot be split into folds afterwards)."""
+        return self.strategy in ROW_CHANGING_STRATEGIES
+
+    def _smoteenn(self, n_jobs: Optional[int], random_state: Optional[int]) -> SMOTEENN:
+        # Same sampler as before (minority oversampling, ENN cleaning of all classes), with the neighbour
+        # searches parallelized through explicit NearestNeighbors estimators
+        return SMOTEENN(
+            sampling_strategy="minority",
+            random_state=random_state,
+            smote=SMOTE(sampling_strategy="minority", random_state=random_state,
+                        k_neighbors=NearestNeighbors(n_neighbors=6, n_jobs=n_jobs)),
+            enn=EditedNearestNeighbours(sampling_strategy="all",
+                                        n_neighbors=NearestNeighbors(n_neighbors=4, n_jobs=n_jobs)),
+        )
+
+    def _resample_chunked(self, X: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n_chunks = max(int(np.ceil(len(X) / self.chunk_size)), 1)
+        if n_chunks == 1:
+            return self._smoteenn(self.n_jobs, self.random_state).fit_resample(X, y)
+        folds = StratifiedKFold(n_splits=n_chunks, shuffle=True, random_state=self.random_state).split(X, y)
+        seeds = np.random.default_rng(self.random_state).integers(0, 2 ** 31 - 1, n_chunks)
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(self._smoteenn(1, int(seed)).fit_resample)(X[chunk], y[chunk])
+            for (_, chunk), seed in zip(folds, seeds)
+        )
+        return np.concatenate([X_chunk for X_chunk, _ in results]), np.concatenate([y_chunk for _, y_chunk in results])
+
+    def fit_resample(self, X, y, label: str = "data") -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Resamples X, y with the configured strategy and logs how long it took.
+        """
+        try:
+            start = time.perf_counter()
+            X, y = np.asarray(X), np.asarray(y)
+            if self.strategy == "smoteenn":
+                X_resampled, y_resampled = self._smoteenn(self.n_jobs, self.random_state).fit_resample(X, y)
+            elif self.strategy == "smoteenn_chunked":
+                X_resampled, y_resampled = self._resample_chunked(X, y)
+            elif self.strategy == "random_under":
+                X_resampled, y_resampled = RandomUnderSampler(
+                    sampling_strategy="majority", random_state=self.random_state).fit_resample(X, y)
+            else:
+                X_resampled, y_resampled = X, y
+            logging.info(f"Resampling strategy [{self.strategy}] on {label}: {len(X)} -> {len(X_resampled)} rows "
+                         f"in {time.perf_counter() - start:.2f}s")
+            return X_resampled, y_resampled
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+
+class StreamingUnderSampler:
+    """
+    Random undersampling of data streamed in chunks: exactly as many majority rows as there are minority rows
+    are kept, without holding the data in memory. The number of majority rows kept in each chunk is drawn
+    from the hypergeometric distribution of the rows still to be seen, which gives a uniform sample.
+    """
+
+    def __init__(self, class_counts: dict, random_state: Optional[int] = None) -> None:
+        """
+        :param class_counts: number of rows per class of the whole data ({label: count})
+        :param random_state: seed of the sampling
+        """
+        self.majority_class = max(class_counts, key=class_counts.get)
+        self._remaining = class_counts[self.majority_class]
+        self._needed = min(class_counts.values())
+        self.output_rows = sum(class_counts.values()) - self._remaining + self._needed
+        self._rng = np.random.default_rng(random_state)
+
+    def select(self, y_chunk) -> np.ndarray:
+        """
+        Returns the mask of the rows of the chunk that are kept.
+        """
+        y_chunk = np.asarray(y_chunk)
+        majority = np.flatnonzero(y_chunk == self.majority_class)
+        mask = y_chunk != self.majority_class
+        taken = int(self._rng.hypergeometric(len(majority), self._remaining - len(majority), self._needed)) \
+            if self._needed else 0
+        mask[self._rng.choice(majority, taken, replace=False)] = True
+        self._remaining -= len(majority)
+        self._needed -= taken
+        return mask
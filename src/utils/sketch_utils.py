@@ -0,0 +1,335 @@
+"""
+Fixed-memory data sketches and drift scores for the Vehicle Insurance Data Pipeline MLops project.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+OTHER_CATEGORY = "__other__"
+
+
+class QuantileSketch:
+    """
+    KLL style quantile sketch of a numeric column.
+
+    Values are kept in compactors (levels); an item of level h stands for 2**h values. When a level is full
+    it is sorted and every other item is promoted to the next level, so memory stays around
+    3 * k items whatever the number of values while rank errors stay around 1.7 / k.
+    Updates take whole arrays, a chunk of values is compacted with a few vectorized numpy calls.
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0) -> None:
+        """
+        :param k: capacity of the top level, controls accuracy and memory
+        :param seed: seed of the random offsets used when compacting
+        """
+        self.k = k
+        self.count = 0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # an odd item stays behind, the others are halved into the next level
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values) -> None:
+        """
+        Adds an array of values (missing values are ignored).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        chunk_min, chunk_max = float(values.min()), float(values.max())
+        self.minimum = chunk_min if self.minimum is None else min(self.minimum, chunk_min)
+        self.maximum = chunk_max if self.maximum is None else max(self.maximum, chunk_max)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """
+        Merges another sketch into this one (e.g. sketches of several chunks or files).
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        for bound, pick in (("minimum", min), ("maximum", max)):
+            values = [value for value in (getattr(self, bound), getattr(other, bound)) if value is not None]
+            setattr(self, bound, pick(values) if values else None)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def cdf(self, points) -> np.ndarray:
+        """
+        Returns the estimated fraction of values <= each point.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if self.count == 0:
+            return np.zeros(len(points))
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(items, points, side="right")
+        ranks = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0)
+        return ranks / cumulative[-1]
+
+    def quantiles(self, fractions) -> np.ndarray:
+        """
+        Returns the estimated values at the given fractions (0 to 1).
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(fractions), np.nan)
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(cumulative, fractions * cumulative[-1], side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "quantile",
+            "k": self.k,
+            "count": self.count,
+            "min": self.minimum,
+            "max": self.maximum,
+            "levels": [items.tolist() for items in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "QuantileSketch":
+        sketch = cls(k=content["k"])
+        sketch.count = content["count"]
+        sketch.minimum = content["min"]
+        sketch.maximum = content["max"]
+        sketch.levels = [np.asarray(items, dtype=np.float64) for items in content["levels"]]
+        return sketch
+
+
+class FrequencySketch:
+    """
+    Frequency counts of a categorical column. At most max_categories values are tracked, the counts of
+    values seen after that are kept under a single "__other__" bucket.
+    """
+
+    def __init__(self, max_categories: int = 1000) -> None:
+        self.max_categories = max_categories
+        self.count = 0
+        self.counts: Dict[str, int] = {}
+
+    def update(self, values) -> None:
+        """
+        Adds a Series (or array) of values (missing values are ignored).
+        """
+        counts = pd.Series(values).dropna().astype(str).value_counts()
+        for value, count in counts.items():
+            if value not in self.counts and len(self.counts) >= self.max_categories:
+                value = OTHER_CATEGORY
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+            self.count += int(count)
+
+    def merge(self, other: "FrequencySketch") -> "FrequencySketch":
+        for value, count in other.counts.items():
+            if value not in self.counts and len(self.counts) >= self.max_categories:
+                value = OTHER_CATEGORY
+            self.counts[value] = self.counts.get(value, 0) + count
+        self.count += other.count
+        return self
+
+    def frequencies(self, categories: List[str]) -> np.ndarray:
+        """
+        Returns the share of each category (0 for categories never seen).
+        """
+        if self.count == 0:
+            return np.zeros(len(categories))
+        return np.array([self.counts.get(category, 0) for category in categories], dtype=np.float64) / self.count
+
+    def to_dict(self) -> dict:
+        return {"type": "frequency", "max_categories": self.max_categories, "count": self.count,
+                "counts": dict(self.counts)}
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "FrequencySketch":
+        sketch = cls(max_categories=content["max_categories"])
+        sketch.count = content["count"]
+        sketch.counts = dict(content["counts"])
+        return sketch
+
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray, epsilon: float = 1e-4) -> float:
+    """
+    PSI between two binned distributions (shares summing to 1). Empty bins are floored at epsilon.
+    """
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), epsilon)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), epsilon)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def compare_quantile_sketches(reference: QuantileSketch, current: QuantileSketch, n_bins: int = 10) -> dict:
+    """
+    Scores the drift of a numeric column: PSI over the reference quantile bins and the
+    Kolmogorov-Smirnov statistic (largest gap between the two estimated CDFs).
+    """
+    edges = np.unique(reference.quantiles(np.linspace(0, 1, n_bins + 1)[1:-1]))
+    reference_cdf = np.concatenate([[0.0], reference.cdf(edges), [1.0]])
+    current_cdf = np.concatenate([[0.0], current.cdf(edges), [1.0]])
+    psi = population_stability_index(np.diff(reference_cdf), np.diff(current_cdf))
+
+    points = np.unique(np.concatenate([np.concatenate(reference.levels), np.concatenate(current.levels)]))
+    ks = float(np.max(np.abs(reference.cdf(points) - current.cdf(points)))) if len(points) else 0.0
+    return {"psi": psi, "ks": ks}
+
+
+def compare_frequency_sketches(reference: FrequencySketch, current: FrequencySketch) -> dict:
+    """
+    Scores the drift of a categorical column: PSI over the categories of both sketches and the largest
+    difference in category share (KS style statistic for unordered categories).
+    """
+    categories = sorted(set(reference.counts) | set(current.counts))
+    expected, actual = reference.frequencies(categories), current.frequencies(categories)
+    psi = population_stability_index(expected, actual)
+    return {"psi": psi, "ks": float(np.max(np.abs(expected - actual))) if categories else 0.0}
+
+
+class DatasetSketch:
+    """
+    Sketches of every column of a dataset: a QuantileSketch for numeric columns and a FrequencySketch for
+    the others. Built in a single pass over the data (or chunk by chunk) and small enough to be stored as
+    JSON next to the model, so drift can be scored without the data the model was trained on.
+    """
+
+    def __init__(self, k: int = 200, max_categories: int = 1000, skip_columns=("id", "_id"),
+                 categorical_columns=()) -> None:
+        """
+        :param k: accuracy of the quantile sketches
+        :param max_categories: categories tracked per frequency sketch
+        :param skip_columns: columns that are not sketched
+        :param categorical_columns: columns counted with a frequency sketch even if numeric (encoded categories)
+        """
+        self.k = k
+        self.max_categories = max_categories
+        self.skip_columns = set(skip_columns)
+        self.categorical_columns = set(categorical_columns)
+        self.rows = 0
+        self.columns: Dict[str, object] = {}
+
+    def update(self, dataframe: pd.DataFrame) -> "DatasetSketch":
+        """
+        Adds a DataFrame (or one chunk of a larger dataset).
+        """
+        self.rows += len(dataframe)
+        for name in dataframe.columns:
+            if name in self.skip_columns:
+                continue
+            series = dataframe[name]
+            sketch = self.columns.get(name)
+            if sketch is None:
+                numeric = (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+                           and name not in self.categorical_columns)
+                sketch = QuantileSketch(k=self.k) if numeric else FrequencySketch(self.max_categories)
+                self.columns[name] = sketch
+            if isinstance(sketch, QuantileSketch):
+                sketch.update(pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                sketch.update(series)
+        return self
+
+    def compare(self, current: "DatasetSketch", n_bins: int = 10) -> Dict[str, dict]:
+        """
+        Scores the drift of every column sketched in both datasets (this one being the reference).
+        """
+        scores = {}
+        for name, reference_sketch in self.columns.items():
+            current_sketch = current.columns.get(name)
+            if type(current_sketch) is not type(reference_sketch):
+                continue
+            if isinstance(reference_sketch, QuantileSketch):
+                scores[name] = compare_quantile_sketches(reference_sketch, current_sketch, n_bins=n_bins)
+            else:
+                scores[name] = compare_frequency_sketches(reference_sketch, current_sketch)
+        return scores
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "k": self.k,
+            "max_categories": self.max_categories,
+            "columns": {name: sketch.to_dict() for name, sketch in self.columns.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, content: dict) -> "DatasetSketch":
+        dataset_sketch = cls(k=content["k"], max_categories=content["max_categories"])
+        dataset_sketch.rows = content["rows"]
+        for name, column in content["columns"].items():
+            sketch_class = QuantileSketch if column["type"] == "quantile" else FrequencySketch
+            dataset_sketch.columns[name] = sketch_class.from_dict(column)
+        return dataset_sketch
+
+
+def _code_frequencies(sketch, label_codes: dict, default_code: Optional[int] = None) -> FrequencySketch:
+    """
+    Counts of the integer codes of an encoded categorical column, from the sketch of either its labels
+    (FrequencySketch) or of its codes (QuantileSketch, when categories were encoded at export).
+    """
+    codes = FrequencySketch()
+    if isinstance(sketch, FrequencySketch):
+        for label, count in sketch.counts.items():
+            code = label_codes.get(label, default_code)
+            if code is not None:
+                codes.counts[str(code)] = codes.counts.get(str(code), 0) + count
+                codes.count += count
+    else:
+        values = sorted(set(label_codes.values()) | ({default_code} - {None}))
+        shares = np.diff(np.concatenate([[0.0], sketch.cdf(values)]))
+        for value, share in zip(values, shares):
+            codes.counts[str(value)] = int(round(share * sketch.count))
+        codes.count = sum(codes.counts.values())
+    return codes
+
+
+def encode_categorical_sketches(dataset_sketch: DatasetSketch, schema_config: dict) -> DatasetSketch:
+    """
+    Returns a copy of a dataset sketch in which the categorical columns are expressed the way the model sees
+    them: binary columns as counts of their codes and one-hot columns as counts (0/1) of each dummy column.
+    Served features are encoded, so live sketches can be compared with a training-time sketch this way.
+    """
+    encoded = DatasetSketch(k=dataset_sketch.k, max_categories=dataset_sketch.max_categories)
+    encoded.rows = dataset_sketch.rows
+    encoded.columns = dict(dataset_sketch.columns)
+    for column, mapping in schema_config.get("binary_columns", {}).items():
+        if column in encoded.columns:
+            encoded.columns[column] = _code_frequencies(encoded.columns[column], dict(mapping))
+    for column, dummies in schema_config.get("one_hot_columns", {}).items():
+        for dummy, label in dummies.items():
+            if column in dataset_sketch.columns:
+                encoded.columns[dummy] = _code_frequencies(dataset_sketch.columns[column], {label: 1}, default_code=0)
+            elif dummy in dataset_sketch.columns:
+                encoded.columns[dummy] = _code_frequencies(dataset_sketch.columns[dummy], {"1": 1}, default_code=0)
+        encoded.columns.pop(column, None)
+    return encoded
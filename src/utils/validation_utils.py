@@ -0,0 +1,238 @@
+"""
+Vectorized schema validation engine for the Vehicle Insurance Data Pipeline MLops project.
+"""
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.exception import MyException
+from src.logger import logging
+
+
+@dataclass
+class ColumnStatistics:
+    """
+    Running statistics of one column, updated chunk by chunk.
+    """
+    count: int = 0
+    null_count: int = 0
+    dtype_errors: int = 0
+    range_errors: int = 0
+    category_errors: int = 0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    total: float = 0.0
+    total_squares: float = 0.0
+    numeric_count: int = 0
+    value_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def errors(self) -> int:
+        return self.dtype_errors + self.range_errors + self.category_errors
+
+    def to_dict(self) -> dict:
+        report = {
+            "count": self.count,
+            "null_count": self.null_count,
+            "null_fraction": self.null_count / self.count if self.count else 0.0,
+            "dtype_errors": self.dtype_errors,
+            "range_errors": self.range_errors,
+            "category_errors": self.category_errors,
+        }
+        if self.numeric_count:
+            mean = self.total / self.numeric_count
+            report.update({
+                "min": self.minimum,
+                "max": self.maximum,
+                "mean": mean,
+                "std": float(np.sqrt(max(self.total_squares / self.numeric_count - mean ** 2, 0.0))),
+            })
+        if self.value_counts:
+            report["value_counts"] = dict(self.value_counts)
+        return report
+
+
+@dataclass
+class ColumnCheck:
+    """
+    Checks of one column compiled from the schema: expected kind ('int', 'float' or 'category'),
+    inclusive value range and allowed values.
+    """
+    name: str
+    kind: str
+    value_range: Optional[Tuple[float, float]] = None
+    allowed_values: Optional[List] = None
+
+    def evaluate(self, series: pd.Series, stats: ColumnStatistics) -> int:
+        """
+        Evaluates the checks on one chunk of the column and updates its statistics.
+
+        :return: number of invalid (non null) values in the chunk
+        """
+        null_mask = series.isna().to_numpy()
+        stats.count += len(series)
+        stats.null_count += int(null_mask.sum())
+
+        if self.kind == "category":
+            values = series[~null_mask]
+            counts = values.value_counts()
+            for value, count in counts.items():
+                stats.value_counts[str(value)] = stats.value_counts.get(str(value), 0) + int(count)
+            if self.allowed_values is not None:
+                invalid = int(counts[~counts.index.isin(self.allowed_values)].sum())
+                stats.category_errors += invalid
+                return invalid
+            return 0
+
+        numbers = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        not_numeric = np.isnan(numbers) & ~null_mask
+        dtype_errors = int(not_numeric.sum())
+        valid = ~np.isnan(numbers)
+        if self.kind == "int":
+            fractional = valid & (np.mod(numbers, 1) != 0)
+            dtype_errors += int(fractional.sum())
+        stats.dtype_errors += dtype_errors
+
+        range_errors = 0
+        numbers = numbers[valid]
+        if self.value_range is not None and len(numbers):
+            low, high = self.value_range
+            range_errors = int(((numbers < low) | (numbers > high)).sum())
+            stats.range_errors += range_errors
+
+        category_errors = 0
+        if self.allowed_values is not None and len(numbers):
+            category_errors = int((~np.isin(numbers, self.allowed_values)).sum())
+            stats.category_errors += category_errors
+
+        if len(numbers):
+            chunk_min, chunk_max = float(numbers.min()), float(numbers.max())
+            stats.minimum = chunk_min if stats.minimum is None else min(stats.minimum, chunk_min)
+            stats.maximum = chunk_max if stats.maximum is None else max(stats.maximum, chunk_max)
+            stats.total += float(numbers.sum())
+            stats.total_squares += float(np.square(numbers).sum())
+            stats.numeric_count += len(numbers)
+        return dtype_errors + range_errors + category_errors
+
+
+@dataclass
+class FileValidationResult:
+    """
+    Outcome of validating one file against the schema.
+    """
+    rows: int
+    errors: int
+    early_stopped: bool
+    null_fraction_exceeded: List[str]
+    column_statistics: Dict[str, ColumnStatistics]
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "errors": self.errors,
+            "early_stopped": self.early_stopped,
+            "null_fraction_exceeded": self.null_fraction_exceeded,
+            "columns": {name: stats.to_dict() for name, stats in self.column_statistics.items()},
+        }
+
+
+class SchemaValidator:
+    """
+    Compiles the schema (column types, `column_ranges`, `categorical_values`, `binary_columns`,
+    `one_hot_columns` and `max_null_fraction`) into vectorized column checks and evaluates them on a file
+    one chunk at a time, so files larger than memory can be validated in a single pass.
+
+    Scanning stops early once the number of invalid values exceeds the error budget. Missing values are not
+    invalid values: they never use up the error budget and are only limited by `max_null_fraction`, either one
+    share for every column or a mapping of per-column shares with a `default` for the columns not listed.
+    Without `max_null_fraction` the share of missing values is not limited.
+    """
+
+    def __init__(self, schema_config: dict, error_budget: int = 0, chunk_size: int = 100_000) -> None:
+        """
+        :param schema_config: parsed config/schema.yaml
+        :param error_budget: number of invalid values tolerated before the data is rejected
+        :param chunk_size: number of rows read and checked at once
+        """
+        self.schema_config = schema_config
+        self.error_budget = error_budget
+        self.chunk_size = chunk_size
+        max_null_fraction = schema_config.get("max_null_fraction", 1.0)
+        if not isinstance(max_null_fraction, dict):
+            max_null_fraction = {"default": max_null_fraction}
+        self.max_null_fraction = float(max_null_fraction.get("default", 1.0))
+        self.column_max_null_fraction = {name: float(fraction) for name, fraction in max_null_fraction.items()
+                                         if name != "default"}
+
+    def null_fraction_limit(self, name: str) -> float:
+        """
+        Tolerated share of missing values of a column.
+        """
+        return self.column_max_null_fraction.get(name, self.max_null_fraction)
+
+    def compile(self, chunk: pd.DataFrame) -> List[ColumnCheck]:
+        """
+        Compiles the checks for a file from its first chunk. Columns whose categories were already encoded
+        by the aggregation export are checked against their codes. Missing columns are not compiled
+        (column presence is checked separately).
+        """
+        schema_types = {name: dtype for column in self.schema_config["columns"] for name, dtype in column.items()}
+        ranges = self.schema_config.get("column_ranges", {})
+        categories = self.schema_config.get("categorical_values", {})
+        binary_columns = self.schema_config.get("binary_columns", {})
+        one_hot_columns = self.schema_config.get("one_hot_columns", {})
+
+        checks = []
+        for name, kind in schema_types.items():
+            if name in chunk.columns:
+                if name in binary_columns and pd.api.types.is_numeric_dtype(chunk[name]):
+                    checks.append(ColumnCheck(name=name, kind="int",
+                                              allowed_values=list(binary_columns[name].values())))
+                    continue
+                value_range = tuple(ranges[name]) if name in ranges else None
+                checks.append(ColumnCheck(name=name, kind=kind, value_range=value_range,
+                                          allowed_values=categories.get(name)))
+            elif name in one_hot_columns:
+                checks.extend(ColumnCheck(name=dummy, kind="int", allowed_values=[0, 1])
+                              for dummy in one_hot_columns[name] if dummy in chunk.columns)
+        return checks
+
+    def validate_chunks(self, chunks) -> FileValidationResult:
+        """
+        Validates an iterable of DataFrame chunks.
+        """
+        checks: Optional[List[ColumnCheck]] = None
+        statistics: Dict[str, ColumnStatistics] = {}
+        rows, errors, early_stopped = 0, 0, False
+        for chunk in chunks:
+            if checks is None:
+                checks = self.compile(chunk)
+                statistics = {check.name: ColumnStatistics() for check in checks}
+            rows += len(chunk)
+            for check in checks:
+                errors += check.evaluate(chunk[check.name], statistics[check.name])
+            if errors > self.error_budget:
+                early_stopped = True
+                logging.info(f"Error budget of {self.error_budget} exceeded after {rows} rows, stopping validation")
+                break
+
+        null_fraction_exceeded = [name for name, stats in statistics.items()
+                                  if stats.count and stats.null_count / stats.count > self.null_fraction_limit(name)]
+        return FileValidationResult(rows=rows, errors=errors, early_stopped=early_stopped,
+                                    null_fraction_exceeded=null_fraction_exceeded,
+                                    column_statistics=statistics)
+
+    def validate_file(self, file_path: str) -> FileValidationResult:
+        """
+        Validates a CSV file chunk by chunk.
+        """
+        try:
+            return self.validate_chunks(pd.read_csv(file_path, chunksize=self.chunk_size))
+        except Exception as e:
+            raise MyException(e, sys) from e
+
+    def is_valid(self, result: FileValidationResult) -> bool:
+        return result.errors <= self.error_budget and not result.null_fraction_exceeded
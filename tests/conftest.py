@@ -0,0 +1,50 @@
+"""
+Shared fixtures of the test suite of the Vehicle Insurance Data Pipeline MLops project.
+
+Tests run from the project root (python -m pytest), like the pipeline, so relative paths such as
+config/schema.yaml resolve. S3 tests run against the local stand-in of benchmarks/local_s3.py: an
+in-process moto server (pip install -r requirements-dev.txt), or the S3-compatible endpoint given in
+TEST_S3_ENDPOINT_URL. They never reach AWS.
+"""
+import os
+import uuid
+
+import pytest
+
+from benchmarks.local_s3 import LocalS3
+
+
+@pytest.fixture(scope="session")
+def local_s3():
+    """
+    Local S3 stand-in shared by the session; S3Client points at it while the session runs.
+    """
+    endpoint_url = os.getenv("TEST_S3_ENDPOINT_URL", "")
+    if not endpoint_url:
+        pytest.importorskip("moto.server", reason="moto[server] is needed for the local S3 stand-in")
+    stand_in = LocalS3(endpoint_url)
+    with stand_in:
+        yield stand_in
+
+
+@pytest.fixture
+def s3_bucket(local_s3) -> str:
+    """
+    Name of a new, empty bucket on the local stand-in (S3Client is connected to it again, and the
+    metadata cache cleared, so that every test starts from the same state).
+    """
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    local_s3.connect()
+    SimpleStorageService.metadata_cache.invalidate()
+    bucket_name = f"test-{uuid.uuid4().hex[:16]}"
+    local_s3.create_bucket(bucket_name)
+    return bucket_name
+
+
+@pytest.fixture
+def s3(s3_bucket):
+    """
+    SimpleStorageService connected to the local stand-in.
+    """
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    return SimpleStorageService()
@@ -0,0 +1,181 @@
+"""
+Round trips of SimpleStorageService, S3ObjectReader and S3Client against the local S3 stand-in.
+"""
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pytest
+from botocore.exceptions import ClientError
+
+from src.cloud_storage.aws_storage import ObjectMetadataCache, S3ObjectReader, SimpleStorageService
+from src.configuration.aws_connection import S3Client
+from src.exception import MyException
+from src.utils.compression_utils import available_codecs
+
+MODEL = {"weights": np.arange(50_000, dtype=np.float64), "classes": [0, 1], "name": "model"}
+
+
+def write_pickle(tmp_path, obj=MODEL) -> str:
+    file_path = os.path.join(tmp_path, "model.pkl")
+    with open(file_path, "wb") as file_obj:
+        pickle.dump(obj, file_obj)
+    return file_path
+
+
+def assert_same_model(loaded, expected=MODEL) -> None:
+    assert loaded.keys() == expected.keys()
+    np.testing.assert_array_equal(loaded["weights"], expected["weights"])
+    assert loaded["classes"] == expected["classes"] and loaded["name"] == expected["name"]
+
+
+class RecordingClient:
+    """Forwards get_object to a boto3 client and records the requests."""
+
+    def __init__(self, s3_client):
+        self.s3_client = s3_client
+        self.requests = []
+
+    def get_object(self, **request):
+        self.requests.append(request)
+        return self.s3_client.get_object(**request)
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_upload_model_round_trip(s3, s3_bucket, tmp_path, codec):
+    file_path = write_pickle(tmp_path)
+    compression = s3.upload_model(file_path, "models/model.pkl", s3_bucket, remove=True, codec=codec)
+
+    assert not os.path.exists(file_path)
+    assert compression["codec"] == codec
+    metadata = s3.head_object(s3_bucket, "models/model.pkl")
+    assert metadata["size"] == compression["compressed_size"]
+    assert metadata["metadata"]["codec"] == codec
+    assert metadata["metadata"]["sha256"] == compression["sha256"]
+    assert_same_model(s3.load_model("model.pkl", s3_bucket, model_dir="models"))
+
+
+def test_load_model_rejects_corrupted_object(s3, s3_bucket, tmp_path):
+    compression = s3.upload_model(write_pickle(tmp_path), "model.pkl", s3_bucket, codec="gzip")
+    stored = s3.s3_client.get_object(Bucket=s3_bucket, Key="model.pkl")["Body"].read()
+    corrupted = stored[:100] + bytes([stored[100] ^ 0xFF]) + stored[101:]
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="model.pkl", Body=corrupted,
+                            Metadata={key: str(value) for key, value in compression.items()})
+
+    with pytest.raises(MyException, match="Checksum mismatch"):
+        s3.load_model("model.pkl", s3_bucket)
+
+
+def test_load_model_reads_uncompressed_legacy_objects(s3, s3_bucket):
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="model.pkl", Body=pickle.dumps(MODEL))
+
+    assert_same_model(s3.load_model("model.pkl", s3_bucket))
+
+
+def test_load_model_of_missing_key_fails(s3, s3_bucket):
+    with pytest.raises(MyException, match="does not exist"):
+        s3.load_model("missing.pkl", s3_bucket)
+
+
+def test_metadata_cache_answers_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.cloud_storage.aws_storage.time.monotonic", lambda: now[0])
+    cache = ObjectMetadataCache(ttl=60)
+    cache.put("bucket", "key", None)
+
+    assert cache.get("bucket", "key") == (True, None)
+    now[0] += 59.9
+    assert cache.get("bucket", "key") == (True, None)
+    now[0] += 0.2
+    assert cache.get("bucket", "key") == (False, None)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_metadata_cache_invalidation_scopes():
+    cache = ObjectMetadataCache(ttl=60)
+    for bucket_name, s3_key in (("a", "1"), ("a", "2"), ("b", "1")):
+        cache.put(bucket_name, s3_key, {"etag": s3_key})
+
+    cache.invalidate("a", "1")
+    assert [cache.get(*key)[0] for key in (("a", "1"), ("a", "2"), ("b", "1"))] == [False, True, True]
+    cache.invalidate("a")
+    assert [cache.get(*key)[0] for key in (("a", "2"), ("b", "1"))] == [False, True]
+    cache.invalidate()
+    assert cache.get("b", "1") == (False, None)
+
+
+def test_head_answers_are_cached_until_ttl_or_upload(s3, s3_bucket, tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.cloud_storage.aws_storage.time.monotonic", lambda: now[0])
+    assert not s3.s3_key_path_available(s3_bucket, "data.csv")
+
+    # Written behind the service's back: the cached "missing" answer holds until the TTL expires
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="data.csv", Body=b"a,b\n1,2\n")
+    assert not s3.s3_key_path_available(s3_bucket, "data.csv")
+    now[0] += s3.metadata_cache.ttl
+    assert s3.s3_key_path_available(s3_bucket, "data.csv")
+
+    # Written through the service: the key is invalidated at once
+    assert not s3.s3_key_path_available(s3_bucket, "other.csv")
+    file_path = os.path.join(tmp_path, "other.csv")
+    with open(file_path, "w") as file_obj:
+        file_obj.write("a,b\n1,2\n")
+    s3.upload_file(file_path, "other.csv", s3_bucket)
+    assert s3.s3_key_path_available(s3_bucket, "other.csv")
+
+
+def test_keys_available_checks_exact_keys(s3, s3_bucket):
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="model.pkl.bak", Body=b"0")
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="models/model.pkl", Body=b"0")
+
+    assert s3.keys_available(s3_bucket, ["model.pkl", "model.pkl.bak", "models/model.pkl", "models"]) == {
+        "model.pkl": False, "model.pkl.bak": True, "models/model.pkl": True, "models": False}
+
+
+def test_object_reader_streams_conditional_range_gets(s3, s3_bucket):
+    body = os.urandom(1000)
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="blob", Body=body)
+    metadata = s3.head_object(s3_bucket, "blob")
+    client = RecordingClient(s3.s3_client)
+
+    with S3ObjectReader(client, s3_bucket, "blob", size=metadata["size"], etag=metadata["etag"],
+                        part_size=128, prefetch=3) as reader:
+        assert reader.read() == body
+        assert reader.sha256.hexdigest() == hashlib.sha256(body).hexdigest()
+
+    assert sorted(request["Range"] for request in client.requests) == sorted(
+        f"bytes={start}-{min(start + 128, 1000) - 1}" for start in range(0, 1000, 128))
+    assert all(request["IfMatch"] == f'"{metadata["etag"]}"' for request in client.requests)
+
+
+def test_object_reader_fails_when_object_is_replaced(s3, s3_bucket):
+    s3.s3_client.put_object(Bucket=s3_bucket, Key="blob", Body=os.urandom(1000))
+    metadata = s3.head_object(s3_bucket, "blob")
+
+    with S3ObjectReader(s3.s3_client, s3_bucket, "blob", size=metadata["size"], etag=metadata["etag"],
+                        part_size=100, prefetch=1) as reader:
+        reader.read(10)
+        s3.s3_client.put_object(Bucket=s3_bucket, Key="blob", Body=os.urandom(1000))
+        with pytest.raises(ClientError, match="PreconditionFailed"):
+            reader.read()
+
+
+def test_s3_client_endpoint_override_and_reset(local_s3):
+    S3Client.reset()
+    assert S3Client.s3_client is None and S3Client.endpoint_url is None
+
+    connection = local_s3.connect()
+    assert S3Client.endpoint_url == local_s3.endpoint_url
+    assert connection.s3_client.meta.endpoint_url == local_s3.endpoint_url
+    assert connection.s3_resource.meta.client.meta.endpoint_url == local_s3.endpoint_url
+    # Without an endpoint, later instances share the current connection
+    assert S3Client().s3_client is connection.s3_client
+
+    other = S3Client(endpoint_url="http://127.0.0.1:9", aws_access_key_id="local", aws_secret_access_key="local")
+    assert other.s3_client is not connection.s3_client
+    assert other.s3_client.meta.endpoint_url == "http://127.0.0.1:9"
+
+    # SimpleStorageService uses whatever S3Client points at
+    assert SimpleStorageService().s3_client is other.s3_client
+    local_s3.connect()
@@ -0,0 +1,100 @@
+"""
+Stage checkpoints of src/utils/checkpoint_utils.py, used to resume failed training runs.
+"""
+import dataclasses
+import os
+
+import pytest
+
+from src.entity.artifact_entity import (ClassificationMetricArtifact, DataIngestionArtifact, FoldMetricArtifact,
+                                        ModelTrainerArtifact, StageProfileArtifact)
+from src.entity.config_entity import DataTransformationConfig, training_pipeline_config
+from src.utils.checkpoint_utils import PipelineCheckpoint, artifact_file_paths, dataclass_from_dict, rebase_paths
+
+
+def write_file(file_path, content: str = "a,b\n1,2\n") -> str:
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as file_obj:
+        file_obj.write(content)
+    return str(file_path)
+
+
+def ingestion_artifact(tmp_path) -> DataIngestionArtifact:
+    return DataIngestionArtifact(trained_file_path=write_file(tmp_path / "ingested" / "train.csv"),
+                                 test_file_path=write_file(tmp_path / "ingested" / "test.csv"))
+
+
+def test_nested_artifacts_are_rebuilt_from_dicts():
+    fold = FoldMetricArtifact(fold=0, f1_score=0.4, precision_score=0.3, recall_score=0.6, accuracy_score=0.8,
+                              train_rows=10, test_rows=5, fit_seconds=0.1, score_seconds=0.01)
+    artifact = ModelTrainerArtifact(
+        trained_model_file_path="model.pkl",
+        metric_artifact=ClassificationMetricArtifact(f1_score=0.4, precision_score=0.3, recall_score=0.6,
+                                                     fold_metrics=[fold, dataclasses.replace(fold, fold=1)]),
+        search_trials=None)
+
+    rebuilt = dataclass_from_dict(ModelTrainerArtifact, dataclasses.asdict(artifact))
+    assert rebuilt == artifact
+    assert isinstance(rebuilt.metric_artifact.fold_metrics[1], FoldMetricArtifact)
+
+
+def test_rebase_paths_moves_only_paths_under_the_old_root(tmp_path):
+    config = DataTransformationConfig()
+    rebased = rebase_paths(config, training_pipeline_config.artifact_dir, str(tmp_path))
+
+    assert rebased.transformed_train_file_path == os.path.join(
+        str(tmp_path), os.path.relpath(config.transformed_train_file_path, training_pipeline_config.artifact_dir))
+    assert rebased.cache_dir == config.cache_dir      # shared by runs, not under the run directory
+    assert rebased.feature_dtype == config.feature_dtype
+    assert config.transformed_train_file_path.startswith(training_pipeline_config.artifact_dir)
+
+
+def test_artifact_file_paths_lists_existing_files(tmp_path):
+    artifact = dataclasses.replace(ingestion_artifact(tmp_path), data_sketch_file_path=str(tmp_path / "missing.json"),
+                                   stage_profile=StageProfileArtifact(stage="data_ingestion", wall_seconds=1.0,
+                                                                      cpu_seconds=1.0, process_cpu_seconds=1.0))
+
+    assert artifact_file_paths(artifact) == sorted([artifact.trained_file_path, artifact.test_file_path])
+
+
+def test_checkpointed_artifacts_survive_a_restart(tmp_path):
+    artifact = ingestion_artifact(tmp_path)
+    PipelineCheckpoint(str(tmp_path)).save_stage("data_ingestion", artifact)
+
+    resumed = PipelineCheckpoint(str(tmp_path))
+    assert resumed.completed_stages == ["data_ingestion"]
+    assert resumed.load_stage("data_ingestion", DataIngestionArtifact) == artifact
+    assert resumed.load_stage("data_validation", DataIngestionArtifact) is None
+
+
+@pytest.mark.parametrize("damage", [os.remove, lambda file_path: write_file(file_path, "a,b\n1,3\n")],
+                         ids=["missing", "changed"])
+def test_checkpoints_of_damaged_files_are_stale(tmp_path, damage):
+    artifact = ingestion_artifact(tmp_path)
+    checkpoint = PipelineCheckpoint(str(tmp_path))
+    checkpoint.save_stage("data_ingestion", artifact)
+
+    damage(artifact.test_file_path)
+    assert checkpoint.load_stage("data_ingestion", DataIngestionArtifact) is None
+
+
+def test_rerunning_a_stage_drops_the_stages_computed_from_it(tmp_path):
+    artifact = ingestion_artifact(tmp_path)
+    checkpoint = PipelineCheckpoint(str(tmp_path))
+    for stage in ("data_ingestion", "data_validation", "data_drift", "data_transformation"):
+        checkpoint.save_stage(stage, artifact)
+
+    # Given downstream stages are dropped, the others are kept
+    checkpoint.save_stage("data_validation", artifact, downstream=["data_transformation"])
+    assert checkpoint.completed_stages == ["data_ingestion", "data_drift", "data_validation"]
+    # Without downstream stages, every stage recorded after it is dropped
+    checkpoint.save_stage("data_ingestion", artifact)
+    assert checkpoint.completed_stages == ["data_ingestion"]
+
+
+def test_run_status_is_recorded(tmp_path):
+    checkpoint = PipelineCheckpoint(str(tmp_path))
+    checkpoint.set_status("failed", failed_stage="model_trainer")
+
+    manifest = PipelineCheckpoint(str(tmp_path)).manifest
+    assert (manifest["status"], manifest["failed_stage"]) == ("failed", "model_trainer")
@@ -0,0 +1,43 @@
+"""
+Streaming compression of model artifacts (src/utils/compression_utils.py).
+"""
+import hashlib
+import os
+
+import pytest
+
+from src.exception import MyException
+from src.utils import compression_utils
+from src.utils.compression_utils import available_codecs, compress_file, open_decompressed_reader, resolve_codec
+
+
+@pytest.mark.parametrize("codec", available_codecs())
+def test_compressed_files_round_trip(tmp_path, codec):
+    payload = os.urandom(1 << 16) + bytes(3 << 20)      # spans several blocks, partly compressible
+    source_path, target_path = tmp_path / "model.pkl", tmp_path / "model.pkl.compressed"
+    source_path.write_bytes(payload)
+
+    compression = compress_file(str(source_path), str(target_path), codec=codec)
+    stored = target_path.read_bytes()
+    assert compression == {"codec": codec, "size": len(payload), "compressed_size": len(stored),
+                           "sha256": hashlib.sha256(stored).hexdigest()}
+    if codec != "none":
+        assert len(stored) < len(payload) / 4
+    with open(target_path, "rb") as file_obj, open_decompressed_reader(file_obj, codec) as reader:
+        assert reader.read() == payload
+
+
+def test_auto_picks_the_fastest_installed_codec(monkeypatch):
+    assert resolve_codec("auto") == available_codecs()[0]
+    monkeypatch.setattr(compression_utils, "zstandard", None)
+    monkeypatch.setattr(compression_utils, "lz4_frame", None)
+    assert resolve_codec("auto") == "gzip"
+    assert available_codecs() == ["gzip", "none"]
+
+
+def test_unknown_and_missing_codecs_are_rejected(monkeypatch):
+    with pytest.raises(MyException, match="Unknown codec 'brotli'"):
+        resolve_codec("brotli")
+    monkeypatch.setattr(compression_utils, "zstandard", None)
+    with pytest.raises(MyException, match="pip install zstandard"):
+        resolve_codec("zstd")
@@ -0,0 +1,96 @@
+"""
+Task graph execution of src/utils/dag_utils.py, which runs the training pipeline concurrently.
+"""
+import threading
+
+import pytest
+
+from src.exception import MyException
+from src.utils.dag_utils import DAGExecutor, Task, format_report
+
+
+def constant(value):
+    return lambda: value
+
+
+def test_tasks_get_the_results_of_their_inputs():
+    calls = []
+
+    def add(**kwargs):
+        calls.append(sorted(kwargs))
+        return sum(kwargs.values())
+
+    executor = DAGExecutor([Task("total", add, inputs={"a": "one", "b": "two"}),
+                            Task("one", constant(1)), Task("two", constant(2)),
+                            Task("double", lambda total: 2 * total, inputs={"total": "total"})], max_workers=2)
+
+    assert executor.run() == {"one": 1, "two": 2, "total": 3, "double": 6}
+    assert calls == [["a", "b"]]
+    assert executor.order.index("total") > max(executor.order.index("one"), executor.order.index("two"))
+
+
+def test_independent_tasks_run_concurrently():
+    # Each task waits for the other one to start: this only finishes when both run at the same time
+    started = {name: threading.Event() for name in ("validation", "drift")}
+
+    def stage(name: str, other: str):
+        started[name].set()
+        return started[other].wait(timeout=10)
+
+    executor = DAGExecutor([Task("validation", lambda: stage("validation", "drift")),
+                            Task("drift", lambda: stage("drift", "validation"))], max_workers=2)
+
+    assert executor.run() == {"validation": True, "drift": True}
+    report = executor.report()
+    assert all(task["overlap_fraction"] > 0 for task in report["tasks"].values())
+
+
+def test_false_condition_skips_the_task_and_its_dependents():
+    executor = DAGExecutor([
+        Task("drift", constant(False)),
+        Task("transformation", constant("arrays"), after=("drift",), condition=lambda results: results["drift"]),
+        Task("trainer", lambda data: data, inputs={"data": "transformation"}),
+        Task("report", constant("written"), after=("drift",)),
+    ])
+
+    assert executor.run() == {"drift": False, "report": "written"}
+    assert executor.status == {"drift": "done", "transformation": "skipped", "trainer": "skipped", "report": "done"}
+
+
+def test_failing_task_stops_the_graph_and_is_named():
+    def fail():
+        raise RuntimeError("download failed")
+
+    executor = DAGExecutor([Task("ingestion", constant(1)), Task("production_model", fail, after=("ingestion",)),
+                            Task("evaluation", constant(2), after=("production_model",))])
+
+    with pytest.raises(RuntimeError, match="download failed"):
+        executor.run()
+    assert executor.failed_task == "production_model"
+    assert executor.status == {"ingestion": "done", "production_model": "failed"}
+    assert executor.report()["tasks"]["evaluation"]["status"] == "not run"
+
+
+@pytest.mark.parametrize("tasks, kwargs, message", [
+    ([Task("a", constant(1)), Task("a", constant(2))], {}, "Task names must be unique"),
+    ([Task("a", constant(1), after=("b",))], {}, "depends on unknown tasks \\['b'\\]"),
+    ([Task("a", constant(1), after=("b",)), Task("b", constant(2), after=("a",))], {}, "Cycle in the task graph"),
+    ([Task("a", constant(1))], {"executor": "fiber"}, "Unknown executor 'fiber'"),
+], ids=["duplicate", "unknown-dependency", "cycle", "unknown-executor"])
+def test_invalid_graphs_are_rejected(tasks, kwargs, message):
+    with pytest.raises(MyException, match=message):
+        DAGExecutor(tasks, **kwargs)
+
+
+def test_report_and_critical_path():
+    executor = DAGExecutor([Task("ingestion", constant(1)), Task("validation", constant(2), after=("ingestion",)),
+                            Task("drift", constant(3), after=("ingestion",))], max_workers=2)
+    executor.run()
+    executor.timings = {"ingestion": (0.0, 1.0), "validation": (1.0, 2.0), "drift": (1.0, 4.0)}
+
+    assert executor.critical_path() == (["ingestion", "drift"], 4.0)
+    report = executor.report()
+    assert report["sequential_seconds"] == 5.0
+    assert report["tasks"]["validation"]["overlap_fraction"] == 1.0
+    assert report["tasks"]["drift"]["critical"] and not report["tasks"]["validation"]["critical"]
+    assert "ingestion -> drift" in format_report(report)
@@ -0,0 +1,56 @@
+"""
+Cache key of the data transformation stage (src/components/data_transformation.py).
+"""
+import dataclasses
+import inspect
+from pathlib import Path
+
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.entity import estimator
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataTransformationConfig
+from src.utils.main_utils import hash_source
+
+
+def make_transformation(**config_overrides) -> DataTransformation:
+    return DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path="train.csv", test_file_path="test.csv",
+                                                      trained_file_hash="0" * 64, test_file_hash="1" * 64),
+        data_transformation_config=dataclasses.replace(DataTransformationConfig(), **config_overrides),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message="",
+                                                        validation_report_file_path="report.yaml"))
+
+
+@pytest.mark.parametrize("overrides", [{"feature_dtype": "float64"}, {"target_dtype": "int64"},
+                                       {"resampling_strategy": "random_under"}, {"out_of_core": True},
+                                       {"resample_test": False}])
+def test_cache_key_covers_the_output_settings(overrides):
+    assert make_transformation().get_cache_key() == make_transformation().get_cache_key()
+    assert make_transformation(**overrides).get_cache_key() != make_transformation().get_cache_key()
+
+
+def test_cache_key_ignores_settings_outputs_do_not_depend_on():
+    assert (make_transformation(resampling_n_jobs=1, cache_dir="elsewhere").get_cache_key()
+            == make_transformation().get_cache_key())
+
+
+@pytest.mark.parametrize("edit, changed", [("", False), ("\n# edited\n", True)])
+def test_cache_key_changes_with_the_encoder_source(tmp_path, monkeypatch, edit, changed):
+    key = make_transformation().get_cache_key()
+    copy_file_path = tmp_path / "estimator.py"
+    copy_file_path.write_bytes(Path(inspect.getsourcefile(estimator)).read_bytes() + edit.encode())
+    getsourcefile = inspect.getsourcefile
+    monkeypatch.setattr(inspect, "getsourcefile", lambda obj: (
+        str(copy_file_path) if getsourcefile(obj) == getsourcefile(estimator) else getsourcefile(obj)))
+
+    assert (make_transformation().get_cache_key() != key) is changed
+
+
+def test_hash_source_hashes_each_source_file_once():
+    encoder_only = hash_source(estimator.FeatureEncoder)
+
+    # Classes of one module share its file, in any order
+    assert hash_source(estimator.IncrementalPreprocessor, estimator.FeatureEncoder, estimator) == encoder_only
+    assert hash_source(estimator.FeatureEncoder, DataTransformation) != encoder_only
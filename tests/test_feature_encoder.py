@@ -0,0 +1,82 @@
+"""
+FeatureEncoder of src/entity/estimator.py, shared by training, evaluation and serving.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.entity.estimator import FeatureEncoder
+from src.exception import MyException
+from src.utils.main_utils import read_yaml_file
+
+SCHEMA = read_yaml_file("config/schema.yaml")
+DUMMY_COLUMNS = ["Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]
+
+
+def raw_records(rows: int = 60, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "_id": [f"{i:024x}" for i in range(rows)],
+        "id": np.arange(rows),
+        "Gender": rng.choice(["Female", "Male"], rows),
+        "Age": rng.integers(20, 80, rows),
+        "Driving_License": rng.integers(0, 2, rows),
+        "Region_Code": rng.integers(0, 50, rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, rows),
+        "Vehicle_Age": rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"], rows),
+        "Vehicle_Damage": rng.choice(["No", "Yes"], rows),
+        "Annual_Premium": rng.uniform(2000, 60000, rows),
+        "Policy_Sales_Channel": rng.integers(1, 160, rows).astype(float),
+        "Vintage": rng.integers(10, 300, rows),
+        "Response": rng.integers(0, 2, rows),
+    })
+
+
+def encode_with_pandas(frame: pd.DataFrame) -> pd.DataFrame:
+    """Gender mapping, get_dummies(drop_first=True) and renaming, as DataTransformation used to encode."""
+    frame = frame.drop(columns=["_id", "id", "Response"])
+    frame["Gender"] = frame["Gender"].map({"Female": 0, "Male": 1}).astype(int)
+    frame = pd.get_dummies(frame, drop_first=True).rename(columns={
+        "Vehicle_Age_< 1 Year": "Vehicle_Age_lt_1_Year", "Vehicle_Age_> 2 Years": "Vehicle_Age_gt_2_Years"})
+    return frame.astype({column: int for column in DUMMY_COLUMNS})
+
+
+def test_encoding_matches_get_dummies():
+    frame = raw_records()
+    encoder = FeatureEncoder.from_schema(SCHEMA).fit(frame)
+
+    encoded = encoder.transform(frame)
+    pd.testing.assert_frame_equal(encoded, encode_with_pandas(frame), check_dtype=False)
+    assert list(encoder.get_feature_names_out()) == list(encoded.columns)
+
+
+def test_chunks_missing_categories_keep_the_fitted_columns():
+    frame = raw_records()
+    encoder = FeatureEncoder.from_schema(SCHEMA).fit(frame)
+    chunk = frame[(frame["Vehicle_Age"] == "1-2 Year") & (frame["Vehicle_Damage"] == "No")]
+
+    encoded = encoder.transform(chunk)
+    assert list(encoded.columns) == list(encoder.output_columns_)
+    assert (encoded[DUMMY_COLUMNS] == 0).all().all()
+    assert encoded.index.equals(chunk.index)
+
+
+def test_encoded_records_pass_through():
+    frame = raw_records()
+    encoder = FeatureEncoder.from_schema(SCHEMA).fit(frame)
+    encoded = encoder.transform(frame)
+    # Records encoded at export: numeric Gender and dummy columns instead of the categorical ones
+    exported = pd.concat([frame[["_id", "id", "Response"]], encoded], axis=1)
+
+    pd.testing.assert_frame_equal(encoder.transform(exported), encoded, check_dtype=False)
+
+
+def test_unknown_categories():
+    frame = raw_records()
+    encoder = FeatureEncoder.from_schema(SCHEMA).fit(frame)
+
+    with pytest.raises(MyException, match="Unknown categories \\['Other'\\] in column 'Gender'"):
+        encoder.transform(frame.assign(Gender="Other"))
+    # An unknown category of a one-hot column encodes to the baseline, like a missing value
+    encoded = encoder.transform(frame.assign(Vehicle_Age=["New"] * 30 + [None] * 30))
+    assert (encoded[["Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years"]] == 0).all().all()
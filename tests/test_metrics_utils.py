@@ -0,0 +1,103 @@
+"""
+Confusion-count metrics and the run-scoped prediction cache of src/utils/metrics_utils.py.
+"""
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, confusion_matrix, f1_score, precision_score, recall_score
+
+from src.exception import MyException
+from src.pipline.training_pipeline import TrainPipeline
+from src.utils.metrics_utils import PredictionCache, classification_metrics, confusion_counts, metrics_from_counts
+
+
+class CountingModel:
+    """Predicts the sign of the first feature and counts predict calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return (np.asarray(X)[:, 0] > 0).astype(np.int8)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_classification_metrics_match_sklearn(seed):
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random(1000) < 0.2).astype(np.int8)
+    y_pred = np.where(rng.random(1000) < 0.7, y_true, 1 - y_true)
+    metrics = classification_metrics(y_true, y_pred)
+
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred).ravel()
+    assert (metrics["tp"], metrics["fp"], metrics["fn"], metrics["tn"]) == (tp, fp, fn, tn)
+    for name, metric in (("accuracy_score", accuracy_score), ("precision_score", precision_score),
+                         ("recall_score", recall_score), ("f1_score", f1_score)):
+        assert metrics[name] == pytest.approx(metric(y_true, y_pred))
+
+
+def test_confusion_counts_of_another_positive_label():
+    counts = confusion_counts(["no", "yes", "yes", "no"], ["yes", "yes", "no", "no"], pos_label="yes")
+
+    assert counts == {"tp": 1, "fp": 1, "fn": 1, "tn": 1}
+
+
+def test_confusion_counts_rejects_mismatched_shapes():
+    with pytest.raises(MyException, match="differ in shape"):
+        confusion_counts([0, 1, 1], [0, 1])
+
+
+def test_undefined_metrics_are_zero():
+    assert metrics_from_counts(tp=0, fp=0, fn=0, tn=0) == {
+        "accuracy_score": 0.0, "precision_score": 0.0, "recall_score": 0.0, "f1_score": 0.0}
+    assert metrics_from_counts(tp=0, fp=0, fn=3, tn=7)["precision_score"] == 0.0
+
+
+def test_prediction_cache_predicts_each_pair_once():
+    cache, model = PredictionCache(), CountingModel()
+    X = np.array([[1.0], [-1.0]])
+
+    first = cache.predict(model, X, model_key="model.pkl", dataset_key="test.npy")
+    again = cache.predict(model, X, model_key="model.pkl", dataset_key="test.npy")
+
+    assert again is first and model.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_prediction_cache_drops_least_recently_used_entries():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", "test", [0])
+    cache.put("b", "test", [1])
+    cache.get("a", "test")              # "b" is now the least recently used
+    cache.put("c", "test", [1])
+
+    assert len(cache) == 2
+    assert cache.get("b", "test") is None
+    assert cache.get("a", "test") is not None and cache.get("c", "test") is not None
+
+
+def test_prediction_cache_invalidation():
+    cache = PredictionCache()
+    for model_key, dataset_key in (("a", "train"), ("a", "test"), ("b", "test")):
+        cache.put(model_key, dataset_key, [0])
+
+    cache.invalidate("a")
+    assert len(cache) == 1 and cache.get("b", "test") is not None
+    cache.clear()
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("concurrent", [False, True])
+def test_pipeline_clears_its_prediction_cache_when_the_run_ends(tmp_path, monkeypatch, concurrent):
+    pipeline = TrainPipeline(artifact_dir=str(tmp_path), concurrent=concurrent, profile_baseline_file_path=None)
+
+    def failing_run():
+        pipeline.prediction_cache.put("model.pkl", "test.npy", [1, 0])
+        raise RuntimeError("stage failed")
+
+    monkeypatch.setattr(pipeline, "run_pipeline_concurrent" if concurrent else "run_pipeline_sequential",
+                        failing_run)
+    with pytest.raises(RuntimeError):
+        pipeline.run_pipeline()
+    assert len(pipeline.prediction_cache) == 0
+    # Every run owns its cache
+    assert TrainPipeline(artifact_dir=str(tmp_path)).prediction_cache is not pipeline.prediction_cache
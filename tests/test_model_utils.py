@@ -0,0 +1,58 @@
+"""
+Cross-validation and hyperparameter search of src/utils/model_utils.py.
+"""
+import numpy as np
+import pytest
+
+from src.utils.model_utils import build_model, cross_validate_model, read_search_config, search_hyperparameters
+from src.utils.resampling_utils import Resampler
+
+
+@pytest.fixture
+def noise_data():
+    # Labels independent of the features: no model can beat chance on held-out rows
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1500, 5)).astype(np.float32)
+    y = (rng.random(1500) < 0.15).astype(np.int8)
+    return X, y
+
+
+def forest():
+    return build_model("random_forest", {"n_estimators": 30, "min_samples_leaf": 1, "n_jobs": 1, "oob_score": True},
+                       random_state=0)
+
+
+def test_resampling_before_splitting_leaks_into_the_folds(noise_data):
+    X, y = noise_data
+    X_resampled, y_resampled = Resampler("smoteenn", n_jobs=1, random_state=0).fit_resample(X, y)
+
+    leaky = cross_validate_model(forest(), X_resampled, y_resampled, n_folds=3, n_jobs=1, random_state=0)
+    folds = cross_validate_model(forest(), X, y, n_folds=3, n_jobs=1, random_state=0,
+                                 resampler=Resampler("smoteenn", n_jobs=1, random_state=0))
+
+    # Synthetic neighbours of held-out minority rows sit in the training folds of the leaky split
+    assert np.mean([fold["f1_score"] for fold in leaky]) > 0.6
+    assert np.mean([fold["f1_score"] for fold in folds]) < 0.35
+    # Held-out rows are scored as they are: every original row exactly once
+    assert sum(fold["test_rows"] for fold in folds) == len(y)
+    assert sum(fold["train_rows"] for fold in folds) == 2 * len(y)
+
+
+def test_cross_validation_without_resampler_splits_the_rows_given(noise_data):
+    X, y = noise_data
+    folds = cross_validate_model(build_model("logistic_regression"), X, y, n_folds=4, n_jobs=1, random_state=0)
+
+    assert [fold["fold"] for fold in folds] == [0, 1, 2, 3]
+    assert sum(fold["test_rows"] for fold in folds) == len(y)
+
+
+def test_search_with_resampler_reports_model_parameters(noise_data):
+    X, y = noise_data
+    search_config = {**read_search_config("config/model.yaml"), "method": "random", "n_candidates": 3, "n_jobs": 1}
+    best_params, trials = search_hyperparameters(build_model("logistic_regression"),
+                                                 {"C": {"low": 0.01, "high": 10.0, "log": True}}, X, y,
+                                                 search_config, random_state=0,
+                                                 resampler=Resampler("random_under", n_jobs=1, random_state=0))
+
+    assert list(best_params) == ["C"] and 0.01 <= best_params["C"] <= 10.0
+    assert len(trials) == 3 and all(list(trial["params"]) == ["C"] for trial in trials)
@@ -0,0 +1,108 @@
+"""
+Out-of-core data transformation: IncrementalPreprocessor, StreamingUnderSampler and the chunked
+DataTransformation path against the in-memory one.
+"""
+import dataclasses
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.data_transformation import DataTransformation
+from src.constants import TARGET_COLUMN
+from src.data_access.synthetic_data import SyntheticVehicleInsuranceData
+from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+from src.entity.config_entity import DataTransformationConfig, training_pipeline_config
+from src.entity.estimator import FeatureEncoder, IncrementalPreprocessor
+from src.utils.checkpoint_utils import rebase_paths
+from src.utils.main_utils import load_numpy_array_data, read_yaml_file
+from src.utils.resampling_utils import StreamingUnderSampler
+
+SCHEMA = read_yaml_file("config/schema.yaml")
+
+
+@pytest.fixture(scope="module")
+def records() -> pd.DataFrame:
+    return SyntheticVehicleInsuranceData(seed=7).generate(2000)
+
+
+def make_transformation(tmp_path, train: pd.DataFrame, test: pd.DataFrame, **config_overrides) -> DataTransformation:
+    tmp_path.mkdir(parents=True, exist_ok=True)
+    train_file_path, test_file_path = tmp_path / "train.csv", tmp_path / "test.csv"
+    train.to_csv(train_file_path, index=False)
+    test.to_csv(test_file_path, index=False)
+    config = rebase_paths(DataTransformationConfig(), training_pipeline_config.artifact_dir, str(tmp_path / "run"))
+    return DataTransformation(
+        data_ingestion_artifact=DataIngestionArtifact(trained_file_path=str(train_file_path),
+                                                      test_file_path=str(test_file_path)),
+        data_transformation_config=dataclasses.replace(config, use_cache=False, chunk_size=300, **config_overrides),
+        data_validation_artifact=DataValidationArtifact(validation_status=True, message="",
+                                                        validation_report_file_path=str(tmp_path / "report.yaml")))
+
+
+def load_outputs(artifact, unresampled: bool = False):
+    if unresampled:
+        file_paths = (artifact.unresampled_train_file_path, artifact.unresampled_train_target_file_path)
+    else:
+        file_paths = (artifact.transformed_train_file_path, artifact.transformed_train_target_file_path,
+                      artifact.transformed_test_file_path, artifact.transformed_test_target_file_path)
+    return [load_numpy_array_data(file_path) for file_path in file_paths]
+
+
+def test_incremental_preprocessor_matches_the_column_transformer(records, tmp_path):
+    features = FeatureEncoder.from_schema(SCHEMA).fit(records).transform(records)
+    transformation = make_transformation(tmp_path, records.iloc[:10], records.iloc[:10])
+    column_transformer = transformation.get_data_transformer_object().named_steps["Preprocessor"]
+    expected = column_transformer.fit_transform(features)
+
+    preprocessor = IncrementalPreprocessor(num_features=SCHEMA["num_features"], mm_columns=SCHEMA["mm_columns"])
+    for start in range(0, len(features), 300):
+        preprocessor.partial_fit(features.iloc[start:start + 300])
+
+    np.testing.assert_allclose(preprocessor.transform(features), expected, rtol=1e-9, atol=1e-9)
+    # fit starts over instead of updating the fitted scalers
+    np.testing.assert_allclose(preprocessor.fit(features).transform(features), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_streaming_under_sampler_keeps_a_balanced_uniform_sample():
+    y = np.array([0] * 900 + [1] * 100)
+    inclusion = np.zeros(len(y))
+    for seed in range(200):
+        sampler = StreamingUnderSampler({0: 900, 1: 100}, random_state=seed)
+        mask = np.concatenate([sampler.select(y[start:start + 70]) for start in range(0, len(y), 70)])
+        assert mask.sum() == sampler.output_rows == 200
+        assert mask[y == 1].all() and mask[y == 0].sum() == 100
+        inclusion += mask
+
+    # Every majority row is kept with probability 100 / 900, whichever chunk it is in
+    majority_rate = inclusion[y == 0] / 200
+    assert majority_rate.mean() == pytest.approx(1 / 9)
+    assert abs(majority_rate[:450].mean() - majority_rate[450:].mean()) < 0.02
+
+
+def test_out_of_core_outputs_match_the_in_memory_outputs(records, tmp_path):
+    train, test = records.iloc[:1500], records.iloc[1500:]
+    in_memory = make_transformation(tmp_path / "in_memory", train, test, resampling_strategy="none",
+                                    out_of_core=False).initiate_data_transformation()
+    out_of_core = make_transformation(tmp_path / "out_of_core", train, test, resampling_strategy="none",
+                                      out_of_core=True).initiate_data_transformation()
+
+    for expected, streamed in zip(load_outputs(in_memory), load_outputs(out_of_core)):
+        assert streamed.dtype == expected.dtype and streamed.shape == expected.shape
+        np.testing.assert_allclose(streamed, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_out_of_core_undersampling_keeps_every_row_for_cross_validation(records, tmp_path):
+    train, test = records.iloc[:1500], records.iloc[1500:]
+    artifact = make_transformation(tmp_path, train, test, resampling_strategy="random_under", resample_test=False,
+                                   out_of_core=True).initiate_data_transformation()
+    x_train, y_train, x_test, y_test = load_outputs(artifact)
+    x_all, y_all = load_outputs(artifact, unresampled=True)
+
+    positives = int(train[TARGET_COLUMN].sum())
+    assert np.sum(y_train == 1) == np.sum(y_train == 0) == positives
+    assert len(y_test) == len(test) and len(y_all) == len(train)
+    np.testing.assert_array_equal(y_all, train[TARGET_COLUMN].to_numpy())
+    # The kept rows are rows of the full train set
+    kept = {row.tobytes() for row in x_all}
+    assert all(row.tobytes() in kept for row in x_train)
@@ -0,0 +1,92 @@
+"""
+RawBSONColumnDecoder must give the frame of the dict based export (bson.decode_all + DataFrame + "na" as NaN).
+"""
+import bson
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_access.raw_bson_decoder import RawBSONColumnDecoder
+
+COLUMN_TYPES = {"Gender": "category", "Age": "int", "Annual_Premium": "float", "Vehicle_Age": "category",
+                "Response": "int"}
+
+
+def make_document(i: int) -> dict:
+    return {"_id": bson.ObjectId(), "id": i, "Gender": ["Male", "Female", "na"][i % 3], "Age": 20 + i % 60,
+            "Annual_Premium": "na" if i % 7 == 0 else 1000.5 + i, "Vehicle_Age": ["< 1 Year", "> 2 Years"][i % 2],
+            "Response": i % 2}
+
+
+def encode_batch(documents) -> bytes:
+    return b"".join(bson.encode(document) for document in documents)
+
+
+def decode_with_dicts(batches) -> pd.DataFrame:
+    documents = [document for batch in batches for document in bson.decode_all(batch)]
+    return pd.DataFrame(documents).drop(columns=["_id", "id"], errors="ignore").replace({"na": np.nan})
+
+
+def decode_with_columns(batches, capacity: int = 0) -> RawBSONColumnDecoder:
+    decoder = RawBSONColumnDecoder(column_types=COLUMN_TYPES, capacity=capacity)
+    for batch in batches:
+        decoder.add_batch(batch)
+    return decoder
+
+
+def assert_same_frame(decoder: RawBSONColumnDecoder, batches) -> None:
+    expected = decode_with_dicts(batches)
+    decoded = decoder.to_dataframe()
+    pd.testing.assert_frame_equal(decoded[expected.columns], expected, check_dtype=False)
+
+
+def test_decoded_batches_match_the_dict_path():
+    batches = [encode_batch(make_document(i) for i in range(start, start + 50)) for start in range(0, 200, 50)]
+    decoder = decode_with_columns(batches, capacity=10)  # grows past the preallocated capacity
+
+    assert (decoder.decoded_batches, decoder.fallback_batches) == (4, 0)
+    assert_same_frame(decoder, batches)
+    decoded = decoder.to_dataframe()
+    assert decoded["Gender"].isna().sum() == 66 and not (decoded["Gender"] == "na").any()
+    assert decoded["Annual_Premium"].isna().sum() == 29
+    assert decoded["Age"].dtype == np.int64
+
+
+def test_mixed_numeric_types_and_nulls_are_decoded():
+    documents = [make_document(i) for i in range(6)]
+    documents[1]["Age"] = bson.Int64(40)
+    documents[2]["Annual_Premium"] = 1200      # int32 in a float column
+    documents[3]["Age"] = None
+    documents[4]["Vehicle_Age"] = None
+    batches = [encode_batch(documents)]
+    decoder = decode_with_columns(batches)
+
+    assert decoder.fallback_batches == 0
+    assert_same_frame(decoder, batches)
+
+
+def with_last(change):
+    documents = [make_document(i) for i in range(10)]
+    change(documents[-1])
+    return documents
+
+
+@pytest.mark.parametrize("documents", [
+    # A shorter field name at the end of the batch used to index past the buffer
+    with_last(lambda document: document.update(R=document.pop("Response"))),
+    with_last(lambda document: document.update(Extra=1)),
+    with_last(lambda document: document.pop("Response")),
+    with_last(lambda document: document.update(Response=document.pop("Vehicle_Age"))),
+    with_last(lambda document: document.update(Response=True, Vehicle_Age=["list"])),
+    [{"Gender": "Male"}] * 3 + [{"G": "Male"}],
+], ids=["short-name-at-end", "extra-field", "missing-field", "other-order", "unsupported-type", "short-documents"])
+def test_batches_of_mixed_layouts_take_the_dict_fallback(documents):
+    regular = encode_batch(make_document(i) for i in range(100, 110))
+    batches = [regular, encode_batch(documents), regular]
+    decoder = decode_with_columns(batches)
+
+    assert (decoder.decoded_batches, decoder.fallback_batches) == (2, 1)
+    expected = pd.concat([decode_with_dicts([regular, regular]), decode_with_dicts(batches[1:2])],
+                         ignore_index=True)
+    decoded = decoder.to_dataframe()
+    pd.testing.assert_frame_equal(decoded[expected.columns], expected, check_dtype=False)
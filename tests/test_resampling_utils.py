@@ -0,0 +1,64 @@
+"""
+Resampling strategies of src/utils/resampling_utils.py.
+"""
+import numpy as np
+import pytest
+
+from src.exception import MyException
+from src.utils.resampling_utils import RESAMPLING_STRATEGIES, ROW_CHANGING_STRATEGIES, Resampler
+
+
+@pytest.fixture(scope="module")
+def imbalanced_data():
+    rng = np.random.default_rng(0)
+    y = (rng.random(3000) < 0.12).astype(np.int8)
+    X = (rng.normal(size=(3000, 4)) + y[:, None] * 1.5).astype(np.float32)
+    return X, y
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(MyException, match="Unknown resampling strategy 'smote'"):
+        Resampler("smote")
+
+
+@pytest.mark.parametrize("strategy", RESAMPLING_STRATEGIES)
+def test_strategies_are_reproducible(imbalanced_data, strategy):
+    X, y = imbalanced_data
+    resampler = Resampler(strategy, n_jobs=1, chunk_size=1000, random_state=0)
+    X_first, y_first = resampler.fit_resample(X, y)
+    X_again, y_again = Resampler(strategy, n_jobs=1, chunk_size=1000, random_state=0).fit_resample(X, y)
+
+    np.testing.assert_array_equal(X_first, X_again)
+    np.testing.assert_array_equal(y_first, y_again)
+    assert resampler.changes_rows is (strategy in ROW_CHANGING_STRATEGIES)
+    assert resampler.changes_rows is (len(y_first) != len(y))
+    assert resampler.class_weight == ("balanced" if strategy == "class_weight" else None)
+
+
+@pytest.mark.parametrize("strategy", ["smoteenn", "smoteenn_chunked"])
+def test_smoteenn_oversamples_the_minority(imbalanced_data, strategy):
+    X, y = imbalanced_data
+    X_resampled, y_resampled = Resampler(strategy, n_jobs=1, chunk_size=1000, random_state=0).fit_resample(X, y)
+
+    minority_share = y_resampled.mean()
+    assert np.sum(y_resampled == 1) > 3 * np.sum(y == 1)
+    assert 0.35 < minority_share < 0.65
+    assert X_resampled.shape == (len(y_resampled), X.shape[1])
+
+
+def test_parallel_neighbour_searches_give_the_same_rows(imbalanced_data):
+    X, y = imbalanced_data
+    serial = Resampler("smoteenn_chunked", n_jobs=1, chunk_size=1000, random_state=0).fit_resample(X, y)
+    parallel = Resampler("smoteenn_chunked", n_jobs=2, chunk_size=1000, random_state=0).fit_resample(X, y)
+
+    np.testing.assert_array_equal(serial[0], parallel[0])
+    np.testing.assert_array_equal(serial[1], parallel[1])
+
+
+def test_random_under_keeps_a_balanced_subset(imbalanced_data):
+    X, y = imbalanced_data
+    X_resampled, y_resampled = Resampler("random_under", random_state=0).fit_resample(X, y)
+
+    assert np.sum(y_resampled == 0) == np.sum(y_resampled == 1) == np.sum(y == 1)
+    original_rows = {row.tobytes() for row in X}
+    assert all(row.tobytes() in original_rows for row in X_resampled)
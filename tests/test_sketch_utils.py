@@ -0,0 +1,117 @@
+"""
+Quantile/frequency sketches and drift scores of src/utils/sketch_utils.py.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.sketch_utils import (OTHER_CATEGORY, DatasetSketch, FrequencySketch, QuantileSketch,
+                                    compare_frequency_sketches, compare_quantile_sketches,
+                                    population_stability_index)
+
+
+def normal_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def sketch_of(values, k: int = 200, chunk_size: int = 10_000, seed: int = 0) -> QuantileSketch:
+    sketch = QuantileSketch(k=k, seed=seed)
+    for start in range(0, len(values), chunk_size):
+        sketch.update(values[start:start + chunk_size])
+    return sketch
+
+
+def rank_error(sketch: QuantileSketch, values: np.ndarray) -> float:
+    points = np.quantile(values, np.linspace(0.01, 0.99, 99))
+    true_cdf = np.searchsorted(np.sort(values), points, side="right") / len(values)
+    return float(np.max(np.abs(sketch.cdf(points) - true_cdf)))
+
+
+@pytest.mark.parametrize("k", [100, 200, 400])
+def test_quantile_sketch_rank_error_and_memory_are_bounded_by_k(k):
+    values = np.random.default_rng(1).lognormal(size=200_000)
+    sketch = sketch_of(values, k=k)
+
+    # Rank errors of about 1.7 / k, memory of about 3 * k items whatever the number of values
+    assert rank_error(sketch, values) < 3.5 / k
+    assert sum(len(items) for items in sketch.levels) < 3 * k + 2 * len(sketch.levels)
+    assert (sketch.count, sketch.minimum, sketch.maximum) == (len(values), values.min(), values.max())
+
+
+def test_quantile_sketch_quantiles_and_missing_values():
+    values = np.random.default_rng(2).normal(size=100_000)
+    sketch = sketch_of(np.where(np.arange(len(values)) % 10 == 0, np.nan, values))
+
+    assert sketch.count == 90_000
+    median, upper = sketch.quantiles([0.5, 0.975])
+    assert median == pytest.approx(0.0, abs=0.03) and upper == pytest.approx(1.96, abs=0.06)
+    assert np.isnan(QuantileSketch().quantiles([0.5])).all()
+
+
+def test_merged_sketches_are_as_accurate_as_one_sketch():
+    values = np.random.default_rng(3).uniform(size=120_000)
+    merged = sketch_of(values[:40_000], seed=1)
+    merged.merge(sketch_of(values[40_000:], seed=2))
+
+    assert merged.count == len(values)
+    assert rank_error(merged, values) < 3.5 / merged.k
+
+
+def test_sketches_survive_serialization():
+    quantiles = sketch_of(np.random.default_rng(4).normal(size=50_000))
+    frequencies = FrequencySketch()
+    frequencies.update(pd.Series(["a", "b", None, "a"]))
+
+    restored = QuantileSketch.from_dict(quantiles.to_dict())
+    np.testing.assert_array_equal(restored.quantiles([0.1, 0.5, 0.9]), quantiles.quantiles([0.1, 0.5, 0.9]))
+    assert FrequencySketch.from_dict(frequencies.to_dict()).counts == {"a": 2, "b": 1}
+
+
+def test_frequency_sketch_folds_categories_past_the_limit_into_other():
+    sketch = FrequencySketch(max_categories=2)
+    sketch.update(pd.Series(["a"] * 5 + ["b"] * 3 + ["c", "d", None]))
+
+    assert sketch.counts == {"a": 5, "b": 3, OTHER_CATEGORY: 2} and sketch.count == 10
+    np.testing.assert_allclose(sketch.frequencies(["a", "b", "z"]), [0.5, 0.3, 0.0])
+
+
+def test_psi_is_zero_for_identical_distributions_and_floors_empty_bins():
+    assert population_stability_index([0.25] * 4, [0.25] * 4) == 0.0
+    assert math.isfinite(population_stability_index([0.5, 0.5, 0.0], [0.4, 0.4, 0.2]))
+
+
+def test_quantile_drift_scores_follow_the_shift():
+    rng = np.random.default_rng(5)
+    reference = sketch_of(rng.normal(size=100_000))
+    same = compare_quantile_sketches(reference, sketch_of(rng.normal(size=100_000), seed=1))
+    shifted = compare_quantile_sketches(reference, sketch_of(rng.normal(0.5, size=100_000), seed=2))
+
+    assert same["psi"] < 0.01 and same["ks"] < 0.03
+    # KS between N(0, 1) and N(0.5, 1) is 2 * Phi(0.25) - 1
+    assert shifted["ks"] == pytest.approx(2 * normal_cdf(0.25) - 1, abs=0.03)
+    assert shifted["psi"] > 0.2
+
+
+def test_frequency_drift_scores_new_categories():
+    reference, current = FrequencySketch(), FrequencySketch()
+    reference.update(pd.Series(["Yes"] * 50 + ["No"] * 50))
+    current.update(pd.Series(["Yes"] * 30 + ["No"] * 50 + ["Maybe"] * 20))
+    scores = compare_frequency_sketches(reference, current)
+
+    assert scores["ks"] == pytest.approx(0.2)
+    assert scores["psi"] > 0.25
+
+
+def test_dataset_sketch_picks_a_sketch_per_column():
+    frame = pd.DataFrame({"id": range(100), "Age": np.arange(100) % 60 + 20,
+                          "Gender": ["Male", "Female"] * 50, "Region_Code": [1, 2, 3, 4] * 25})
+    sketch = DatasetSketch(categorical_columns=["Region_Code"]).update(frame.iloc[:50]).update(frame.iloc[50:])
+
+    assert sketch.rows == 100 and "id" not in sketch.columns
+    assert isinstance(sketch.columns["Age"], QuantileSketch)
+    assert isinstance(sketch.columns["Gender"], FrequencySketch)
+    assert isinstance(sketch.columns["Region_Code"], FrequencySketch)
+    restored = DatasetSketch.from_dict(sketch.to_dict())
+    assert all(scores["psi"] < 1e-9 for scores in restored.compare(sketch).values())
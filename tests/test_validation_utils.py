@@ -0,0 +1,112 @@
+"""
+Column checks, error budget and missing value limits of src/utils/validation_utils.py.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.main_utils import read_yaml_file
+from src.utils.validation_utils import ColumnCheck, ColumnStatistics, SchemaValidator
+
+SCHEMA = {
+    "columns": [{"Age": "int"}, {"Annual_Premium": "float"}, {"Vehicle_Damage": "category"}, {"Response": "int"}],
+    "column_ranges": {"Age": [18, 100], "Annual_Premium": [0, 1000000], "Response": [0, 1]},
+    "categorical_values": {"Vehicle_Damage": ["No", "Yes"]},
+    "max_null_fraction": {"default": 0.2, "Response": 0.0},
+}
+
+
+def make_frame(rows: int = 100) -> pd.DataFrame:
+    return pd.DataFrame({"Age": np.arange(rows) % 60 + 20, "Annual_Premium": np.linspace(1000, 50000, rows),
+                         "Vehicle_Damage": ["No", "Yes"] * (rows // 2), "Response": np.arange(rows) % 2})
+
+
+def chunks_of(frame: pd.DataFrame, chunk_size: int = 25):
+    return [frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size)]
+
+
+def test_column_check_counts_invalid_values_but_not_nulls():
+    stats = ColumnStatistics()
+    check = ColumnCheck(name="Age", kind="int", value_range=(18, 100))
+    series = pd.Series([25, None, 17, 30.5, "old", 101, 40], dtype=object)
+
+    # 17 and 101 out of range, 30.5 not an int, "old" not a number; the missing value is no error
+    assert check.evaluate(series, stats) == 4
+    assert (stats.range_errors, stats.dtype_errors, stats.null_count, stats.count) == (2, 2, 1, 7)
+    assert (stats.minimum, stats.maximum) == (17.0, 101.0)
+
+
+def test_column_check_of_categories_counts_values():
+    stats = ColumnStatistics()
+    check = ColumnCheck(name="Vehicle_Damage", kind="category", allowed_values=["No", "Yes"])
+
+    assert check.evaluate(pd.Series(["No", "Yes", "Maybe", None, "Yes"]), stats) == 1
+    assert stats.value_counts == {"Yes": 2, "No": 1, "Maybe": 1}
+    assert stats.to_dict()["null_fraction"] == 0.2
+
+
+def test_missing_values_do_not_use_up_the_error_budget():
+    frame = make_frame()
+    frame.loc[:14, "Annual_Premium"] = np.nan      # 15 % missing, within the default limit
+    validator = SchemaValidator(SCHEMA, error_budget=0)
+    result = validator.validate_chunks(chunks_of(frame))
+
+    assert (result.errors, result.null_fraction_exceeded) == (0, [])
+    assert validator.is_valid(result)
+    assert result.column_statistics["Annual_Premium"].null_count == 15
+
+
+def test_null_fraction_limit_rejects_data_within_the_error_budget():
+    frame = make_frame()
+    frame.loc[:24, "Annual_Premium"] = np.nan      # 25 % missing, over the default limit
+    frame.loc[50, "Age"] = 150
+    validator = SchemaValidator(SCHEMA, error_budget=5)
+    result = validator.validate_chunks(chunks_of(frame))
+
+    # The single invalid value fits the budget, the missing values alone reject the data
+    assert (result.errors, result.early_stopped) == (1, False)
+    assert result.null_fraction_exceeded == ["Annual_Premium"]
+    assert not validator.is_valid(result)
+
+
+def test_per_column_limit_overrides_the_default():
+    frame = make_frame()
+    frame["Response"] = frame["Response"].astype(float)
+    frame.loc[99, "Response"] = np.nan
+    validator = SchemaValidator(SCHEMA, error_budget=0)
+    result = validator.validate_chunks(chunks_of(frame))
+
+    assert validator.null_fraction_limit("Response") == 0.0 and validator.null_fraction_limit("Age") == 0.2
+    assert result.errors == 0 and result.null_fraction_exceeded == ["Response"]
+
+
+@pytest.mark.parametrize("max_null_fraction, exceeded", [(0.1, ["Annual_Premium"]), (0.5, []), (None, [])])
+def test_single_limit_or_no_limit(max_null_fraction, exceeded):
+    schema = {key: value for key, value in SCHEMA.items() if key != "max_null_fraction"}
+    if max_null_fraction is not None:
+        schema["max_null_fraction"] = max_null_fraction
+    frame = make_frame()
+    frame.loc[:29, "Annual_Premium"] = np.nan
+    result = SchemaValidator(schema).validate_chunks(chunks_of(frame))
+
+    assert result.null_fraction_exceeded == exceeded
+
+
+def test_invalid_values_over_the_budget_stop_the_scan_early():
+    frame = make_frame()
+    frame.loc[[5, 10, 60], "Vehicle_Damage"] = "Maybe"
+    validator = SchemaValidator(SCHEMA, error_budget=1)
+    result = validator.validate_chunks(chunks_of(frame))
+
+    assert (result.errors, result.early_stopped, result.rows) == (2, True, 25)
+    assert not validator.is_valid(result)
+    tolerant = SchemaValidator(SCHEMA, error_budget=3)
+    assert tolerant.is_valid(tolerant.validate_chunks(chunks_of(frame)))
+
+
+def test_project_schema_tolerates_sporadic_missing_values():
+    schema = read_yaml_file("config/schema.yaml")
+    validator = SchemaValidator(schema)
+
+    assert 0.0 < validator.max_null_fraction < 1.0
+    assert validator.null_fraction_limit("Response") == 0.0